@@ -5,9 +5,10 @@ const grammy_1 = require("grammy");
 const menu_1 = require("@grammyjs/menu");
 const hydrate_1 = require("@grammyjs/hydrate");
 const conversations_1 = require("@grammyjs/conversations");
-const child_process_1 = require("child_process");
 const storage_file_1 = require("@grammyjs/storage-file");
 const acl_1 = require("./acl");
+const renderClient_1 = require("./renderClient");
+const priceCards_1 = require("./priceCards");
 // --------------------------------------------------
 //  Utility
 // --------------------------------------------------
@@ -44,41 +45,29 @@ function collectFormData(ctx) {
         List2: s?.List2,
     };
 }
-// spawn the Python script to compose the image
-async function updatecarImage(ctx) {
+// render the image through the render server (see renderClient.ts)
+// Menu updates render the fast preview tier; finishConversation passes
+// final=true for the full-quality file that is sent to the user and channel.
+async function updatecarImage(ctx, final = false) {
     const { List1 = "0", List2 = "0", oneORtwo = true, } = ctx.session;
     const outputPath = getOutputPath(ctx);
     ctx.session.outputPath = outputPath;
-    let args;
-    if (oneORtwo) {
-        args = [
-            "./src/craft/car1.py",
-            "--prices",
-            List1,
-            "--output_path",
-            outputPath,
-        ];
+    const template = oneORtwo ? "car1" : "car2";
+    const params = { prices_block: oneORtwo ? List1 : List2 };
+    log(`Rendering ${template} (${final ? "final" : "preview"}) with`, params);
+    try {
+        await (0, renderClient_1.renderForBot)(template, params, outputPath, final, { prices_block: "prices" });
     }
-    else {
-        args = [
-            "./src/craft/car2.py",
-            "--prices",
-            List2,
-            "--output_path",
-            outputPath,
-        ];
+    catch (err) {
+        log("Render error", err);
     }
-    log("Calling Python car.py with args", args);
-    const result = (0, child_process_1.spawnSync)("python3", args, { stdio: "inherit" });
-    if (result.error)
-        log("Python error", result.error);
     // update inline image in bot message
     const mainMessageId = ctx.session.mainMessageId;
     if (mainMessageId) {
         try {
             await ctx.api.editMessageMedia(ctx.chat.id, mainMessageId, {
                 type: "photo",
-                media: new grammy_1.InputFile(outputPath),
+                media: (0, renderClient_1.renderedFile)(outputPath),
             });
         }
         catch (e) {
@@ -188,7 +177,7 @@ async function clearFormConversation(conversation, ctx) {
 //     const outputPath = getOutputPath(ctx);
 //     try {
 //         const docMsg = await ctx.replyWithDocument(
-//             new InputFile(outputPath),
+//             renderedFile(outputPath),
 //             { caption: "فایل تصویر ایجاد شد" }
 //         );
 //         // persist the message‑id
@@ -200,7 +189,7 @@ async function clearFormConversation(conversation, ctx) {
 //     try {
 //         await ctx.api.sendDocument(
 //             -1002302354978, // your channel ID
-//             new InputFile(outputPath),
+//             renderedFile(outputPath),
 //             {
 //                 caption: `User @${ctx.from?.username} (ID: ${ctx.from?.id}) just finished their form!`,
 //             }
@@ -215,12 +204,12 @@ async function finishConversation(conversation, ctx) {
     await conversation.external(async (ctxExt) => {
         var _a;
         // 1) Render the image and gather final form data
-        await updatecarImage(ctxExt);
+        await updatecarImage(ctxExt, true);
         const finalData = collectFormData(ctxExt); // sync or await if needed
         const outputPath = getOutputPath(ctxExt);
         // 2) Send the document to the user
         try {
-            const docMsg = await ctxExt.replyWithDocument(new grammy_1.InputFile(outputPath), { caption: "فایل تصویر ایجاد شد" });
+            const docMsg = await ctxExt.replyWithDocument((0, renderClient_1.renderedFile)(outputPath), { caption: "فایل تصویر ایجاد شد" });
             // Persist the message-id safely
             (_a = ctxExt.session).sentDocMsgIds ?? (_a.sentDocMsgIds = []);
             ctxExt.session.sentDocMsgIds.push(docMsg.message_id);
@@ -231,7 +220,7 @@ async function finishConversation(conversation, ctx) {
         // 3) Log the document in your channel
         try {
             await ctxExt.api.sendDocument(-1002302354978, // channel ID
-            new grammy_1.InputFile(outputPath), {
+            (0, renderClient_1.renderedFile)(outputPath), {
                 caption: `User @${ctxExt.from?.username} (ID: ${ctxExt.from?.id}) just finished their form!`,
             });
         }
@@ -292,6 +281,16 @@ bot.command("start", async (ctx) => {
     ctx.session.mainMessageId = sentMsg.message_id;
     log("Bot started for", userId);
 });
+// /current: the card price_scheduler.py keeps pre-rendered from the price
+// feed (see priceCards.ts), sent without rendering.
+bot.command("current", async (ctx) => {
+    const file = (0, priceCards_1.currentCard)(ctx.session.oneORtwo === false ? "car2" : "car1");
+    if (!file) {
+        await ctx.reply("کارت آماده‌ای از فید قیمت‌ها وجود ندارد.");
+        return;
+    }
+    await ctx.replyWithDocument(new grammy_1.InputFile(file), { caption: "آخرین کارت قیمت‌ها" });
+});
 bot.command("add", async (ctx) => {
     const adminId = ctx.from?.id;
     if (!adminId || !(0, acl_1.isAdmin)(adminId))
@@ -356,6 +355,7 @@ bot.command("list", async (ctx) => {
 });
 bot.api.setMyCommands([
     { command: "start", description: "رباتو روشن کن!" },
+    { command: "current", description: "آخرین کارت قیمت‌ها از فید." },
     { command: "list", description: "لیست آی‌دی افرادی که به بات دسترسی دارند." },
     { command: "remove", description: "با کمک آی‌دی دسترسی استفاده از بات رو بگیر." },
     { command: "add", description: "با کمک آی‌دی به بات دسترسی بده." },
@@ -5,9 +5,10 @@ const grammy_1 = require("grammy");
 const menu_1 = require("@grammyjs/menu");
 const hydrate_1 = require("@grammyjs/hydrate");
 const conversations_1 = require("@grammyjs/conversations");
-const child_process_1 = require("child_process");
 const storage_file_1 = require("@grammyjs/storage-file");
 const acl_1 = require("./acl");
+const renderClient_1 = require("./renderClient");
+const priceCards_1 = require("./priceCards");
 // --------------------------------------------------
 //  Utility
 // --------------------------------------------------
@@ -48,39 +49,35 @@ function collectFormData(ctx) {
         SaudiRiyal: s?.SaudiRiyal,
     };
 }
-// spawn the Python script to compose the image
-async function updateCurrencyImage(ctx) {
+// render the image through the render server (see renderClient.ts)
+// Menu updates render the fast preview tier; finishConversation passes
+// final=true for the full-quality file that is sent to the user and channel.
+async function updateCurrencyImage(ctx, final = false) {
     const { Gold = "0", Coin = "0", HalfCoin = "0", QuarterCoin = "0", Gold18 = "0", Gold24 = "0", SaudiRiyal = "0", } = ctx.session;
     const outputPath = getOutputPath(ctx);
     ctx.session.outputPath = outputPath;
-    const args = [
-        "./src/craft/gold.py",
-        "--Gold",
-        Gold,
-        "--Coin",
-        Coin,
-        "--HalfCoin",
-        HalfCoin,
-        "--QuarterCoin",
-        QuarterCoin,
-        "--Gold18",
-        Gold18,
-        "--Gold24",
-        Gold24,
-        "--output_path",
-        outputPath,
-    ];
-    log("Calling Python Currency.py with args", args);
-    const result = (0, child_process_1.spawnSync)("python3", args, { stdio: "inherit" });
-    if (result.error)
-        log("Python error", result.error);
+    const params = {
+        Gold: Gold,
+        Coin: Coin,
+        HalfCoin: HalfCoin,
+        QuarterCoin: QuarterCoin,
+        Gold18: Gold18,
+        Gold24: Gold24,
+    };
+    log(`Rendering gold (${final ? "final" : "preview"}) with`, params);
+    try {
+        await (0, renderClient_1.renderForBot)("gold", params, outputPath, final);
+    }
+    catch (err) {
+        log("Render error", err);
+    }
     // update inline image in bot message
     const mainMessageId = ctx.session.mainMessageId;
     if (mainMessageId) {
         try {
             await ctx.api.editMessageMedia(ctx.chat.id, mainMessageId, {
                 type: "photo",
-                media: new grammy_1.InputFile(outputPath),
+                media: (0, renderClient_1.renderedFile)(outputPath),
             });
         }
         catch (e) {
@@ -163,13 +160,13 @@ async function clearFormConversation(conversation, ctx) {
 }
 async function finishConversation(conversation, ctx) {
     var _a;
-    await conversation.external(updateCurrencyImage); // ← add this line
+    await conversation.external((ctx) => updateCurrencyImage(ctx, true)); // ← add this line
     await ctx.answerCallbackQuery(); // first line of every button handler
     // 1) Gather final form data for logging or summarizing
     const finalData = await conversation.external((ctx) => collectFormData(ctx));
     const outputPath = getOutputPath(ctx);
     try {
-        const docMsg = await ctx.replyWithDocument(new grammy_1.InputFile(outputPath), { caption: "فایل تصویر ایجاد شد" });
+        const docMsg = await ctx.replyWithDocument((0, renderClient_1.renderedFile)(outputPath), { caption: "فایل تصویر ایجاد شد" });
         // persist the message‑id
         (_a = ctx.session).sentDocMsgIds ?? (_a.sentDocMsgIds = []);
         ctx.session.sentDocMsgIds.push(docMsg.message_id);
@@ -179,7 +176,7 @@ async function finishConversation(conversation, ctx) {
     }
     try {
         await ctx.api.sendDocument(-1002302354978, // your channel ID
-        new grammy_1.InputFile(outputPath), {
+        (0, renderClient_1.renderedFile)(outputPath), {
             caption: `User @${ctx.from?.username} (ID: ${ctx.from?.id}) just finished their form!`,
         });
     }
@@ -251,6 +248,16 @@ bot.command("start", async (ctx) => {
     ctx.session.mainMessageId = sentMsg.message_id;
     log("Bot started for", userId);
 });
+// /current: the card price_scheduler.py keeps pre-rendered from the price
+// feed (see priceCards.ts), sent without rendering.
+bot.command("current", async (ctx) => {
+    const file = (0, priceCards_1.currentCard)("gold");
+    if (!file) {
+        await ctx.reply("کارت آماده‌ای از فید قیمت‌ها وجود ندارد.");
+        return;
+    }
+    await ctx.replyWithDocument(new grammy_1.InputFile(file), { caption: "آخرین کارت قیمت‌ها" });
+});
 bot.command("add", async (ctx) => {
     const adminId = ctx.from?.id;
     if (!adminId || !(0, acl_1.isAdmin)(adminId))
@@ -315,6 +322,7 @@ bot.command("list", async (ctx) => {
 });
 bot.api.setMyCommands([
     { command: "start", description: "رباتو روشن کن!" },
+    { command: "current", description: "آخرین کارت قیمت‌ها از فید." },
     { command: "list", description: "لیست آی‌دی افرادی که به بات دسترسی دارند." },
     { command: "remove", description: "با کمک آی‌دی دسترسی استفاده از بات رو بگیر." },
     { command: "add", description: "با کمک آی‌دی به بات دسترسی بده." },
@@ -39,9 +39,9 @@ const menu_1 = require("@grammyjs/menu");
 const hydrate_1 = require("@grammyjs/hydrate");
 const conversations_1 = require("@grammyjs/conversations");
 const fs = __importStar(require("fs"));
-const child_process_1 = require("child_process");
 const storage_file_1 = require("@grammyjs/storage-file");
 const acl_1 = require("./acl");
+const renderClient_1 = require("./renderClient");
 const log = (...args) => {
     const timestamp = new Date().toISOString();
     console.log(`[${timestamp}]`, ...args);
@@ -73,8 +73,10 @@ function collectFormData(ctx) {
         source: ctx.session.source,
     };
 }
-// Utility: call the Python script via spawnSync, passing all relevant arguments as CLI args.
-async function updateNewspaperImage(ctx) {
+// Utility: render the image through the render server (see renderClient.ts).
+// Menu updates render the fast preview tier; finishConversation passes
+// final=true for the full-quality file that is sent to the user and channel.
+async function updateNewspaperImage(ctx, final = false) {
     const userId = ctx.from?.id;
     const username = ctx.from?.username;
     log(`Generating image for user ${username} (${userId})`);
@@ -91,35 +93,31 @@ async function updateNewspaperImage(ctx) {
     const source = ctx.session.source || "";
     // We'll produce the final image here.
     const outputPath = getOutputPath(ctx);
-    const pythonScript = "./src/craft/Live.py"; // Adjust if needed
-    const args = [
-        pythonScript,
-        "--user_image_path", userImagePath,
-        "--overline_text", overlineText,
-        "--main_headline_text", mainHeadlineText,
-        "--output_path", outputPath,
-        "--source_text", source,
-    ];
-    log("Calling Python script with args:", args);
-    // spawnSync to run python3 script
-    const result = (0, child_process_1.spawnSync)("python3", args, { stdio: "inherit" });
-    if (result.error) {
-        log("Error calling Python script:", result.error);
+    const params = {
+        user_image_path: userImagePath,
+        overline_text: overlineText,
+        main_headline_text: mainHeadlineText,
+        source_text: source,
+    };
+    log(`Rendering Live (${final ? "final" : "preview"}) with`, params);
+    try {
+        await (0, renderClient_1.renderForBot)("Live", params, outputPath, final);
+        log("Image rendered successfully");
     }
-    else {
-        log("Python script executed successfully");
+    catch (err) {
+        log("Error rendering image:", err);
     }
     // try {
     //     await ctx.api.editMessageMedia(ctx.chat!.id, mainMessageId, {
     //         type: "photo",
-    //         media: new InputFile(outputPath),
+    //         media: renderedFile(outputPath),
     //     });
     //     log("Updated message media successfully.");
     // } catch (error) {
     //     console.error("Failed to update newspaper image:", error);
     // }
     try {
-        await ctx.api.editMessageMedia(ctx.chat.id, mainMessageId, { type: "photo", media: new grammy_1.InputFile(outputPath) });
+        await ctx.api.editMessageMedia(ctx.chat.id, mainMessageId, { type: "photo", media: (0, renderClient_1.renderedFile)(outputPath) });
     }
     catch (e) {
         if (e.error_code === 400 && /not modified/.test(e.description)) {
@@ -132,7 +130,7 @@ async function updateNewspaperImage(ctx) {
     // Now send ONE message in the channel with the final image + some info
     try {
         await ctx.api.sendPhoto(-1002302354978, // Your channel ID
-        new grammy_1.InputFile(outputPath), {
+        (0, renderClient_1.renderedFile)(outputPath), {
             caption: `Newspaper created by @${username} \n(ID: ${userId})\n`
         });
     }
@@ -314,11 +312,13 @@ async function clearFormConversation(conversation, ctx) {
 async function finishConversation(conversation, ctx) {
     var _a;
     await ctx.answerCallbackQuery(); // first line of every button handler
+    // Re-render at full quality: the menu only ever showed the preview.
+    await conversation.external((ctx) => updateNewspaperImage(ctx, true));
     // 1) Gather final form data for logging or summarizing
     const finalData = await conversation.external((ctx) => collectFormData(ctx));
     const outputPath = getOutputPath(ctx);
     try {
-        const docMsg = await ctx.replyWithDocument(new grammy_1.InputFile(outputPath), { caption: "فایل تصویر ایجاد شد" });
+        const docMsg = await ctx.replyWithDocument((0, renderClient_1.renderedFile)(outputPath), { caption: "فایل تصویر ایجاد شد" });
         // persist the message‑id
         (_a = ctx.session).sentDocMsgIds ?? (_a.sentDocMsgIds = []);
         ctx.session.sentDocMsgIds.push(docMsg.message_id);
@@ -328,7 +328,7 @@ async function finishConversation(conversation, ctx) {
     }
     try {
         await ctx.api.sendDocument(-1002302354978, // your channel ID
-        new grammy_1.InputFile(outputPath), {
+        (0, renderClient_1.renderedFile)(outputPath), {
             caption: `User @${ctx.from?.username} (ID: ${ctx.from?.id}) just finished their form!`,
         });
     }
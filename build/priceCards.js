@@ -0,0 +1,68 @@
+"use strict";
+var __createBinding = (this && this.__createBinding) || (Object.create ? (function(o, m, k, k2) {
+    if (k2 === undefined) k2 = k;
+    var desc = Object.getOwnPropertyDescriptor(m, k);
+    if (!desc || ("get" in desc ? !m.__esModule : desc.writable || desc.configurable)) {
+      desc = { enumerable: true, get: function() { return m[k]; } };
+    }
+    Object.defineProperty(o, k2, desc);
+}) : (function(o, m, k, k2) {
+    if (k2 === undefined) k2 = k;
+    o[k2] = m[k];
+}));
+var __setModuleDefault = (this && this.__setModuleDefault) || (Object.create ? (function(o, v) {
+    Object.defineProperty(o, "default", { enumerable: true, value: v });
+}) : function(o, v) {
+    o["default"] = v;
+});
+var __importStar = (this && this.__importStar) || (function () {
+    var ownKeys = function(o) {
+        ownKeys = Object.getOwnPropertyNames || function (o) {
+            var ar = [];
+            for (var k in o) if (Object.prototype.hasOwnProperty.call(o, k)) ar[ar.length] = k;
+            return ar;
+        };
+        return ownKeys(o);
+    };
+    return function (mod) {
+        if (mod && mod.__esModule) return mod;
+        var result = {};
+        if (mod != null) for (var k = ownKeys(mod), i = 0; i < k.length; i++) if (k[i] !== "default") __createBinding(result, mod, k[i]);
+        __setModuleDefault(result, mod);
+        return result;
+    };
+})();
+Object.defineProperty(exports, "__esModule", { value: true });
+exports.PRICE_CARDS_DIR = void 0;
+exports.currentCard = currentCard;
+const fs = __importStar(require("fs"));
+const path = __importStar(require("path"));
+// Cards kept pre-rendered by src/craft/price_scheduler.py. Its state.json
+// maps every card file to {card, signature, rendered_at}, so a bot can hand
+// out the current card without rendering it.
+exports.PRICE_CARDS_DIR = process.env.PRICE_CARDS_DIR ?? "./OutPut/prices";
+const STATE_PATH = path.join(exports.PRICE_CARDS_DIR, "state.json");
+function load() {
+    try {
+        return JSON.parse(fs.readFileSync(STATE_PATH, "utf8"));
+    }
+    catch {
+        return {}; // the scheduler has not written it yet
+    }
+}
+// Path of the most recently rendered `card` (price_batch card name, e.g.
+// "gold", "car1"), or null if the scheduler has not rendered one. Cards of
+// one poll share rendered_at; the file name (which ends in the feed date)
+// breaks the tie.
+function currentCard(card) {
+    let best = null;
+    let bestKey = "";
+    for (const [file, entry] of Object.entries(load())) {
+        const key = `${entry.rendered_at} ${file}`;
+        if (entry.card !== card || key <= bestKey || !fs.existsSync(file))
+            continue;
+        best = file;
+        bestKey = key;
+    }
+    return best;
+}
@@ -0,0 +1,150 @@
+"use strict";
+var __createBinding = (this && this.__createBinding) || (Object.create ? (function(o, m, k, k2) {
+    if (k2 === undefined) k2 = k;
+    var desc = Object.getOwnPropertyDescriptor(m, k);
+    if (!desc || ("get" in desc ? !m.__esModule : desc.writable || desc.configurable)) {
+      desc = { enumerable: true, get: function() { return m[k]; } };
+    }
+    Object.defineProperty(o, k2, desc);
+}) : (function(o, m, k, k2) {
+    if (k2 === undefined) k2 = k;
+    o[k2] = m[k];
+}));
+var __setModuleDefault = (this && this.__setModuleDefault) || (Object.create ? (function(o, v) {
+    Object.defineProperty(o, "default", { enumerable: true, value: v });
+}) : function(o, v) {
+    o["default"] = v;
+});
+var __importStar = (this && this.__importStar) || (function () {
+    var ownKeys = function(o) {
+        ownKeys = Object.getOwnPropertyNames || function (o) {
+            var ar = [];
+            for (var k in o) if (Object.prototype.hasOwnProperty.call(o, k)) ar[ar.length] = k;
+            return ar;
+        };
+        return ownKeys(o);
+    };
+    return function (mod) {
+        if (mod && mod.__esModule) return mod;
+        var result = {};
+        if (mod != null) for (var k = ownKeys(mod), i = 0; i < k.length; i++) if (k[i] !== "default") __createBinding(result, mod, k[i]);
+        __setModuleDefault(result, mod);
+        return result;
+    };
+})();
+Object.defineProperty(exports, "__esModule", { value: true });
+exports.RENDER_TIMEOUT_MS = exports.RENDER_SOCKET = void 0;
+exports.renderImage = renderImage;
+exports.renderForBot = renderForBot;
+exports.renderedFile = renderedFile;
+const net = __importStar(require("net"));
+const path = __importStar(require("path"));
+const child_process_1 = require("child_process");
+const grammy_1 = require("grammy");
+// Client for src/craft/render_server.py: sends one render request over the
+// Unix socket and resolves with the encoded image, so bots can pass it
+// straight to `new InputFile(buffer)` without touching ./OutPut.
+exports.RENDER_SOCKET = process.env.RENDER_SOCKET ?? "/tmp/captioncrafter-render.sock";
+// A render that takes longer than this (ms) is abandoned, so a wedged server
+// cannot hang a bot.
+exports.RENDER_TIMEOUT_MS = Number(process.env.RENDER_TIMEOUT_MS ?? 30000);
+function renderImage(template, params, profile, socketPath = exports.RENDER_SOCKET, instant, timeoutMs = exports.RENDER_TIMEOUT_MS) {
+    return new Promise((resolve, reject) => {
+        const sock = net.createConnection(socketPath);
+        let buffered = Buffer.alloc(0);
+        let header = null;
+        let settled = false;
+        const fail = (err) => {
+            if (settled)
+                return;
+            settled = true;
+            sock.destroy();
+            reject(err);
+        };
+        sock.setTimeout(timeoutMs);
+        sock.on("timeout", () => fail(new Error(`render of ${template} timed out after ${timeoutMs} ms`)));
+        sock.on("connect", () => {
+            sock.write(JSON.stringify({ template, params, profile: profile ?? null, instant: instant ?? null }) + "\n");
+        });
+        sock.on("data", (chunk) => {
+            if (settled)
+                return;
+            buffered = Buffer.concat([buffered, chunk]);
+            if (!header) {
+                const nl = buffered.indexOf(0x0a);
+                if (nl === -1)
+                    return;
+                try {
+                    header = JSON.parse(buffered.subarray(0, nl).toString("utf8"));
+                }
+                catch (e) {
+                    fail(new Error(`malformed render server header: ${e.message}`));
+                    return;
+                }
+                buffered = buffered.subarray(nl + 1);
+                if (!header.ok) {
+                    fail(new Error(header.error));
+                    return;
+                }
+            }
+            if (buffered.length >= header.length) {
+                settled = true;
+                sock.end();
+                resolve({ data: buffered.subarray(0, header.length), info: header.info });
+            }
+        });
+        // The server closed the connection before the whole response arrived.
+        sock.on("close", () => {
+            const got = header ? `${buffered.length} of ${header.length} bytes` : "no header";
+            fail(new Error(`render server closed the connection early (${got})`));
+        });
+        sock.on("error", fail);
+    });
+}
+// --------------------------------------------------
+//  Bot helpers
+// --------------------------------------------------
+// Last image rendered per output path, handed to Telegram from memory.
+const rendered = new Map();
+const MAX_RENDERED = 256;
+function serverDown(err) {
+    return err?.code === "ENOENT" || err?.code === "ECONNREFUSED";
+}
+// Render `template` for a bot: through the render server (warm fonts, layout
+// and templates; previews and finals share them), or, when the server is not
+// running, the old way: spawn the script, which writes `outputPath`.
+// `params` are the template's keyword arguments; `cliFlags` maps those whose
+// command-line flag has another name (e.g. prices_block -> --prices).
+// Send the result with renderedFile(outputPath).
+async function renderForBot(template, params, outputPath, final, cliFlags = {}) {
+    try {
+        const { data } = await renderImage(template, { ...params, preview: !final });
+        rendered.delete(outputPath);
+        rendered.set(outputPath, data);
+        if (rendered.size > MAX_RENDERED)
+            rendered.delete(rendered.keys().next().value);
+        return;
+    }
+    catch (err) {
+        if (!serverDown(err))
+            throw err;
+    }
+    rendered.delete(outputPath);
+    const args = [`./src/craft/${template}.py`, "--output_path", outputPath];
+    for (const [key, value] of Object.entries(params)) {
+        args.push(`--${cliFlags[key] ?? key}`, value);
+    }
+    if (!final)
+        args.push("--preview");
+    const result = (0, child_process_1.spawnSync)("python3", args, { stdio: "inherit" });
+    if (result.error)
+        throw result.error;
+    if (result.status !== 0)
+        throw new Error(`${template}.py exited with status ${result.status}`);
+}
+// The image last rendered for `outputPath`: from memory when it came from the
+// render server, otherwise the file the script wrote.
+function renderedFile(outputPath) {
+    const data = rendered.get(outputPath);
+    return data ? new grammy_1.InputFile(data, path.basename(outputPath)) : new grammy_1.InputFile(outputPath);
+}
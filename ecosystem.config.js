@@ -131,6 +131,26 @@ module.exports = {
         PYTHON: "/root/CaptionCrafter2.0/venv/bin/python",
         PATH: "/root/CaptionCrafter2.0/venv/bin:/usr/local/bin:/usr/bin:/bin"
       }
+    },
+    {
+      name: "RenderServer",
+      cwd: "/root/CaptionCrafter2.0",
+      script: "src/craft/render_server.py",
+      args: "serve",
+      interpreter: "/root/CaptionCrafter2.0/venv/bin/python",
+      env: {
+        PATH: "/root/CaptionCrafter2.0/venv/bin:/usr/local/bin:/usr/bin:/bin"
+      }
+    },
+    {
+      name: "PriceScheduler",
+      cwd: "/root/CaptionCrafter2.0",
+      script: "src/craft/price_scheduler.py",
+      args: "run",
+      interpreter: "/root/CaptionCrafter2.0/venv/bin/python",
+      env: {
+        PATH: "/root/CaptionCrafter2.0/venv/bin:/usr/local/bin:/usr/bin:/bin"
+      }
     }
   ]
 };
@@ -8,7 +8,6 @@ import {
     createConversation,
 } from "@grammyjs/conversations";
 import * as fs from "fs";
-import { spawnSync } from "child_process";
 import { GrammyError } from "grammy"; // For error checking
 import { FileAdapter } from "@grammyjs/storage-file";
 import {
@@ -19,6 +18,7 @@ import {
     listAllowed,
     listAdmins,
 } from "./acl";
+import { renderForBot, renderedFile } from "./renderClient";
 
 
 
@@ -104,8 +104,10 @@ function collectFormData(ctx: MyContext): FormData {
     };
 }
 
-// Utility: call the Python script via spawnSync, passing all relevant arguments as CLI args.
-async function updateNewspaperImage(ctx: MyContext) {
+// Utility: render the image through the render server (see renderClient.ts).
+// Menu updates render the fast preview tier; finishConversation passes
+// final=true for the full-quality file that is sent to the user and channel.
+async function updateNewspaperImage(ctx: MyContext, final = false) {
 
     const userId = ctx.from?.id;
     const username = ctx.from?.username;
@@ -130,32 +132,25 @@ async function updateNewspaperImage(ctx: MyContext) {
 
 
 
-    const pythonScript = "./src/craft/BreakingNews.py"; // Adjust if needed
-    const args = [
-        pythonScript,
-        "--user_image_path", userImagePath,
-        "--overline_text", overlineText,
-        "--main_headline_text", mainHeadlineText,
-        "--output_path", outputPath,
-        "--events_text", events,
-
-    ];
-
-
-    log("Calling Python script with args:", args);
+    const params = {
+        user_image_path: userImagePath,
+        overline_text: overlineText,
+        main_headline_text: mainHeadlineText,
+        events_text: events,
+    };
 
-    // spawnSync to run python3 script
-    const result = spawnSync("python3", args, { stdio: "inherit" });
-    if (result.error) {
-        log("Error calling Python script:", result.error);
-    } else {
-        log("Python script executed successfully");
+    log(`Rendering BreakingNews (${final ? "final" : "preview"}) with`, params);
+    try {
+        await renderForBot("BreakingNews", params, outputPath, final);
+        log("Image rendered successfully");
+    } catch (err) {
+        log("Error rendering image:", err);
     }
 
     // try {
     //     await ctx.api.editMessageMedia(ctx.chat!.id, mainMessageId, {
     //         type: "photo",
-    //         media: new InputFile(outputPath),
+    //         media: renderedFile(outputPath),
     //     });
     //     log("Updated message media successfully.");
     // } catch (error) {
@@ -163,7 +158,7 @@ async function updateNewspaperImage(ctx: MyContext) {
     // }
 
     try {
-        await ctx.api.editMessageMedia(ctx.chat!.id, mainMessageId, { type: "photo", media: new InputFile(outputPath) });
+        await ctx.api.editMessageMedia(ctx.chat!.id, mainMessageId, { type: "photo", media: renderedFile(outputPath) });
     } catch (e: any) {
         if (e.error_code === 400 && /not modified/.test(e.description)) {
             // Nothing really changed, just continue
@@ -177,7 +172,7 @@ async function updateNewspaperImage(ctx: MyContext) {
     try {
         await ctx.api.sendPhoto(
             -1002302354978, // Your channel ID
-            new InputFile(outputPath),
+            renderedFile(outputPath),
             {
                 caption:
                     `Newspaper created by @${username} \n(ID: ${userId})\n`
@@ -444,6 +439,9 @@ async function finishConversation(
 ) {
     await ctx.answerCallbackQuery();   // first line of every button handler
 
+    // Re-render at full quality: the menu only ever showed the preview.
+    await conversation.external((ctx: MyContext) => updateNewspaperImage(ctx, true));
+
     // 1) Gather final form data for logging or summarizing
     const finalData = await conversation.external((ctx: MyContext) =>
         collectFormData(ctx)
@@ -452,7 +450,7 @@ async function finishConversation(
     const outputPath = getOutputPath(ctx);
     try {
         const docMsg = await ctx.replyWithDocument(
-            new InputFile(outputPath),
+            renderedFile(outputPath),
             { caption: "فایل تصویر ایجاد شد" }
         );
 
@@ -470,7 +468,7 @@ async function finishConversation(
     try {
         await ctx.api.sendDocument(
             -1002302354978, // your channel ID
-            new InputFile(outputPath),
+            renderedFile(outputPath),
             {
                 caption: `User @${ctx.from?.username} (ID: ${ctx.from?.id}) just finished their form!`,
             }
@@ -8,7 +8,6 @@ import {
     createConversation,
 } from "@grammyjs/conversations";
 import * as fs from "fs";
-import { spawnSync } from "child_process";
 import { FileAdapter } from "@grammyjs/storage-file";
 import {
     isAdmin,
@@ -18,6 +17,8 @@ import {
     listAllowed,
     listAdmins,
 } from "./acl";
+import { renderForBot, renderedFile } from "./renderClient";
+import { currentCard } from "./priceCards";
 
 
 // --------------------------------------------------
@@ -98,8 +99,10 @@ function collectFormData(ctx: MyContext): FormData {
     };
 }
 
-// spawn the Python script to compose the image
-async function updatecarImage(ctx: MyContext) {
+// render the image through the render server (see renderClient.ts)
+// Menu updates render the fast preview tier; finishConversation passes
+// final=true for the full-quality file that is sent to the user and channel.
+async function updatecarImage(ctx: MyContext, final = false) {
     const {
         List1 = "0",
         List2 = "0",
@@ -109,28 +112,15 @@ async function updatecarImage(ctx: MyContext) {
     const outputPath = getOutputPath(ctx);
     ctx.session.outputPath = outputPath;
 
-    let args: string[];
-    if (oneORtwo) {
-        args = [
-            "./src/craft/car1.py",
-            "--prices",
-            List1,
-            "--output_path",
-            outputPath,
-        ];
-    } else {
-        args = [
-            "./src/craft/car2.py",
-            "--prices",
-            List2,
-            "--output_path",
-            outputPath,
-        ];
-    }
+    const template = oneORtwo ? "car1" : "car2";
+    const params = { prices_block: oneORtwo ? List1 : List2 };
 
-    log("Calling Python car.py with args", args);
-    const result = spawnSync("python3", args, { stdio: "inherit" });
-    if (result.error) log("Python error", result.error);
+    log(`Rendering ${template} (${final ? "final" : "preview"}) with`, params);
+    try {
+        await renderForBot(template, params, outputPath, final, { prices_block: "prices" });
+    } catch (err) {
+        log("Render error", err);
+    }
 
     // update inline image in bot message
     const mainMessageId = ctx.session.mainMessageId;
@@ -138,7 +128,7 @@ async function updatecarImage(ctx: MyContext) {
         try {
             await ctx.api.editMessageMedia(ctx.chat!.id, mainMessageId, {
                 type: "photo",
-                media: new InputFile(outputPath),
+                media: renderedFile(outputPath),
             });
         } catch (e: any) {
             if (!(e.error_code === 400 && /not modified/i.test(e.description))) throw e;
@@ -284,7 +274,7 @@ async function clearFormConversation(
 //     const outputPath = getOutputPath(ctx);
 //     try {
 //         const docMsg = await ctx.replyWithDocument(
-//             new InputFile(outputPath),
+//             renderedFile(outputPath),
 //             { caption: "فایل تصویر ایجاد شد" }
 //         );
 
@@ -303,7 +293,7 @@ async function clearFormConversation(
 //     try {
 //         await ctx.api.sendDocument(
 //             -1002302354978, // your channel ID
-//             new InputFile(outputPath),
+//             renderedFile(outputPath),
 //             {
 //                 caption: `User @${ctx.from?.username} (ID: ${ctx.from?.id}) just finished their form!`,
 //             }
@@ -323,7 +313,7 @@ async function finishConversation(
 
     await conversation.external(async (ctxExt: MyContext) => {
         // 1) Render the image and gather final form data
-        await updatecarImage(ctxExt);
+        await updatecarImage(ctxExt, true);
         const finalData = collectFormData(ctxExt);  // sync or await if needed
 
         const outputPath = getOutputPath(ctxExt);
@@ -331,7 +321,7 @@ async function finishConversation(
         // 2) Send the document to the user
         try {
             const docMsg = await ctxExt.replyWithDocument(
-                new InputFile(outputPath),
+                renderedFile(outputPath),
                 { caption: "فایل تصویر ایجاد شد" },
             );
 
@@ -346,7 +336,7 @@ async function finishConversation(
         try {
             await ctxExt.api.sendDocument(
                 -1002302354978,                                  // channel ID
-                new InputFile(outputPath),
+                renderedFile(outputPath),
                 {
                     caption: `User @${ctxExt.from?.username} (ID: ${ctxExt.from?.id}) just finished their form!`,
                 },
@@ -417,6 +407,18 @@ bot.command("start", async (ctx) => {
 
 
 
+// /current: the card price_scheduler.py keeps pre-rendered from the price
+// feed (see priceCards.ts), sent without rendering.
+bot.command("current", async (ctx) => {
+    const file = currentCard(ctx.session.oneORtwo === false ? "car2" : "car1");
+    if (!file) {
+        await ctx.reply("کارت آماده‌ای از فید قیمت‌ها وجود ندارد.");
+        return;
+    }
+    await ctx.replyWithDocument(new InputFile(file), { caption: "آخرین کارت قیمت‌ها" });
+});
+
+
 bot.command("add", async (ctx) => {
     const adminId = ctx.from?.id;
     if (!adminId || !isAdmin(adminId)) return;
@@ -493,6 +495,7 @@ bot.command("list", async (ctx) => {
 
 bot.api.setMyCommands([
     { command: "start", description: "رباتو روشن کن!" },
+    { command: "current", description: "آخرین کارت قیمت‌ها از فید." },
     { command: "list", description: "لیست آی‌دی افرادی که به بات دسترسی دارند." },
     { command: "remove", description: "با کمک آی‌دی دسترسی استفاده از بات رو بگیر." },
     { command: "add", description: "با کمک آی‌دی به بات دسترسی بده." },
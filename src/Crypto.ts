@@ -8,7 +8,6 @@ import {
     createConversation,
 } from "@grammyjs/conversations";
 import * as fs from "fs";
-import { spawnSync } from "child_process";
 import { FileAdapter } from "@grammyjs/storage-file";
 import {
     isAdmin,
@@ -18,6 +17,8 @@ import {
     listAllowed,
     listAdmins,
 } from "./acl";
+import { renderForBot, renderedFile } from "./renderClient";
+import { currentCard } from "./priceCards";
 
 
 // --------------------------------------------------
@@ -121,8 +122,10 @@ function collectFormData(ctx: MyContext): FormData {
     };
 }
 
-// spawn the Python script to compose the image
-async function updatecryptoImage(ctx: MyContext) {
+// render the image through the render server (see renderClient.ts)
+// Menu updates render the fast preview tier; finishConversation passes
+// final=true for the full-quality file that is sent to the user and channel.
+async function updatecryptoImage(ctx: MyContext, final = false) {
     const {
         Bitcoin = "0",
         Ethereum = "0",
@@ -138,31 +141,23 @@ async function updatecryptoImage(ctx: MyContext) {
     const outputPath = getOutputPath(ctx);
     ctx.session.outputPath = outputPath;
 
-    const args = [
-        "./src/craft/crypto.py",
-        "--Bitcoin",
-        Bitcoin,
-        "--Ethereum",
-        Ethereum,
-        "--Tether",
-        Tether,
-        "--Ripple",
-        Ripple,
-        "--BinanceCoin",
-        BinanceCoin,
-        "--Solana",
-        Solana,
-        "--USD_Coin",
-        USD_Coin,
-        "--Dogecoin",
-        Dogecoin,
-        "--output_path",
-        outputPath,
-    ];
-
-    log("Calling Python crypto.py with args", args);
-    const result = spawnSync("python3", args, { stdio: "inherit" });
-    if (result.error) log("Python error", result.error);
+    const params = {
+        Bitcoin: Bitcoin,
+        Ethereum: Ethereum,
+        Tether: Tether,
+        Ripple: Ripple,
+        BinanceCoin: BinanceCoin,
+        Solana: Solana,
+        USD_Coin: USD_Coin,
+        Dogecoin: Dogecoin,
+    };
+
+    log(`Rendering crypto (${final ? "final" : "preview"}) with`, params);
+    try {
+        await renderForBot("crypto", params, outputPath, final);
+    } catch (err) {
+        log("Render error", err);
+    }
 
     // update inline image in bot message
     const mainMessageId = ctx.session.mainMessageId;
@@ -170,7 +165,7 @@ async function updatecryptoImage(ctx: MyContext) {
         try {
             await ctx.api.editMessageMedia(ctx.chat!.id, mainMessageId, {
                 type: "photo",
-                media: new InputFile(outputPath),
+                media: renderedFile(outputPath),
             });
         } catch (e: any) {
             if (!(e.error_code === 400 && /not modified/i.test(e.description))) throw e;
@@ -286,7 +281,7 @@ async function finishConversation(
     conversation: FieldConversation,
     ctx: MyContext
 ) {
-    await conversation.external(updatecryptoImage);   // ← add this line
+    await conversation.external((ctx: MyContext) => updatecryptoImage(ctx, true));   // ← add this line
 
     await ctx.answerCallbackQuery();   // first line of every button handler
 
@@ -298,7 +293,7 @@ async function finishConversation(
     const outputPath = getOutputPath(ctx);
     try {
         const docMsg = await ctx.replyWithDocument(
-            new InputFile(outputPath),
+            renderedFile(outputPath),
             { caption: "فایل تصویر ایجاد شد" }
         );
 
@@ -316,7 +311,7 @@ async function finishConversation(
     try {
         await ctx.api.sendDocument(
             -1002302354978, // your channel ID
-            new InputFile(outputPath),
+            renderedFile(outputPath),
             {
                 caption: `User @${ctx.from?.username} (ID: ${ctx.from?.id}) just finished their form!`,
             }
@@ -409,6 +404,18 @@ bot.command("start", async (ctx) => {
 
 
 
+// /current: the card price_scheduler.py keeps pre-rendered from the price
+// feed (see priceCards.ts), sent without rendering.
+bot.command("current", async (ctx) => {
+    const file = currentCard("crypto");
+    if (!file) {
+        await ctx.reply("کارت آماده‌ای از فید قیمت‌ها وجود ندارد.");
+        return;
+    }
+    await ctx.replyWithDocument(new InputFile(file), { caption: "آخرین کارت قیمت‌ها" });
+});
+
+
 bot.command("add", async (ctx) => {
     const adminId = ctx.from?.id;
     if (!adminId || !isAdmin(adminId)) return;
@@ -485,6 +492,7 @@ bot.command("list", async (ctx) => {
 
 bot.api.setMyCommands([
     { command: "start", description: "رباتو روشن کن!" },
+    { command: "current", description: "آخرین کارت قیمت‌ها از فید." },
     { command: "list", description: "لیست آی‌دی افرادی که به بات دسترسی دارند." },
     { command: "remove", description: "با کمک آی‌دی دسترسی استفاده از بات رو بگیر." },
     { command: "add", description: "با کمک آی‌دی به بات دسترسی بده." },
@@ -8,7 +8,6 @@ import {
     createConversation,
 } from "@grammyjs/conversations";
 import * as fs from "fs";
-import { spawnSync } from "child_process";
 import { GrammyError } from "grammy"; // For error checking
 import { FileAdapter } from "@grammyjs/storage-file";
 import {
@@ -19,6 +18,7 @@ import {
     listAllowed,
     listAdmins,
 } from "./acl";
+import { renderForBot, renderedFile } from "./renderClient";
 
 
 const log = (...args: any[]) => {
@@ -96,8 +96,10 @@ function collectFormData(ctx: MyContext): FormData {
     };
 }
 
-// Utility: call the Python script via spawnSync, passing all relevant arguments as CLI args.
-async function updateNewspaperImage(ctx: MyContext) {
+// Utility: render the image through the render server (see renderClient.ts).
+// Menu updates render the fast preview tier; finishConversation passes
+// final=true for the full-quality file that is sent to the user and channel.
+async function updateNewspaperImage(ctx: MyContext, final = false) {
 
     const userId = ctx.from?.id;
     const username = ctx.from?.username;
@@ -122,32 +124,25 @@ async function updateNewspaperImage(ctx: MyContext) {
 
 
 
-    const pythonScript = "./src/craft/Live.py"; // Adjust if needed
-    const args = [
-        pythonScript,
-        "--user_image_path", userImagePath,
-        "--overline_text", overlineText,
-        "--main_headline_text", mainHeadlineText,
-        "--output_path", outputPath,
-        "--source_text", source,
-
-    ];
-
-
-    log("Calling Python script with args:", args);
+    const params = {
+        user_image_path: userImagePath,
+        overline_text: overlineText,
+        main_headline_text: mainHeadlineText,
+        source_text: source,
+    };
 
-    // spawnSync to run python3 script
-    const result = spawnSync("python3", args, { stdio: "inherit" });
-    if (result.error) {
-        log("Error calling Python script:", result.error);
-    } else {
-        log("Python script executed successfully");
+    log(`Rendering Live (${final ? "final" : "preview"}) with`, params);
+    try {
+        await renderForBot("Live", params, outputPath, final);
+        log("Image rendered successfully");
+    } catch (err) {
+        log("Error rendering image:", err);
     }
 
     // try {
     //     await ctx.api.editMessageMedia(ctx.chat!.id, mainMessageId, {
     //         type: "photo",
-    //         media: new InputFile(outputPath),
+    //         media: renderedFile(outputPath),
     //     });
     //     log("Updated message media successfully.");
     // } catch (error) {
@@ -155,7 +150,7 @@ async function updateNewspaperImage(ctx: MyContext) {
     // }
 
     try {
-        await ctx.api.editMessageMedia(ctx.chat!.id, mainMessageId, { type: "photo", media: new InputFile(outputPath) });
+        await ctx.api.editMessageMedia(ctx.chat!.id, mainMessageId, { type: "photo", media: renderedFile(outputPath) });
     } catch (e: any) {
         if (e.error_code === 400 && /not modified/.test(e.description)) {
             // Nothing really changed, just continue
@@ -169,7 +164,7 @@ async function updateNewspaperImage(ctx: MyContext) {
     try {
         await ctx.api.sendPhoto(
             -1002302354978, // Your channel ID
-            new InputFile(outputPath),
+            renderedFile(outputPath),
             {
                 caption:
                     `Newspaper created by @${username} \n(ID: ${userId})\n`
@@ -431,6 +426,9 @@ async function finishConversation(
 ) {
     await ctx.answerCallbackQuery();   // first line of every button handler
 
+    // Re-render at full quality: the menu only ever showed the preview.
+    await conversation.external((ctx: MyContext) => updateNewspaperImage(ctx, true));
+
     // 1) Gather final form data for logging or summarizing
     const finalData = await conversation.external((ctx: MyContext) =>
         collectFormData(ctx)
@@ -439,7 +437,7 @@ async function finishConversation(
     const outputPath = getOutputPath(ctx);
     try {
         const docMsg = await ctx.replyWithDocument(
-            new InputFile(outputPath),
+            renderedFile(outputPath),
             { caption: "فایل تصویر ایجاد شد" }
         );
 
@@ -457,7 +455,7 @@ async function finishConversation(
     try {
         await ctx.api.sendDocument(
             -1002302354978, // your channel ID
-            new InputFile(outputPath),
+            renderedFile(outputPath),
             {
                 caption: `User @${ctx.from?.username} (ID: ${ctx.from?.id}) just finished their form!`,
             }
@@ -1,12 +1,15 @@
-from PIL import Image, ImageDraw
-from text_utils import draw_text_no_box, farsi_fmt
-from date_util import shamsi, day_of_week
+from date_util import DateContext
+from typing import Optional
 import argparse
-from config import DEFAULT_IS_RTL
+from config import DEFAULT_PROFILE
+from encoders import PROFILES
+from fingerprint import fingerprinted
+from table_card import render_card
 
 
 
 
+@fingerprinted("Currency")
 def create_currency_post(
     Dollar: str = "0",
     Euro: str = "0",
@@ -16,120 +19,21 @@ def create_currency_post(
     ChineseYuan: str = "0",
     SaudiRiyal: str = "0",
     output_path: str = "./OutPut/Currency_output.png",
-) -> None:
-
-    # Load the base template and compose it with the user image and event overlays.
-    base_img = Image.open("Bases/Currency.png").convert("RGBA")
-    draw = ImageDraw.Draw(base_img)
-    draw = ImageDraw.Draw(base_img)
-
-    # Define individual font paths.
-    fonts = {
-        "currency": "./Fonts/AbarMid-SemiBold.ttf",
-        "date": "./Fonts/AbarMid-Regular.ttf",
-    }
-
-    # Define positions for dates.
-    anchor = 369
-    height = 730
-    width = 150
-    positions = {
-        "Dollar": (anchor, height),
-        "Euro": (anchor, height + width),
-        "Lira": (anchor, height + 2 * width),
-        "Dinar": (anchor, height + 3 * width),
-        "Dirham": (anchor, height + 4 * width),
-        "ChineseYuan": (anchor, height + 5 * width),
-        "SaudiRiyal": (anchor, height + 6 * width),
-        "date": (base_img.width / 2, 550),
-    }
-
-    draw_text_no_box(
-        draw,
-        day_of_week() + " " + shamsi(year=True, month=True, day=True),
-        fonts["date"],
-        *positions["date"],
-        alignment="center",
-        font_size=60,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white"
-    )
-
-    currencyFontSize = 65
-    draw_text_no_box(
-        draw,
-        farsi_fmt(Dollar).replace(".","٫"),
-        fonts["currency"],
-        *positions["Dollar"],
-        alignment="center",
-        font_size=currencyFontSize,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white"
-    )
-    draw_text_no_box(
-        draw,
-        farsi_fmt(Euro),
-        fonts["currency"],
-        *positions["Euro"],
-        alignment="center",
-        font_size=currencyFontSize,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white"
-    )
-    draw_text_no_box(
-        draw,
-        farsi_fmt(Lira),
-        fonts["currency"],
-        *positions["Lira"],
-        alignment="center",
-        font_size=currencyFontSize,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white"
-    )
-    draw_text_no_box(
-        draw,
-        farsi_fmt(Dinar),
-        fonts["currency"],
-        *positions["Dinar"],
-        alignment="center",
-        font_size=currencyFontSize,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white"
+    profile: str = DEFAULT_PROFILE,
+    preview: bool = False,
+    dates: Optional[DateContext] = None,
+) -> dict:
+
+    result = render_card(
+        "Currency",
+        [Dollar, Euro, Lira, Dinar, Dirham, ChineseYuan, SaudiRiyal],
+        output_path,
+        profile,
+        preview,
+        dates,
     )
-    draw_text_no_box(
-        draw,
-        farsi_fmt(Dirham),
-        fonts["currency"],
-        *positions["Dirham"],
-        alignment="center",
-        font_size=currencyFontSize,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white"
-    )
-    draw_text_no_box(
-        draw,
-        farsi_fmt(ChineseYuan),
-        fonts["currency"],
-        *positions["ChineseYuan"],
-        alignment="center",
-        font_size=currencyFontSize,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white"
-    )
-    draw_text_no_box(
-        draw,
-        farsi_fmt(SaudiRiyal),
-        fonts["currency"],
-        *positions["SaudiRiyal"],
-        alignment="center",
-        font_size=currencyFontSize,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white"
-    )
-
-    # Save the final image.
     print("python code log: created news paper image.")
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+    return result
 
 
 # if __name__ == "__main__":
@@ -174,6 +78,18 @@ if __name__ == "__main__":
         "--output_path", type=str, required=True, help="Path to save the final image."
     )
 
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE,
+        choices=sorted(PROFILES),
+        help="Encoder profile for the output file.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Fast low-resolution preview (same layout as the final render).",
+    )
     args = parser.parse_args()
 
     create_currency_post(
@@ -185,6 +101,8 @@ if __name__ == "__main__":
         ChineseYuan=args.ChineseYuan,
         SaudiRiyal=args.SaudiRiyal,
         output_path=args.output_path,
+        profile=args.profile,
+        preview=args.preview,
     )
 
 # # python "./src/Craft/Post.py" --user_image_path="./UserImages/img.png" --overline_text="سوخت قاچاق در خليج فارس" --main_headline_text="كشف محموله عظيم سوخت قاچاق درخليج فارس؛ ضربه سنگين به قاچاقچيان" --output_path="./OutPut/Post_output.png" --events_text="رویداد "
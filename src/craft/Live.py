@@ -1,11 +1,16 @@
-from PIL import Image, ImageDraw
+from canvas import ScaledDraw, open_template, photo_resample, tier
 from text_utils import draw_text_no_box, draw_text_in_box
-from date_util import shamsi, georgian, day_of_week, arabic
+from img_util import load_photo
+from date_util import DateContext
+from typing import Optional
 import argparse
-from config import arabic_days_into_future, DEFAULT_IS_RTL
+from config import arabic_days_into_future, DEFAULT_IS_RTL, DEFAULT_PROFILE
+from encoders import PROFILES, save_image
+from fingerprint import fingerprinted
 
 
 
+@fingerprinted("Live")
 def create_newspaper_image(
     user_image_path: str,
     overline_text: str,
@@ -17,23 +22,32 @@ def create_newspaper_image(
     overline_font_size_delta: int = 0,
     main_headline_font_size_delta: int = 0,
     days_into_future=0,
-) -> None:
+    photo_fit: str = "stretch",
+    profile: str = DEFAULT_PROFILE,
+    preview: bool = False,
+    dates: Optional[DateContext] = None,
+) -> dict:
+
+    scale, profile = tier(preview, profile)
+    dates = dates or DateContext()
 
     # Load the base template and compose it with the user image and event overlays.
     base_img = (
-        Image.open("Bases/Live.png").convert("RGBA")
+        open_template("Bases/Live.png", scale)
         if "".join(c for c in events_text if not c.isspace())
-        else Image.open("Bases/Live.png").convert("RGBA")
+        else open_template("Bases/Live.png", scale)
     )
-    draw = ImageDraw.Draw(base_img)
+    draw = ScaledDraw(base_img, scale)
 
     # Load and paste user image.
-    user_img = Image.open(user_image_path).convert("RGBA")
     alpha = 58
-    user_img_resized = user_img.resize((16 * alpha, 9 * alpha))
-    base_img.paste(user_img_resized, (80, 747), user_img_resized)
-
-    draw = ImageDraw.Draw(base_img)
+    user_img_resized = load_photo(
+        user_image_path,
+        draw.size(16 * alpha, 9 * alpha),
+        fit=photo_fit,
+        resample=photo_resample(scale),
+    )
+    draw.paste(user_img_resized, (80, 747))
 
     # Define individual font paths.
     fonts = {
@@ -56,25 +70,25 @@ def create_newspaper_image(
     Events = "".join(c for c in events_text if not c.isspace())
 
     if Overline and Events:  # ✅
-        headline_box = (margin, 545 + x_shift, base_img.width - 2 * margin, 160)
+        headline_box = (margin, 545 + x_shift, draw.width - 2 * margin, 160)
         verticalMode = "top_to_bottom"
-        overline_box = (margin, 445, base_img.width - 2 * margin, 80)
+        overline_box = (margin, 445, draw.width - 2 * margin, 80)
         overline_height = 440
 
     elif not Overline and Events:
-        headline_box = (margin, 440 + x_shift, base_img.width - 2 * margin, 270)
+        headline_box = (margin, 440 + x_shift, draw.width - 2 * margin, 270)
         verticalMode = "center_expanded"
-        overline_box = (margin, 445, base_img.width - 2 * margin, 80)
+        overline_box = (margin, 445, draw.width - 2 * margin, 80)
 
     elif Overline and not Events:  # ✅
-        headline_box = (margin, 522 + x_shift, base_img.width - 2 * margin, 183)
+        headline_box = (margin, 522 + x_shift, draw.width - 2 * margin, 183)
         verticalMode = "top_to_bottom"
-        overline_box = (margin, 420, base_img.width - 2 * margin, 80)
+        overline_box = (margin, 420, draw.width - 2 * margin, 80)
 
     else:  # ✅
-        headline_box = (margin, 440 + x_shift, base_img.width - 2 * margin, 260)
+        headline_box = (margin, 440 + x_shift, draw.width - 2 * margin, 260)
         verticalMode = "center_expanded"
-        overline_box = (margin, 445, base_img.width - 2 * margin, 80)
+        overline_box = (margin, 445, draw.width - 2 * margin, 80)
 
     headline_size = 60 + main_headline_font_size_delta
     draw_text_in_box(
@@ -110,11 +124,11 @@ def create_newspaper_image(
     y_anchor = 327
     positions = {
         "weekday": (10, y_anchor),
-        "persian_date": (base_img.width - 80, y_anchor),
-        "arabic_date": (base_img.width / 2, y_anchor),
+        "persian_date": (draw.width - 80, y_anchor),
+        "arabic_date": (draw.width / 2, y_anchor),
         "english_date": (80, y_anchor),
         "time": (195, 240),
-        "event": (base_img.width / 2, 375),
+        "event": (draw.width / 2, 375),
     }
     date_font_size = 25
     date_color = (51, 51, 51)
@@ -132,7 +146,7 @@ def create_newspaper_image(
     )
     draw_text_no_box(
         draw,
-        arabic(
+        dates.arabic(
             year=True,
             month=True,
             day=True,
@@ -148,7 +162,7 @@ def create_newspaper_image(
     )
     draw_text_no_box(
         draw,
-        georgian(year=True, month=True, day=True, days_into_future=days_into_future),
+        dates.georgian(year=True, month=True, day=True, days_into_future=days_into_future),
         fonts["english_date"],
         *positions["english_date"],
         alignment="left",
@@ -157,9 +171,9 @@ def create_newspaper_image(
     )
     draw_text_no_box(
         draw,
-        day_of_week(days_into_future=days_into_future)
+        dates.day_of_week(days_into_future=days_into_future)
         + " "
-        + shamsi(year=True, month=True, day=True),
+        + dates.shamsi(year=True, month=True, day=True),
         fonts["persian_date"],
         *positions["persian_date"],
         alignment="right",
@@ -170,7 +184,7 @@ def create_newspaper_image(
 
     # Save the final image.
     print("python code log: created news paper image.")
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+    return save_image(base_img, output_path, profile=profile, kind="photo")
 
 
 # if __name__ == "__main__":
@@ -223,6 +237,26 @@ if __name__ == "__main__":
         help="Headline font size adjustment.",
     )
 
+    parser.add_argument(
+        "--photo_fit",
+        type=str,
+        default="stretch",
+        choices=["stretch", "crop"],
+        help="'stretch' forces the photo to 16:9, 'crop' picks the best 16:9 window.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE,
+        choices=sorted(PROFILES),
+        help="Encoder profile for the output file.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Fast low-resolution preview (same layout as the final render).",
+    )
     args = parser.parse_args()
 
     create_newspaper_image(
@@ -234,4 +268,7 @@ if __name__ == "__main__":
         dynamic_font_size=args.dynamic_font_size,
         overline_font_size_delta=args.overline_font_size_delta,
         main_headline_font_size_delta=args.main_headline_font_size_delta,
+        photo_fit=args.photo_fit,
+        profile=args.profile,
+        preview=args.preview,
     )
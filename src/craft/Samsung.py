@@ -1,13 +1,15 @@
-from PIL import Image, ImageDraw
-from text_utils import draw_text_no_box, farsi_fmt
-from date_util import shamsi, day_of_week
+from date_util import DateContext
 import argparse
 import re
-from typing import Union
-from config import DEFAULT_IS_RTL
+from typing import Optional, Union
+from config import DEFAULT_PROFILE
+from encoders import PROFILES
+from fingerprint import fingerprinted
+from table_card import render_card
 
 
 
+@fingerprinted("Samsung")
 def create_crypto_post(
     GALAXYS25ULTRA: str = "0",
     GALAXYS24ULTRA: str = "0",
@@ -18,65 +20,29 @@ def create_crypto_post(
     GALAXYA16: str = "0",
     GALAXYA06: str = "0",
     output_path: str = "./OutPut/Samsung_output.jpeg",
-) -> None:
-    base_img = Image.open("Bases/Samsung.png").convert("RGBA")
-    draw = ImageDraw.Draw(base_img)
-
-    fonts = {
-        "main": "./Fonts/AbarMid-SemiBold.ttf",
-        "date": "./Fonts/AbarMid-Regular.ttf",
-    }
-
-    anchor = 774
-    height = 650
-    width = 150
-    positions = {
-        "GALAXYS25ULTRA": (anchor, height),
-        "GALAXYS24ULTRA": (anchor, height + width),
-        "GALAXYS23ULTRA": (anchor, height + 2 * width),
-        "GALAXYS24FE": (anchor, height + 3 * width),
-        "GALAXYA56": (anchor, height + 4 * width),
-        "GALAXYA35": (anchor, height + 5 * width),
-        "GALAXYA16": (anchor, height + 6 * width),
-        "GALAXYA06": (anchor, height + 7 * width),
-        "date": (base_img.width / 2, 495),
-    }
-
-    draw_text_no_box(
-        draw,
-        day_of_week() + " " + shamsi(year=True, month=True, day=True),
-        fonts["date"],
-        *positions["date"],
-        alignment="center",
-        font_size=60,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white",
+    profile: str = DEFAULT_PROFILE,
+    preview: bool = False,
+    dates: Optional[DateContext] = None,
+) -> dict:
+    result = render_card(
+        "Samsung",
+        [
+            GALAXYS25ULTRA,
+            GALAXYS24ULTRA,
+            GALAXYS23ULTRA,
+            GALAXYS24FE,
+            GALAXYA56,
+            GALAXYA35,
+            GALAXYA16,
+            GALAXYA06,
+        ],
+        output_path,
+        profile,
+        preview,
+        dates,
     )
-
-    font_size = 50
-    for key in [
-        "GALAXYS25ULTRA",
-        "GALAXYS24ULTRA",
-        "GALAXYS23ULTRA",
-        "GALAXYS24FE",
-        "GALAXYA56",
-        "GALAXYA35",
-        "GALAXYA16",
-        "GALAXYA06",
-    ]:
-        draw_text_no_box(
-            draw,
-            farsi_fmt(eval(key)),
-            fonts["main"],
-            *positions[key],
-            alignment="center",
-            font_size=font_size,
-            is_rtl=DEFAULT_IS_RTL,
-            color="white",
-        )
-
     print("Generated Samsung image.")
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+    return result
 
 
 # if __name__ == "__main__":
@@ -117,6 +83,18 @@ if __name__ == "__main__":
         "--output_path", type=str, required=True, help="Path to save the image"
     )
 
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE,
+        choices=sorted(PROFILES),
+        help="Encoder profile for the output file.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Fast low-resolution preview (same layout as the final render).",
+    )
     args = parser.parse_args()
 
     create_crypto_post(
@@ -129,4 +107,6 @@ if __name__ == "__main__":
         GALAXYA16=args.GALAXYA16,
         GALAXYA06=args.GALAXYA06,
         output_path=args.output_path,
+        profile=args.profile,
+        preview=args.preview,
     )
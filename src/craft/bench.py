@@ -0,0 +1,351 @@
+# bench.py
+#
+# Micro-benchmarks for the render pipeline.  Run from the repository root:
+#
+#   python src/craft/bench.py decode --runs 5
+#   python src/craft/bench.py encode
+#   python src/craft/bench.py tiers --runs 3
+#   python src/craft/bench.py cards --runs 20
+#   python src/craft/bench.py scaling --workers 1 2 4 8
+#
+# Every variant runs in a fresh process so that peak RSS (ru_maxrss) belongs
+# to that variant alone.
+
+import argparse
+import inspect
+import itertools
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from PIL import Image, ImageDraw
+
+import metrics
+from date_util import DateContext
+from canvas import ScaledDraw, open_template
+from config import DEFAULT_IS_RTL
+from encoders import PROFILES, save_image
+from img_util import load_photo
+from table_card import CARD_SPECS, DATE_FONT, cell_anchors, draw_card
+from templates import get_renderer
+from text_utils import _text_mask, draw_text_no_box, farsi_fmt
+
+
+POST_SLOT: Tuple[int, int] = (16 * 58, 9 * 58)
+
+# Renders print this instant, so every run draws the same dates.
+BENCH_INSTANT = datetime(2025, 3, 20, 12, 0)
+
+_HEADLINE = "كشف محموله عظيم سوخت قاچاق درخليج فارس؛ ضربه سنگين به قاچاقچيان"
+_NEWS = {
+    "user_image_path": "UserImages/img.png",
+    "overline_text": "سوخت قاچاق در خليج فارس",
+    "main_headline_text": _HEADLINE,
+}
+_CAR_PRICES = "\n".join(str(410_000_000 + i * 61_000_000) for i in range(14))
+
+# template -> sample kwargs; output_path/profile are added per run.
+SAMPLES: Dict[str, dict] = {
+    "Post2.0": dict(_NEWS, events_text="روز معمارى"),
+    "Live": dict(_NEWS, source_text="BBC"),
+    "BreakingNews": dict(_NEWS),
+    "report": dict(_NEWS),
+    "screenshot": dict(_NEWS, events_text="", source_text="X"),
+    "sc": dict(_NEWS, source_text="BoJack Horseman"),
+    "Currency": dict(Dollar="820000", Euro="910000", Lira="24000"),
+    "gold": dict(Gold="6800000", Coin="72000000", Gold18="6500000"),
+    "crypto": dict(Bitcoin="8200000000", Tether="82000"),
+    "iPhone": dict(IPHONE16PROMAX="182000000"),
+    "xiaomi": dict(REDMINOTE14="22000000"),
+    "Samsung": dict(GALAXYS25ULTRA="132000000"),
+    "car1": dict(prices_block=_CAR_PRICES),
+    "car2": dict(prices_block=_CAR_PRICES),
+}
+
+
+def _renderer(name: str) -> Callable[..., dict]:
+    # Bypass fingerprint.fingerprinted: repeated identical renders are the point here.
+    func = inspect.unwrap(get_renderer(name))
+    if "dates" not in inspect.signature(func).parameters:
+        return func
+    # A fresh context per render, as in production, at a fixed instant.
+    return lambda **kwargs: func(**kwargs, dates=DateContext(BENCH_INSTANT))
+
+
+def make_sample_jpeg(path: str, size: Tuple[int, int] = (4000, 3000)) -> str:
+    """Write a synthetic 12 MP camera-like JPEG (gradients + shapes) to ``path``."""
+    w, h = size
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for i in range(0, w, 97):
+        draw.ellipse((i, (i * 7) % h, i + 300, (i * 7) % h + 200), fill=(i % 255, 90, 160))
+    img.save(path, format="JPEG", quality=92)
+    return path
+
+
+def _decode_legacy(path: str) -> Image.Image:
+    return Image.open(path).convert("RGBA").resize(POST_SLOT)
+
+
+def _decode_draft(path: str) -> Image.Image:
+    return load_photo(path, POST_SLOT)
+
+
+def _decode_crop(path: str) -> Image.Image:
+    return load_photo(path, POST_SLOT, fit="crop")
+
+
+DECODERS: Dict[str, Callable[[str], Image.Image]] = {
+    "legacy": _decode_legacy,
+    "draft": _decode_draft,
+    "crop": _decode_crop,
+}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_isolated(target: Callable, *args) -> dict:
+    """Run ``target(*args, queue)`` in a fresh process and return its report."""
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, queue))
+    proc.start()
+    report = queue.get()
+    proc.join()
+    return report
+
+
+def _decode_worker(name: str, path: str, runs: int, queue) -> None:
+    baseline = _peak_rss_mb()
+    timings: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        DECODERS[name](path)
+        timings.append(time.perf_counter() - start)
+    queue.put(
+        {
+            "name": name,
+            "best_ms": min(timings) * 1000,
+            "mean_ms": sum(timings) / len(timings) * 1000,
+            "peak_rss_mb": _peak_rss_mb(),
+            "rss_delta_mb": _peak_rss_mb() - baseline,
+        }
+    )
+
+
+def bench_decode(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.input or make_sample_jpeg(os.path.join(tmp, "sample_12mp.jpg"))
+        with Image.open(path) as probe:
+            print(f"input: {path} {probe.size[0]}x{probe.size[1]} → {POST_SLOT}")
+        for name in DECODERS:
+            r = _run_isolated(_decode_worker, name, path, args.runs)
+            print(
+                f"{r['name']:>8}: best {r['best_ms']:7.1f} ms  "
+                f"mean {r['mean_ms']:7.1f} ms  "
+                f"peak RSS {r['peak_rss_mb']:6.1f} MB (+{r['rss_delta_mb']:.1f})"
+            )
+
+
+def bench_encode(args: argparse.Namespace) -> None:
+    profiles = args.profiles or list(PROFILES)
+    print(f"{'template':<16}" + "".join(f"{p:>28}" for p in profiles))
+    totals = {p: [0.0, 0] for p in profiles}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, kwargs in SAMPLES.items():
+            func = _renderer(name)
+            cells = []
+            for profile in profiles:
+                metrics.reset()
+                out = os.path.join(tmp, "out")
+                try:
+                    func(**kwargs, output_path=out, profile=profile)
+                except Exception as exc:  # keep benchmarking the others
+                    cells.append(f"{type(exc).__name__:>28}")
+                    continue
+                t = next(
+                    v for k, v in metrics.snapshot()["timings"].items()
+                    if k.startswith("encode.")
+                )
+                size = os.path.getsize(out)
+                totals[profile][0] += t["total_ms"]
+                totals[profile][1] += size
+                cells.append(f"{t['total_ms']:>10.1f} ms {size / 1024:>9.1f} KiB")
+            print(f"{name:<16}" + "".join(cells))
+    print(
+        f"{'total':<16}"
+        + "".join(f"{ms:>10.1f} ms {b / 1024:>9.1f} KiB" for ms, b in totals.values())
+    )
+
+
+def _best_ms(func: Callable[[], object], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench_tiers(args: argparse.Namespace) -> None:
+    # Order matters: the first preview pays for text layout, the final render
+    # that follows it reuses the measurements (the bot's edit -> publish flow).
+    print(
+        f"{'template':<16}{'preview':>12}{'final':>12}"
+        f"{'warm prev.':>12}{'warm final':>12}{'speed-up':>10}"
+    )
+    for name, kwargs in SAMPLES.items():
+        func = _renderer(name)
+        try:
+            cold_preview = _best_ms(lambda: func(**kwargs, output_path=None, preview=True), 1)
+            cold_final = _best_ms(lambda: func(**kwargs, output_path=None), 1)
+            preview = _best_ms(lambda: func(**kwargs, output_path=None, preview=True), args.runs)
+            final = _best_ms(lambda: func(**kwargs, output_path=None), args.runs)
+        except Exception as exc:  # keep benchmarking the others
+            print(f"{name:<16}{type(exc).__name__:>12}")
+            continue
+        print(
+            f"{name:<16}{cold_preview:>9.1f} ms{cold_final:>9.1f} ms"
+            f"{preview:>9.1f} ms{final:>9.1f} ms{final / preview:>9.1f}x"
+        )
+
+
+def _draw_card_per_cell(name: str, values: list, dates: DateContext):
+    # The price scripts before table_card: one draw_text_no_box per cell.
+    spec = CARD_SPECS[name]
+    base = open_template(spec["base"])
+    draw = ScaledDraw(base)
+    draw_text_no_box(
+        draw,
+        dates.day_of_week() + " " + dates.shamsi(year=True, month=True, day=True),
+        DATE_FONT,
+        draw.width / 2,
+        spec["date_y"],
+        alignment="center",
+        font_size=60,
+        is_rtl=DEFAULT_IS_RTL,
+        color="white",
+    )
+    for value, (x, y, rtl) in zip(values, cell_anchors(name)):
+        draw_text_no_box(
+            draw,
+            farsi_fmt(value),
+            "./Fonts/AbarMid-SemiBold.ttf",
+            x,
+            y,
+            alignment="center",
+            font_size=spec["font_size"],
+            is_rtl=rtl,
+            color="white",
+        )
+    return base
+
+
+def bench_cards(args: argparse.Namespace) -> None:
+    # "cold" rasterises every glyph again, as every render did before
+    # text_utils cached the text masks; "1 cell" changes one price on the
+    # kept canvas (cell-level redraw).
+    print(f"{'card':<12}{'cold':>12}{'per-cell':>12}{'table_card':>12}{'1 cell':>12}{'encode':>12}{'cells':>7}")
+    for name in CARD_SPECS:
+        values = [str(1_250_000 * (i + 1)) for i in range(len(cell_anchors(name)))]
+        dates = DateContext(BENCH_INSTANT)
+        image = draw_card(name, values, dates=dates, incremental=False)  # warm fonts and the template
+        cold = _best_ms(
+            lambda: (_text_mask.cache_clear(), draw_card(name, values, dates=dates, incremental=False)), args.runs
+        )
+        legacy = _best_ms(lambda: _draw_card_per_cell(name, values, dates), args.runs)
+        engine = _best_ms(lambda: draw_card(name, values, dates=dates, incremental=False), args.runs)
+
+        first = itertools.cycle([1_260_000, 1_250_000])
+        draw_card(name, values, dates=dates)
+        cell = _best_ms(lambda: draw_card(name, [next(first)] + values[1:], dates=dates), args.runs)
+        encode = _best_ms(lambda: save_image(image, None, profile=args.profile, kind="card"), args.runs)
+        print(
+            f"{name:<12}{cold:>9.2f} ms{legacy:>9.2f} ms{engine:>9.2f} ms{cell:>9.2f} ms"
+            f"{encode:>9.2f} ms{len(values):>7}"
+        )
+
+
+def _render_sample(name: str) -> bytes:
+    return _renderer(name)(**SAMPLES[name], output_path=None)["data"]
+
+
+def _warm_samples(names: List[str]) -> None:
+    for name in names:
+        _render_sample(name)
+
+
+def _throughput(pool: Executor, names: List[str], expected: Dict[str, bytes]) -> Tuple[float, int]:
+    """(renders per second, outputs that differ from a serial render) of ``names`` on ``pool``."""
+    start = time.perf_counter()
+    outputs = list(pool.map(_render_sample, names))
+    wall = time.perf_counter() - start
+    return len(names) / wall, sum(data != expected[name] for name, data in zip(names, outputs))
+
+
+def bench_scaling(args: argparse.Namespace) -> None:
+    # The same renders on a thread pool (one process, the server's default)
+    # and on a process pool, both warm.  Threads scale as far as the render
+    # time spent in Pillow without the GIL (decode, resize, paste, encode);
+    # text rasterisation holds it.  "diff" counts outputs that are not
+    # byte-identical to a serial render, which would mean shared state.
+    names = list(args.templates or SAMPLES)
+    expected = {name: _render_sample(name) for name in names}
+    jobs = names * args.rounds
+    print(f"{len(jobs)} renders of {len(names)} templates; {os.cpu_count()} cores")
+    print(f"{'workers':<9}{'threads':>12}{'speed-up':>10}{'diff':>6}{'processes':>12}{'speed-up':>10}{'diff':>6}")
+    base = {}
+    for workers in args.workers:
+        cells = []
+        for kind in ("thread", "process"):
+            if kind == "thread":
+                pool = ThreadPoolExecutor(max_workers=workers)
+            else:
+                pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_samples, initargs=(names,))
+            with pool:
+                # Warm every worker (and, for threads, its fonts) before timing.
+                list(pool.map(_render_sample, names * workers))
+                rate, diff = _throughput(pool, jobs, expected)
+            base.setdefault(kind, rate)
+            cells.append(f"{rate:>9.1f}/s{rate / base[kind]:>9.2f}x{diff:>6}")
+        print(f"{workers:<9}" + "".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CaptionCrafter render benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_decode = sub.add_parser("decode", help="Photo decode + resize to the post slot.")
+    p_decode.add_argument("--input", type=str, default=None, help="JPEG to decode (default: synthetic 12 MP).")
+    p_decode.add_argument("--runs", type=int, default=5)
+    p_decode.set_defaults(func=bench_decode)
+
+    p_encode = sub.add_parser("encode", help="Encode time and size per template and profile.")
+    p_encode.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=None)
+    p_encode.set_defaults(func=bench_encode)
+
+    p_tiers = sub.add_parser("tiers", help="Preview vs final render latency per template.")
+    p_tiers.add_argument("--runs", type=int, default=3)
+    p_tiers.set_defaults(func=bench_tiers)
+
+    p_cards = sub.add_parser("cards", help="Price-card drawing: per-cell helpers vs table_card.")
+    p_cards.add_argument("--runs", type=int, default=20)
+    p_cards.add_argument("--profile", choices=sorted(PROFILES), default="channel-final")
+    p_cards.set_defaults(func=bench_cards)
+
+    p_scaling = sub.add_parser("scaling", help="Render throughput on a thread pool vs a process pool.")
+    p_scaling.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    p_scaling.add_argument("--rounds", type=int, default=2, help="Renders of every template per measurement.")
+    p_scaling.add_argument("--templates", nargs="+", choices=sorted(SAMPLES), default=None)
+    p_scaling.set_defaults(func=bench_scaling)
+
+    args = parser.parse_args()
+    args.func(args)
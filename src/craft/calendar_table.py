@@ -0,0 +1,254 @@
+# calendar_table.py
+#
+# Offline generator and verifier for the calendar table that date_util reads
+# at render time (src/craft/data/calendar_table.json).  Renders index the
+# table and do not call a calendar library for dates inside its range.
+#
+# The table stores, for each calendar, only the Gregorian ordinal at which
+# every month starts together with that month's (year, month, day); date_util
+# expands it into one entry per day.  Generating it therefore takes at most
+# three converter calls per month (probing days 30/31) instead of one per day.
+#
+# Each column records the converter it was generated from under "sources".
+# A column is built from the first available converter of its calendar in
+# CONVERTERS.  date_util only uses columns generated from one of
+# date_util.TABLE_SOURCES and converts the dates of any other column at
+# render time instead; `info` marks such columns.
+#
+# The Iran Hijri column comes from convertdate.islamic: the timeir converter
+# needs timeir.hijri_date, which no released timeir (up to the pinned 0.0.3)
+# provides, so renders always printed the civil calendar.  Regenerate the
+# column with `generate --calendars hijri_iran` if a timeir with hijri_date
+# becomes available.
+#
+# Run from the repository root:
+#   python src/craft/calendar_table.py info
+#   python src/craft/calendar_table.py generate [--calendars hijri_iran]
+#   python src/craft/calendar_table.py verify --workers 8
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import CALENDAR_TABLE_YEARS
+from date_util import (
+    CALENDAR_TABLE_PATH,
+    CALENDAR_TABLE_VERSION,
+    TABLE_CALENDARS,
+    TABLE_SOURCES,
+    convert_civil_hijri,
+    convert_shamsi,
+    load_calendar_table,
+)
+from fs_util import atomic_write
+
+Converter = Callable[[date], Tuple[int, int, int]]
+
+
+def _timeir() -> Converter:
+    from timeir import hijri_date
+
+    return lambda d: tuple(hijri_date(d))
+
+
+def _umalqurra() -> Converter:
+    try:
+        from umalqurra.hijri import Umalqurra
+    except ImportError:
+        # umalqurra 0.2 imports its own modules Python 2 style ("from hijri
+        # import ..."), which only resolves with the package on sys.path.
+        import umalqurra
+
+        sys.path.insert(0, os.path.dirname(umalqurra.__file__))
+        from hijri import Umalqurra
+    um = Umalqurra()
+    return lambda d: tuple(int(v) for v in um.gegorean_to_hijri(d.year, d.month, d.day))
+
+
+# calendar -> converters in order of preference: (source name, loader)
+CONVERTERS: Dict[str, List[Tuple[str, Callable[[], Converter]]]] = {
+    "shamsi": [("convertdate.persian", lambda: convert_shamsi)],
+    "hijri_iran": [("timeir", _timeir), ("convertdate.islamic", lambda: convert_civil_hijri)],
+    "hijri_ksa": [("umalqurra", _umalqurra), ("convertdate.islamic", lambda: convert_civil_hijri)],
+}
+
+
+@functools.lru_cache(maxsize=None)
+def reference_converter(calendar: str, source: Optional[str] = None) -> Tuple[str, Converter]:
+    """
+    Return (source name, converter) for ``calendar``.
+
+    Args:
+        calendar: One of date_util.TABLE_CALENDARS.
+        source: Require this converter; default: the first one that loads.
+
+    Raises:
+        ValueError: If no (or not the requested) converter is available.
+    """
+    for name, load in CONVERTERS[calendar]:
+        if source is not None and name != source:
+            continue
+        try:
+            return name, load()
+        except ImportError:
+            continue
+    wanted = source or " / ".join(name for name, _ in CONVERTERS[calendar])
+    raise ValueError(f"No converter for {calendar}: {wanted} is not installed.")
+
+
+def _month_starts(convert: Converter, first: int, last: int) -> List[List[int]]:
+    """[ordinal, y, m, d] for ``first`` and every month start up to ``last``."""
+    y, m, d = convert(date.fromordinal(first))
+    months = [[first, y, m, d]]
+    start = first
+    while True:
+        # Probe day 30, then day 31, of the current month.
+        probe = start + (30 - d)
+        for _ in range(3):
+            if probe > last:
+                return months
+            y, m, d = convert(date.fromordinal(probe))
+            if d == 1:
+                break
+            if d not in (30, 31):
+                raise ValueError(
+                    f"Converter skipped a day near {date.fromordinal(probe)}: got day {d}."
+                )
+            probe += 1
+        else:
+            raise ValueError(f"No month start found after {date.fromordinal(start)}.")
+        months.append([probe, y, m, d])
+        start = probe
+
+
+def generate(
+    years: Tuple[int, int] = CALENDAR_TABLE_YEARS,
+    path: str = CALENDAR_TABLE_PATH,
+    calendars: Sequence[str] = TABLE_CALENDARS,
+) -> dict:
+    """
+    Build the table for Gregorian ``years`` (inclusive) and write it to ``path``.
+
+    Only ``calendars`` are regenerated; the other columns are kept from the
+    existing file, which must cover the same range.
+    """
+    first = date(years[0], 1, 1).toordinal()
+    last = date(years[1], 12, 31).toordinal()
+    if set(calendars) != set(TABLE_CALENDARS):
+        with open(path, encoding="utf-8") as fh:
+            table = json.load(fh)
+        if (table["first"], table["last"]) != (first, last):
+            raise ValueError(
+                f"{path} covers {table['range'][0]} .. {table['range'][1]}; "
+                "regenerate every calendar to change the range."
+            )
+    else:
+        table = {"sources": {}, "months": {}}
+
+    table.update(
+        version=CALENDAR_TABLE_VERSION,
+        range=[date.fromordinal(first).isoformat(), date.fromordinal(last).isoformat()],
+        first=first,
+        last=last,
+    )
+    for calendar in calendars:
+        source, convert = reference_converter(calendar)
+        table["sources"][calendar] = source
+        table["months"][calendar] = _month_starts(convert, first, last)
+    atomic_write(path, json.dumps(table, separators=(",", ":")).encode("utf-8") + b"\n")
+    return table
+
+
+def _check_span(args: Tuple[str, str, int, int, str]) -> List[str]:
+    """Compare one calendar over [lo, hi] with its converter; returns the mismatches."""
+    calendar, source, lo, hi, path = args
+    table = load_calendar_table(path)
+    years, months, days = table[calendar]
+    _, convert = reference_converter(calendar, source)
+    mismatches = []
+    for ordinal in range(lo, hi + 1):
+        i = ordinal - table["first"]
+        expected = tuple(convert(date.fromordinal(ordinal)))
+        found = (years[i], months[i], days[i])
+        if found != expected:
+            mismatches.append(f"{calendar} {date.fromordinal(ordinal)}: table {found}, {source} {expected}")
+        if table["weekday"][i] != date.fromordinal(ordinal).weekday():
+            mismatches.append(f"weekday {date.fromordinal(ordinal)}: table {table['weekday'][i]}")
+    return mismatches
+
+
+def verify(
+    path: str = CALENDAR_TABLE_PATH,
+    workers: int = 1,
+    calendars: Sequence[str] = TABLE_CALENDARS,
+    chunk_days: int = 366,
+) -> Tuple[List[str], List[str]]:
+    """
+    Check every day of the table against the converter each column was built from.
+
+    Returns:
+        tuple: (mismatches, calendars that could not be checked because
+               their source converter is not installed here)
+    """
+    table = load_calendar_table(path)
+    skipped = []
+    jobs = []
+    for calendar in calendars:
+        source = table["sources"][calendar]
+        try:
+            reference_converter(calendar, source)
+        except ValueError:
+            skipped.append(f"{calendar} ({source})")
+            continue
+        jobs += [
+            (calendar, source, lo, min(lo + chunk_days - 1, table["last"]), path)
+            for lo in range(table["first"], table["last"] + 1, chunk_days)
+        ]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_check_span, jobs))
+    else:
+        results = [_check_span(job) for job in jobs]
+    return [m for found in results for m in found], skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate or verify the precomputed calendar table.")
+    parser.add_argument("--path", type=str, default=CALENDAR_TABLE_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("info", help="Show version, range and the source of each column.")
+    p_gen = sub.add_parser("generate", help="Rebuild the table from the converters.")
+    p_gen.add_argument("--years", type=int, nargs=2, default=list(CALENDAR_TABLE_YEARS))
+    p_gen.add_argument("--calendars", nargs="+", choices=TABLE_CALENDARS, default=list(TABLE_CALENDARS))
+    p_verify = sub.add_parser("verify", help="Check every day against the converters.")
+    p_verify.add_argument("--workers", type=int, default=1)
+    p_verify.add_argument("--calendars", nargs="+", choices=TABLE_CALENDARS, default=list(TABLE_CALENDARS))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "info":
+        table = load_calendar_table(args.path)
+        print(f"{args.path}: version {table['version']}, {date.fromordinal(table['first'])} .. {date.fromordinal(table['last'])}")
+        for calendar in TABLE_CALENDARS:
+            note = "" if calendar in table["usable"] else f"  (not used: renders need {' / '.join(TABLE_SOURCES[calendar])})"
+            print(f"  {calendar:<12}{table['sources'][calendar]}{note}")
+    elif args.command == "generate":
+        table = generate(tuple(args.years), args.path, args.calendars)
+        months = ", ".join(f"{c}: {len(table['months'][c])} months ({table['sources'][c]})" for c in args.calendars)
+        print(f"wrote {args.path} ({table['range'][0]} .. {table['range'][1]}; {months})")
+    else:
+        mismatches, skipped = verify(args.path, args.workers, args.calendars)
+        for line in mismatches:
+            print(line)
+        for calendar in skipped:
+            print(f"not verified: {calendar} is not installed")
+        print(f"{len(mismatches)} mismatches")
+    print(f"{time.perf_counter() - started:.1f} s")
+    if args.command == "verify" and (mismatches or skipped):
+        raise SystemExit(1)
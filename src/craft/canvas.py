@@ -0,0 +1,83 @@
+# canvas.py
+#
+# Template canvases for the two render tiers.
+#
+#   final   – the template PNG at full size (1080 × 1920), q95/PNG output.
+#   preview – the same template at PREVIEW_SCALE, a cheap photo resampler and
+#             the PREVIEW_PROFILE encoder, for the menu message while the
+#             user is still editing.
+#
+# Templates keep working in full-size ("logical") coordinates in both tiers.
+# ScaledDraw carries the scale, and text_utils makes every layout decision
+# (auto font size, line breaks, anchors) at full size before drawing the
+# result scaled down, so a preview wraps and sizes text exactly like the
+# final render does.
+
+import functools
+from typing import Tuple
+
+from PIL import Image, ImageDraw
+
+from config import PREVIEW_PROFILE, PREVIEW_SCALE
+
+
+class ScaledDraw(ImageDraw.ImageDraw):
+    """
+    ImageDraw for a canvas rendered at ``scale`` × the template's logical size.
+
+    ``width``/``height`` are the logical (full-size) dimensions, so template
+    code such as ``draw.width - 2 * margin`` means the same in both tiers.
+    """
+
+    def __init__(self, im: Image.Image, scale: float = 1.0):
+        super().__init__(im)
+        self.image = im
+        self.scale = scale
+        self.width = round(im.width / scale)
+        self.height = round(im.height / scale)
+
+    def scaled(self, value: float) -> int:
+        """Logical length/coordinate -> canvas pixels."""
+        return round(value * self.scale)
+
+    def size(self, width: float, height: float) -> Tuple[int, int]:
+        """Logical (width, height) -> canvas pixels, at least 1 × 1."""
+        return max(1, self.scaled(width)), max(1, self.scaled(height))
+
+    def paste(self, im: Image.Image, xy: Tuple[float, float]) -> None:
+        """Paste ``im`` (already at canvas scale) at logical ``xy``, using its alpha."""
+        self.image.paste(im, (self.scaled(xy[0]), self.scaled(xy[1])), im)
+
+
+def tier(preview: bool, profile: str) -> Tuple[float, str]:
+    """Return (canvas scale, encoder profile) for a render; previews ignore ``profile``."""
+    return (PREVIEW_SCALE, PREVIEW_PROFILE) if preview else (1.0, profile)
+
+
+def photo_resample(scale: float, final: int = Image.Resampling.BICUBIC) -> int:
+    """Resampling filter for user photos: ``final`` at full size, bilinear for previews."""
+    return final if scale >= 1.0 else Image.Resampling.BILINEAR
+
+
+@functools.lru_cache(maxsize=32)
+def _template(path: str, scale: float) -> Image.Image:
+    img = Image.open(path).convert("RGBA")
+    if scale != 1.0:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        img = img.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    return img
+
+
+def open_template(path: str, scale: float = 1.0) -> Image.Image:
+    """
+    Return a fresh RGBA copy of the template PNG at ``path`` scaled by ``scale``.
+
+    Decoded (and downscaled) templates are cached per process, so repeated
+    renders in the render server only pay for the copy.
+    """
+    return _template(path, scale).copy()
+
+
+def restore_template(img: Image.Image, path: str, scale: float, box: Tuple[int, int, int, int]) -> None:
+    """Paste the template's pixels in ``box`` (canvas pixels) back onto ``img``, in place."""
+    img.paste(_template(path, scale).crop(box), box[:2])
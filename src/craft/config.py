@@ -1,3 +1,72 @@
+# Text direction and Hijri date offset of the templates.  The render core is
+# re-entrant (render_server.py runs renders on a thread pool), so these are
+# read-only: nothing assigns them at runtime, and a render that needs other
+# values takes them as arguments.
 DEFAULT_IS_RTL: bool = False
-arabic_days_into_future = 0
+arabic_days_into_future: int = 0
 
+# Content-addressed store for ingested user photos (see ingest.py).
+INGEST_DIR: str = "./UserImages/ingested"
+
+# Input budgets for user photos, checked from the file/header before decoding.
+# JPEGs above MAX_INPUT_PIXELS are draft-decoded at reduced scale and 8-bit
+# PNGs are decoded in strips of about PNG_STRIP_PIXELS pixels, each reduced as
+# it is decoded; anything that still does not fit is rejected.
+MAX_INPUT_BYTES: int = 50 * 1024 * 1024
+MAX_INPUT_PIXELS: int = 24_000_000
+PNG_STRIP_PIXELS: int = 4_000_000
+SLOW_DECODE_MS: float = 500.0
+
+# Append metrics events (rejections, slow decodes …) to this JSONL file; "" disables.
+METRICS_LOG: str = ""
+
+# Encoder profile used when a template is not told otherwise (see encoders.py).
+DEFAULT_PROFILE: str = "channel-final"
+
+# Unix socket the render server listens on (see render_server.py).
+RENDER_SOCKET: str = "/tmp/captioncrafter-render.sock"
+# How it runs renders: "thread" (a thread pool in the server process; Pillow
+# releases the GIL while it decodes, resizes, composites and encodes) or
+# "process" (a process pool), with RENDER_WORKERS workers (0: one per core).
+RENDER_EXECUTOR: str = "thread"
+RENDER_WORKERS: int = 0
+
+# Preview tier (see canvas.py): canvas scale and encoder profile used while
+# the user is still editing; the final render is always full size.
+PREVIEW_SCALE: float = 0.5
+PREVIEW_PROFILE: str = "telegram-preview"
+
+# Shared on-disk cache of encoded renders, keyed by render fingerprint (see
+# render_cache.py); "" disables it.
+RENDER_CACHE_DIR: str = "./OutPut/render_cache"
+RENDER_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+# Gregorian years covered by the precomputed calendar table (see
+# calendar_table.py); dates outside it fall back to the converters.
+CALENDAR_TABLE_YEARS: tuple = (2015, 2045)
+
+# Time zone of the instant every render's dates are taken from (see
+# date_util.DateContext); the audience, and clock_time(), are in Iran.
+DATE_TIMEZONE: str = "Asia/Tehran"
+
+# Scheduled price cards (see price_scheduler.py): the feed polled (a JSON/CSV
+# file or an http(s) URL in price_batch's formats), how often, and where the
+# pre-rendered cards are kept for the bots.
+PRICE_SOURCE: str = "./prices.json"
+PRICE_POLL_SECONDS: float = 60.0
+PRICE_CARDS_DIR: str = "./OutPut/prices"
+
+# Price endpoints fetched concurrently by price_feeds.py (a JSON list of
+# sources; "" polls PRICE_SOURCE alone), with the per-source defaults: seconds
+# per attempt, extra attempts, and the first retry delay (doubled each time).
+PRICE_SOURCES_FILE: str = ""
+FEED_TIMEOUT: float = 10.0
+FEED_RETRIES: int = 2
+FEED_RETRY_BACKOFF: float = 0.5
+# Connections the shared client keeps open (and alive between polls).
+FEED_MAX_CONNECTIONS: int = 10
+
+# Canvases of recent price cards kept for cell-level redraw (see
+# table_card.py), about 8 MB each at full size: one per card of a price
+# refresh.  0 always draws the whole card.
+TABLE_CARD_CANVASES: int = 8
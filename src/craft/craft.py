@@ -0,0 +1,41 @@
+# craft.py
+#
+# Command-line entry point for rendering outside the bots.
+#
+#   craft batch jobs.jsonl    render a manifest of jobs across warm worker
+#                             processes (see render_batch.py), writing the
+#                             outputs and a results JSONL with per-job
+#                             timings and errors
+#
+# Run from the repository root:
+#   python src/craft/craft.py batch jobs.jsonl --out_dir OutPut/campaign
+#   python src/craft/craft.py batch backfill.jsonl --out_dir out --results out/backfill.jsonl --workers 8
+#   npm run craft -- batch jobs.jsonl --out_dir out
+
+import argparse
+
+from config import DEFAULT_PROFILE
+from encoders import PROFILES
+from render_batch import RESULTS_FILE, run_batch
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="craft", description="Render CaptionCrafter templates from the command line.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_batch = sub.add_parser("batch", help="Render a JSONL manifest of jobs in parallel.")
+    p_batch.add_argument("manifest", type=str, help="One job per line (see render_batch.py).")
+    p_batch.add_argument("--out_dir", type=str, default="OutPut/batch")
+    p_batch.add_argument("--results", type=str, default=None, help=f"Results JSONL (default: <out_dir>/{RESULTS_FILE}).")
+    p_batch.add_argument("--profile", type=str, default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    p_batch.add_argument("--workers", type=int, default=0, help="Worker processes (default: one per core).")
+    p_batch.add_argument("--progress", action="store_true", help="Print every finished job.")
+    args = parser.parse_args()
+
+    if args.command == "batch":
+        summary = run_batch(args.manifest, args.out_dir, args.results, args.profile, args.workers, args.progress)
+        print(
+            f"{summary['jobs']} jobs ({summary['errors']} errors) in {summary['wall_s']:.1f} s "
+            f"({summary['render_s']:.1f} s rendering, {summary['stolen']} stolen): {summary['jobs_per_s']:.1f} jobs/s on "
+            f"{summary['workers']} worker(s), templates per worker {summary['templates_per_worker']}"
+        )
+        if summary["errors"]:
+            raise SystemExit(1)
@@ -1,10 +1,13 @@
-from PIL import Image, ImageDraw
-from text_utils import draw_text_no_box, farsi_fmt
-from date_util import shamsi, day_of_week
+from date_util import DateContext
+from typing import Optional
 import argparse
-from config import DEFAULT_IS_RTL
+from config import DEFAULT_PROFILE
+from encoders import PROFILES
+from fingerprint import fingerprinted
+from table_card import render_card
 
 
+@fingerprinted("crypto")
 def create_crypto_post(
     Bitcoin: str = "0",
     Ethereum: str = "0",
@@ -15,65 +18,20 @@ def create_crypto_post(
     USD_Coin: str = "0",
     Dogecoin: str = "0",
     output_path: str = "./OutPut/Crypto_output.jpeg",
-) -> None:
-    base_img = Image.open("Bases/Crypto.png").convert("RGBA")
-    draw = ImageDraw.Draw(base_img)
-
-    fonts = {
-        "main": "./Fonts/AbarMid-SemiBold.ttf",
-        "date": "./Fonts/AbarMid-Regular.ttf",
-    }
-
-    anchor = 312
-    height = 650
-    width = 150
-    positions = {
-        "Bitcoin": (anchor, height),
-        "Ethereum": (anchor, height + width),
-        "Tether": (anchor, height + 2 * width),
-        "Ripple": (anchor, height + 3 * width),
-        "BinanceCoin": (anchor, height + 4 * width),
-        "Solana": (anchor, height + 5 * width),
-        "USD_Coin": (anchor, height + 6 * width),
-        "Dogecoin": (anchor, height + 7 * width),
-        "date": (base_img.width / 2, 495),
-    }
-
-    draw_text_no_box(
-        draw,
-        day_of_week() + " " + shamsi(year=True, month=True, day=True),
-        fonts["date"],
-        *positions["date"],
-        alignment="center",
-        font_size=60,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white",
+    profile: str = DEFAULT_PROFILE,
+    preview: bool = False,
+    dates: Optional[DateContext] = None,
+) -> dict:
+    result = render_card(
+        "crypto",
+        [Bitcoin, Ethereum, Tether, Ripple, BinanceCoin, Solana, USD_Coin, Dogecoin],
+        output_path,
+        profile,
+        preview,
+        dates,
     )
-
-    font_size = 50
-    for key in [
-        "Bitcoin",
-        "Ethereum",
-        "Tether",
-        "Ripple",
-        "BinanceCoin",
-        "Solana",
-        "USD_Coin",
-        "Dogecoin",
-    ]:
-        draw_text_no_box(
-            draw,
-            farsi_fmt(eval(key)),
-            fonts["main"],
-            *positions[key],
-            alignment="center",
-            font_size=font_size,
-            is_rtl=DEFAULT_IS_RTL,
-            color="white",
-        )
-
     print("Generated crypto image.")
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+    return result
 
 
 # if __name__ == "__main__":
@@ -106,6 +64,18 @@ if __name__ == "__main__":
         "--output_path", type=str, required=True, help="Path to save the image"
     )
 
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE,
+        choices=sorted(PROFILES),
+        help="Encoder profile for the output file.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Fast low-resolution preview (same layout as the final render).",
+    )
     args = parser.parse_args()
 
     create_crypto_post(
@@ -118,4 +88,6 @@ if __name__ == "__main__":
         USD_Coin=args.USD_Coin,
         Dogecoin=args.Dogecoin,
         output_path=args.output_path,
+        profile=args.profile,
+        preview=args.preview,
     )
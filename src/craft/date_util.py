@@ -1,57 +1,200 @@
 # date_util.py
 
-from datetime import datetime, timedelta
-from typing import Optional, Literal
+import json
+import operator
+import os
+import threading
+from array import array
+from datetime import date as _date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Literal, Tuple, Union
 from convertdate import persian, islamic
 from zoneinfo import ZoneInfo
 
-# optional imports used by `arabic` – keep optional so the module can be
-# imported even if the dependencies are missing.  The functions are only used
-# when `arabic` is called.
-try:
-    from umalqurra.hijri_date import HijriDate as _Umalqurra
-except Exception:  # pragma: no cover - library might be absent at runtime
-    _Umalqurra = None
+import metrics
+from config import DATE_TIMEZONE
+from number_util import FARSI_DIGITS
+
+# Precomputed calendar table, generated offline by calendar_table.py.
+# Gregorian dates inside its range are converted by indexing; dates outside it
+# fall back to the converters below.
+CALENDAR_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "calendar_table.json"
+)
+CALENDAR_TABLE_VERSION = 1
+TABLE_CALENDARS = ("shamsi", "hijri_iran", "hijri_ksa")
+
+# The sources a table column may have been generated from to be used.  A
+# column built from anything else is ignored, and its dates go through
+# FALLBACK_CONVERTERS as if they were outside the table.
+#
+# hijri_iran: renders used to call ``timeir.hijri_date``, but no released
+# timeir (up to the pinned 0.0.3) has that function, so the import always
+# failed and production printed the civil calendar.  A column generated from
+# convertdate.islamic therefore prints exactly what production printed; one
+# from a timeir that provides hijri_date replaces it when regenerated.
+TABLE_SOURCES = {
+    "shamsi": ("convertdate.persian",),
+    "hijri_iran": ("timeir", "convertdate.islamic"),
+    "hijri_ksa": ("umalqurra",),
+}
+
+DateLike = Union[_date, datetime, int]  # int: proleptic Gregorian ordinal
+
+
+def convert_shamsi(date: _date) -> Tuple[int, int, int]:
+    """Gregorian -> Shamsi with convertdate (astronomical, ~15 ms per call)."""
+    return persian.from_gregorian(date.year, date.month, date.day)
+
+
+def convert_civil_hijri(date: _date) -> Tuple[int, int, int]:
+    """Gregorian -> arithmetic (civil) Hijri with convertdate."""
+    return islamic.from_gregorian(date.year, date.month, date.day)
+
+
+# Used for dates outside the table and for columns whose source is not in
+# TABLE_SOURCES.  No calendar library other than convertdate is imported at
+# render time; the Iran and Umm al-Qura calendars can differ from the civil
+# one by a day, which is why they are tabulated.
+FALLBACK_CONVERTERS = {
+    "shamsi": convert_shamsi,
+    "hijri_iran": convert_civil_hijri,
+    "hijri_ksa": convert_civil_hijri,
+}
+
+_table: Optional[dict] = None
+_table_lock = threading.Lock()
+
 
-try:
-    from timeir import hijri_date as _timeir_hijri_date
-except Exception:  # pragma: no cover - library might be absent at runtime
-    _timeir_hijri_date = None
+def _expand(first: int, last: int, months: List[List[int]]) -> Tuple[array, array, array]:
+    """Per-day (year, month, day) columns from month starts [ordinal, y, m, d]."""
+    years, month_col, days = array("H"), array("B"), array("B")
+    for i, (start, y, m, d) in enumerate(months):
+        end = months[i + 1][0] if i + 1 < len(months) else last + 1
+        n = end - start
+        years.extend([y] * n)
+        month_col.extend([m] * n)
+        days.extend(range(d, d + n))
+    if len(years) != last - first + 1:
+        raise ValueError("Calendar table does not cover its declared range.")
+    return years, month_col, days
 
 
+def load_calendar_table(path: str = CALENDAR_TABLE_PATH) -> dict:
+    """
+    Load the calendar table from ``path`` and expand it into per-day arrays.
+
+    Returns:
+        dict: {"first", "last" (ordinals), "version", "sources", "usable"
+              (the calendars whose source is in TABLE_SOURCES), "weekday"
+              (array, Monday == 0), and for each of TABLE_CALENDARS a tuple
+              of (years, months, days) arrays indexed by ordinal - first}.
+    """
+    with open(path, encoding="utf-8") as fh:
+        raw = json.load(fh)
+    if raw.get("version") != CALENDAR_TABLE_VERSION:
+        raise ValueError(
+            f"Calendar table {path} has version {raw.get('version')}, "
+            f"expected {CALENDAR_TABLE_VERSION}; regenerate it with calendar_table.py."
+        )
+    first, last = raw["first"], raw["last"]
+    table = {
+        "first": first,
+        "last": last,
+        "version": raw["version"],
+        "sources": raw["sources"],
+        "usable": {c for c in TABLE_CALENDARS if raw["sources"].get(c) in TABLE_SOURCES[c]},
+        "weekday": array("B", ((o + 6) % 7 for o in range(first, last + 1))),
+    }
+    for calendar in TABLE_CALENDARS:
+        table[calendar] = _expand(first, last, raw["months"][calendar])
+    return table
+
+
+def calendar_table() -> Optional[dict]:
+    """The process-wide calendar table, loaded on first use; None if it is not installed."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                try:
+                    _table = load_calendar_table()
+                except FileNotFoundError:
+                    _table = {}
+                else:
+                    for calendar in sorted(set(TABLE_CALENDARS) - _table["usable"]):
+                        metrics.event(
+                            "date_util.table_column_ignored",
+                            calendar=calendar,
+                            source=_table["sources"].get(calendar),
+                            expected=" / ".join(TABLE_SOURCES[calendar]),
+                        )
+    return _table or None
+
+
+def _ordinal(date: DateLike) -> int:
+    return date if isinstance(date, int) else date.toordinal()
+
+
+def to_calendar(date: DateLike, calendar: str) -> Tuple[int, int, int]:
+    """
+    Convert a Gregorian date to ``calendar`` ('shamsi', 'hijri_iran' or 'hijri_ksa').
+
+    O(1) inside the table's range; other dates, and every date of a column
+    that was not generated from one of TABLE_SOURCES, use FALLBACK_CONVERTERS
+    (counted as ``date_util.outside_table``).
+    """
+    ordinal = _ordinal(date)
+    table = calendar_table()
+    if table is not None and calendar in table["usable"] and table["first"] <= ordinal <= table["last"]:
+        i = ordinal - table["first"]
+        years, months, days = table[calendar]
+        return years[i], months[i], days[i]
+    metrics.incr("date_util.outside_table")
+    return FALLBACK_CONVERTERS[calendar](_date.fromordinal(ordinal))
+
+
+def to_calendar_many(
+    dates: Iterable[DateLike], calendar: str
+) -> Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]:
+    """
+    Bulk ``to_calendar``: returns the (years, months, days) columns for ``dates``.
+
+    Dates inside the table are gathered in one C-level pass per column
+    (operator.itemgetter over the table arrays).
+    """
+    ordinals = [_ordinal(d) for d in dates]
+    if not ordinals:
+        return (), (), ()
+    table = calendar_table()
+    if (
+        table is None
+        or calendar not in table["usable"]
+        or min(ordinals) < table["first"]
+        or max(ordinals) > table["last"]
+    ):
+        rows = [to_calendar(o, calendar) for o in ordinals]
+        return tuple(zip(*rows)) if rows else ((), (), ())
+
+    first = table["first"]
+    gather = operator.itemgetter(*[o - first for o in ordinals])
+    if len(ordinals) == 1:
+        return tuple((col[ordinals[0] - first],) for col in table[calendar])
+    return tuple(gather(col) for col in table[calendar])
+
+
+# Digit translation tables (str.translate), by language; languages without
+# an entry keep Western digits.
+ARABIC_DIGITS = str.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩")
+
 
 # Helper: Convert Western digits in a string to Farsi numerals
 def to_farsi_numerals(text: str) -> str:
-    western_to_farsi = {
-        "0": "۰",
-        "1": "۱",
-        "2": "۲",
-        "3": "۳",
-        "4": "۴",
-        "5": "۵",
-        "6": "۶",
-        "7": "۷",
-        "8": "۸",
-        "9": "۹",
-    }
-    return "".join(western_to_farsi.get(ch, ch) for ch in text)
+    return text.translate(FARSI_DIGITS)
 
 
 def to_arabic_numerals(text: str) -> str:
     """Convert Western digits to Arabic‑Indic (so‑called ‘Hindi’) numerals."""
-    western_to_arabic = {
-        "0": "٠",
-        "1": "١",
-        "2": "٢",
-        "3": "٣",
-        "4": "٤",
-        "5": "٥",
-        "6": "٦",
-        "7": "٧",
-        "8": "٨",
-        "9": "٩",
-    }
-    return "".join(western_to_arabic.get(ch, ch) for ch in text)
+    return text.translate(ARABIC_DIGITS)
 
 
 # Mapping for Farsi names of Gregorian months
@@ -209,11 +352,16 @@ def arabic(
     """Return an Islamic (Hijri) date string.
 
     Parameters mirror ``georgian``/``shamsi`` for consistency.  The ``calendar``
-    argument controls which conversion method is used:
+    argument controls which calendar is printed:
+
+    ``"iran"`` – the date shown on `time.ir`.
+    ``"ksa"``  – the Umm al-Qura calendar.
+    ``"civil"`` – the arithmetic algorithm from :mod:`convertdate`.
 
-    ``"iran"`` – use :mod:`timeir` to match the date shown on `time.ir`.
-    ``"ksa"``  – use the Umm al-Qura calendar via :mod:`umalqurra`.
-    ``"civil"`` – use the arithmetic algorithm from :mod:`convertdate`.
+    ``"iran"`` and ``"ksa"`` are read from the precomputed calendar table
+    (see calendar_table.py and TABLE_SOURCES); no calendar library is called
+    for them at render time.  Outside its range both fall back to
+    ``"civil"``.
     """
 
     if date is None:
@@ -221,13 +369,10 @@ def arabic(
     date += timedelta(days=days_into_future)
 
     # --- 1. pick the correct converter ------------------------------------
-    if calendar == "iran" and _timeir_hijri_date is not None:
-        i_year, i_month, i_day = _timeir_hijri_date(date)
-    elif calendar == "ksa" and _Umalqurra is not None:
-        conv = _Umalqurra.from_georgian(date.year, date.month, date.day)
-        i_year, i_month, i_day = conv.year, conv.month, conv.day
-    else:  # fallback to arithmetic algorithm
-        i_year, i_month, i_day = islamic.from_gregorian(date.year, date.month, date.day)
+    if calendar in ("iran", "ksa"):
+        i_year, i_month, i_day = to_calendar(date, "hijri_" + calendar)
+    else:  # arithmetic algorithm
+        i_year, i_month, i_day = convert_civil_hijri(date)
 
     components = []
     if day:
@@ -282,7 +427,7 @@ def shamsi(
         date = datetime.now()
     date += timedelta(days=days_into_future)
 
-    p_year, p_month, p_day = persian.from_gregorian(date.year, date.month, date.day)
+    p_year, p_month, p_day = to_calendar(date, "shamsi")
     components = []
     if day:
         day_str = str(p_day)
@@ -395,6 +540,233 @@ def clock_time(
     return time_str
 
 
+class DateContext:
+    """
+    Every date string one render prints, taken from a single instant.
+
+    Templates used to call ``shamsi``/``arabic``/``georgian``/``day_of_week``/
+    ``clock_time`` separately, each reading the clock again (naive local time,
+    except the clock in Tehran time), so one card could mix two days or two
+    minutes.  A DateContext fixes the instant once, in ``timezone``, and
+    formats lazily: each distinct call is computed on first use and memoized.
+
+    Pass one to a template's ``dates`` argument to render a fixed instant
+    (benchmarks, reproducible fingerprints, or several cards that must agree).
+
+    Args:
+        instant: The moment to print; naive datetimes are taken to be in
+                 ``timezone``.  Defaults to now.
+        timezone: IANA time zone whose calendar day and clock are printed.
+    """
+
+    def __init__(self, instant: Optional[datetime] = None, timezone: str = DATE_TIMEZONE):
+        tz = ZoneInfo(timezone)
+        if instant is None:
+            instant = datetime.now(tz)
+        elif instant.tzinfo is None:
+            instant = instant.replace(tzinfo=tz)
+        else:
+            instant = instant.astimezone(tz)
+        self.instant = instant
+        self.timezone = timezone
+        self._memo: dict = {}
+
+    def __repr__(self) -> str:
+        return f"DateContext({self.instant.isoformat()!r})"
+
+    def _format(self, func, **kwargs) -> str:
+        key = (func.__name__, tuple(sorted(kwargs.items())))
+        text = self._memo.get(key)
+        if text is None:
+            text = self._memo[key] = func(date=self.instant, **kwargs)
+        return text
+
+    def georgian(self, year: bool = True, month: bool = True, day: bool = True, **kwargs) -> str:
+        """``georgian()`` at this context's instant."""
+        return self._format(georgian, year=year, month=month, day=day, **kwargs)
+
+    def arabic(self, year: bool = True, month: bool = True, day: bool = True, **kwargs) -> str:
+        """``arabic()`` at this context's instant."""
+        return self._format(arabic, year=year, month=month, day=day, **kwargs)
+
+    def shamsi(self, year: bool = True, month: bool = True, day: bool = True, **kwargs) -> str:
+        """``shamsi()`` at this context's instant."""
+        return self._format(shamsi, year=year, month=month, day=day, **kwargs)
+
+    def day_of_week(self, **kwargs) -> str:
+        """``day_of_week()`` at this context's instant."""
+        return self._format(day_of_week, **kwargs)
+
+    def clock_time(self, **kwargs) -> str:
+        """``clock_time()`` at this context's instant, in this context's time zone."""
+        kwargs.setdefault("timezone", self.timezone)
+        return self._format(clock_time, **kwargs)
+
+    def bucket(self, clock: str = "day") -> str:
+        """The part of the instant a template prints: 'day' or 'minute' (for fingerprints)."""
+        if clock == "minute":
+            return self.instant.strftime("%Y-%m-%dT%H:%M")
+        if clock == "day":
+            return self.instant.strftime("%Y-%m-%d")
+        raise ValueError("clock must be 'day' or 'minute'.")
+
+
+# --- Bulk formatting --------------------------------------------------------
+#
+# format_dates() produces the same strings as georgian()/arabic()/shamsi()/
+# day_of_week() for many dates at once (calendar strips, archives): each
+# calendar is converted in one table gather, and every day number, year and
+# month name is formatted once from a lookup table instead of once per date.
+
+# English Gregorian month/weekday names as strftime prints them.
+_GREGORIAN_MONTHS = [_date(2000, m, 1).strftime("%B") for m in range(1, 13)]
+_WEEKDAYS = [_date(2001, 1, 1 + i).strftime("%A") for i in range(7)]  # Monday first
+_WEEKDAYS_SHORT = [_date(2001, 1, 1 + i).strftime("%a") for i in range(7)]
+
+_FORMAT_OPTIONS = {
+    "georgian": {"year", "month", "day", "language", "separator"},
+    "arabic": {"year", "month", "day", "language", "calendar", "separator", "month_format"},
+    "shamsi": {"year", "month", "day", "language", "separator"},
+    "day_of_week": {"language", "short"},
+}
+
+
+def date_range(start: DateLike, end: DateLike, step: int = 1) -> range:
+    """Ordinals of every ``step``-th day from ``start`` to ``end`` inclusive, for format_dates."""
+    return range(_ordinal(start), _ordinal(end) + 1, step)
+
+
+def _digits(language: str, farsi: bool = True, arabic: bool = False):
+    """Digit table a formatter uses for ``language`` (None: Western digits)."""
+    language = language.lower()
+    if language == "farsi" and farsi:
+        return FARSI_DIGITS
+    if language == "arabic" and arabic:
+        return ARABIC_DIGITS
+    return None
+
+
+def _numbers(values: Iterable[int], digits) -> List[str]:
+    """str() of each value in ``digits``, formatting each distinct value once."""
+    values = list(values)
+    texts = {v: str(v) if digits is None else str(v).translate(digits) for v in set(values)}
+    return list(map(texts.__getitem__, values))
+
+
+def _names(values: Iterable[int], names: Dict[int, str]) -> List[str]:
+    return [names.get(v, str(v)) for v in values]
+
+
+def _columns(ordinals: List[int], calendar: str, cache: dict) -> Tuple[tuple, tuple, tuple]:
+    """(years, months, days) of ``ordinals`` in ``calendar``, converted once per call."""
+    if calendar not in cache:
+        if calendar in TABLE_CALENDARS:
+            cache[calendar] = to_calendar_many(ordinals, calendar)
+        elif calendar == "georgian":
+            dates = [_date.fromordinal(o) for o in ordinals]
+            cache[calendar] = (
+                [d.year for d in dates], [d.month for d in dates], [d.day for d in dates]
+            )
+        else:  # civil Hijri
+            rows = [convert_civil_hijri(_date.fromordinal(o)) for o in ordinals]
+            cache[calendar] = tuple(zip(*rows)) if rows else ((), (), ())
+    return cache[calendar]
+
+
+def _format_column(ordinals: List[int], kind: str, spec: dict, cache: dict) -> List[str]:
+    language = spec.get("language", {"georgian": "english", "arabic": "arabic"}.get(kind, "farsi"))
+    lang = language.lower()
+
+    if kind == "day_of_week":
+        weekdays = [(o + 6) % 7 for o in ordinals]
+        if lang == "farsi":
+            table = (
+                [english_to_farsi_weekdays_abbrev[n] for n in _WEEKDAYS_SHORT]
+                if spec.get("short")
+                else [english_to_farsi_weekdays[n] for n in _WEEKDAYS]
+            )
+        elif lang == "english" and spec.get("short"):
+            table = _WEEKDAYS_SHORT
+        else:
+            table = _WEEKDAYS
+        return list(map(table.__getitem__, weekdays))
+
+    if kind == "georgian":
+        years, months, days = _columns(ordinals, "georgian", cache)
+        digits = _digits(language)
+        month_names = dict(enumerate(_GREGORIAN_MONTHS, 1))
+        if lang == "farsi":
+            month_names = farsi_gregorian_months
+    elif kind == "shamsi":
+        years, months, days = _columns(ordinals, "shamsi", cache)
+        digits = _digits(language)
+        if lang == "farsi":
+            month_names = farsi_shamsi_months
+        elif lang == "english":
+            month_names = dict(enumerate(english_persian_months, 1))
+        else:
+            month_names = {}
+    else:  # arabic
+        calendar = spec.get("calendar", "iran")
+        years, months, days = _columns(
+            ordinals, "hijri_" + calendar if calendar in ("iran", "ksa") else "civil", cache
+        )
+        digits = _digits(language, arabic=True)
+        if spec.get("month_format", "name").lower() != "name":
+            month_names = None
+        elif lang == "english":
+            month_names = dict(enumerate(english_islamic_months, 1))
+        else:
+            month_names = dict(enumerate(farsi_islamic_months, 1))
+
+    parts = []
+    if spec.get("day", True):
+        parts.append(_numbers(days, digits))
+    if spec.get("month", True):
+        parts.append(_numbers(months, digits) if month_names is None else _names(months, month_names))
+    if spec.get("year", True):
+        parts.append(_numbers(years, digits))
+    if not parts:
+        return [""] * len(ordinals)
+    return list(map(spec.get("separator", " ").join, zip(*parts)))
+
+
+def format_dates(dates: Iterable[DateLike], formats: Dict[str, dict]) -> Dict[str, List[str]]:
+    """
+    Format many dates in every requested calendar and language in one pass.
+
+    Args:
+        dates: Dates, datetimes or ordinals, e.g. ``date_range(start, end)``.
+        formats: Output name -> spec.  ``spec["kind"]`` is 'georgian',
+                 'arabic', 'shamsi' or 'day_of_week'; the other keys are
+                 that function's options (year/month/day default True;
+                 language, calendar, separator, month_format, short).
+
+    Returns:
+        dict: Output name -> strings aligned with ``dates``; each string is
+              what the single-date function returns for that date.
+
+    Example:
+        format_dates(date_range(date(2025, 3, 21), date(2025, 4, 19)), {
+            "persian": {"kind": "shamsi"},
+            "weekday": {"kind": "day_of_week"},
+            "hijri": {"kind": "arabic", "language": "farsi"},
+        })
+    """
+    ordinals = [_ordinal(d) for d in dates]
+    cache: dict = {}
+    out = {}
+    for name, spec in formats.items():
+        kind = spec.get("kind")
+        if kind not in _FORMAT_OPTIONS:
+            raise ValueError(f"{name}: kind must be one of {', '.join(_FORMAT_OPTIONS)}.")
+        unknown = set(spec) - _FORMAT_OPTIONS[kind] - {"kind"}
+        if unknown:
+            raise ValueError(f"{name}: unsupported options for {kind}: {', '.join(sorted(unknown))}.")
+        out[name] = _format_column(ordinals, kind, spec, cache)
+    return out
+
+
 # Example usage (for testing purposes)
 if __name__ == "__main__":
     now = datetime.now()
@@ -0,0 +1,247 @@
+# encoders.py
+#
+# Output encoding for rendered cards.  A profile names a destination
+# ("telegram-preview", "channel-final", "archive") and holds one set of
+# encoder settings per kind of template:
+#
+#   photo – posts built around a user photo (Post2.0, Live, BreakingNews …)
+#   card  – flat-colour price tables (Currency, gold, crypto, car1 …)
+#
+# Settings are Pillow save() keyword arguments plus extras handled here:
+# "format", "colors" (quantise to a palette of that many colours first) and,
+# for JPEG, "max_bytes" (search the quality that fits the byte budget, see
+# encode_jpeg_to_size; "quality" is then the upper bound).
+
+import io
+import time
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+import metrics
+from config import DEFAULT_PROFILE
+
+
+PROFILES: Dict[str, Dict[str, dict]] = {
+    # Menu previews while the user is still editing: fastest encode.
+    "telegram-preview": {
+        "photo": {"format": "JPEG", "quality": 80, "subsampling": "4:2:0"},
+        "card": {"format": "JPEG", "quality": 80, "subsampling": "4:2:0"},
+    },
+    # What goes to the channel.  Photos keep the historical q95 JPEG; cards
+    # are palette PNGs, ~3x smaller than JPEG with no visible change.
+    "channel-final": {
+        "photo": {"format": "JPEG", "quality": 95},
+        "card": {"format": "PNG", "colors": 256, "compress_level": 6},
+    },
+    # Same as channel-final, but photo posts get the best JPEG quality that
+    # fits a byte budget, for smaller uploads to Telegram.
+    "telegram-budget": {
+        "photo": {
+            "format": "JPEG",
+            "quality": 95,
+            "max_bytes": 150 * 1024,
+            "min_quality": 60,
+            "subsampling": ("4:2:0",),
+        },
+        "card": {"format": "PNG", "colors": 256, "compress_level": 6},
+    },
+    # Long-term storage: full-chroma photos and lossless cards.  Photos come
+    # out slightly larger than channel-final (4:4:4), cards smaller; encode
+    # time does not matter.
+    "archive": {
+        "photo": {
+            "format": "JPEG",
+            "quality": 95,
+            "subsampling": "4:4:4",
+            "optimize": True,
+            "progressive": True,
+        },
+        "card": {"format": "WEBP", "lossless": True, "method": 4},
+    },
+}
+
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+
+def register_profile(name: str, photo: dict, card: dict) -> None:
+    """Add or replace a named encoder profile."""
+    PROFILES[name] = {"photo": dict(photo), "card": dict(card)}
+
+
+def profile_settings(profile: str, kind: str = "photo") -> dict:
+    """Return a copy of the settings for ``profile``/``kind``."""
+    try:
+        return dict(PROFILES[profile][kind])
+    except KeyError:
+        raise ValueError(
+            f"Unknown encoder profile/kind {profile!r}/{kind!r}; "
+            f"profiles: {', '.join(PROFILES)}"
+        ) from None
+
+
+def encode_jpeg_to_size(
+    img: Image.Image,
+    max_bytes: int,
+    max_quality: int = 95,
+    min_quality: int = 60,
+    subsampling: Tuple[str, ...] = ("4:2:0",),
+    max_iterations: int = 7,
+    **save_kwargs,
+) -> Tuple[bytes, dict]:
+    """
+    Find the best JPEG quality whose output fits in ``max_bytes``.
+
+    Every attempt is encoded into the same in-memory buffer from the same
+    RGB image.  For each subsampling mode the quality is binary searched
+    between ``min_quality`` and ``max_quality``, with at most
+    ``max_iterations`` encodes per mode.  The result with the highest
+    quality wins; on a tie, the earlier subsampling mode wins.  If nothing
+    fits, the ``min_quality`` encode is returned with ``fits`` set to False.
+
+    Returns:
+        tuple: (jpeg bytes, {"quality", "subsampling", "bytes", "fits", "attempts"})
+    """
+    rgb = img if img.mode == "RGB" else img.convert("RGB")
+    buf = io.BytesIO()
+    attempts = 0
+
+    def _try(quality: int, sub: str) -> bytes:
+        nonlocal attempts
+        attempts += 1
+        buf.seek(0)
+        buf.truncate()
+        rgb.save(buf, format="JPEG", quality=quality, subsampling=sub, **save_kwargs)
+        return buf.getvalue()
+
+    best: Optional[Tuple[int, str, bytes]] = None
+    smallest: Optional[Tuple[int, str, bytes]] = None
+    for sub in subsampling:
+        data = _try(max_quality, sub)
+        if len(data) <= max_bytes:
+            found = (max_quality, sub, data)
+        else:
+            found = None
+            lo, hi = min_quality, max_quality - 1
+            for _ in range(max_iterations - 1):
+                if lo > hi:
+                    break
+                mid = (lo + hi) // 2
+                data = _try(mid, sub)
+                if len(data) <= max_bytes:
+                    found, lo = (mid, sub, data), mid + 1
+                else:
+                    hi = mid - 1
+                if smallest is None or len(data) < len(smallest[2]):
+                    smallest = (mid, sub, data)
+        if found and (best is None or found[0] > best[0]):
+            best = found
+        if best and best[0] == max_quality:
+            break
+
+    fits = best is not None
+    if not fits:
+        if smallest is None or smallest[0] != min_quality:
+            smallest = (min_quality, subsampling[-1], _try(min_quality, subsampling[-1]))
+        best = smallest
+    quality, sub, data = best
+    return data, {
+        "format": "JPEG",
+        "quality": quality,
+        "subsampling": sub,
+        "bytes": len(data),
+        "fits": fits,
+        "attempts": attempts,
+    }
+
+
+def _prepare(img: Image.Image, settings: dict) -> Tuple[Image.Image, dict]:
+    """Convert ``img`` for the target format and split off the non-Pillow keys."""
+    settings = dict(settings)
+    fmt = settings.pop("format")
+    colors = settings.pop("colors", None)
+
+    out = img if img.mode == "RGB" else img.convert("RGB")
+    if colors:
+        out = out.quantize(
+            colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE
+        )
+    return out, dict(settings, format=fmt)
+
+
+def encode(
+    img: Image.Image,
+    profile: str = DEFAULT_PROFILE,
+    kind: str = "photo",
+    settings: Optional[dict] = None,
+) -> Tuple[bytes, dict]:
+    """
+    Encode a rendered canvas in memory.
+
+    Args:
+        img: Rendered image (any mode; alpha is dropped).
+        profile: Name from PROFILES.
+        kind: 'photo' or 'card'.
+        settings: Explicit settings, overriding ``profile``/``kind``.
+
+    Returns:
+        tuple: (encoded bytes, info) where info holds the profile, format,
+               size in bytes and, for budgeted JPEGs, the chosen quality and
+               subsampling.
+    """
+    settings = settings if settings is not None else profile_settings(profile, kind)
+    start = time.perf_counter()
+    out, save_kwargs = _prepare(img, settings)
+
+    max_bytes = save_kwargs.pop("max_bytes", None)
+    if max_bytes is not None and save_kwargs["format"] == "JPEG":
+        del save_kwargs["format"]
+        subsampling = save_kwargs.pop("subsampling", ("4:2:0",))
+        if isinstance(subsampling, str):
+            subsampling = (subsampling,)
+        data, info = encode_jpeg_to_size(
+            out,
+            max_bytes,
+            max_quality=save_kwargs.pop("quality", 95),
+            min_quality=save_kwargs.pop("min_quality", 60),
+            subsampling=tuple(subsampling),
+            **save_kwargs,
+        )
+    else:
+        save_kwargs.pop("min_quality", None)
+        buf = io.BytesIO()
+        out.save(buf, **save_kwargs)
+        data = buf.getvalue()
+        info = {"format": save_kwargs["format"], "bytes": len(data)}
+
+    metrics.observe(f"encode.{profile}.{kind}", (time.perf_counter() - start) * 1000)
+    metrics.incr(f"encode.{profile}.{kind}.bytes", len(data))
+    return data, dict(info, profile=profile, kind=kind)
+
+
+def save_image(
+    img: Image.Image,
+    output_path: Optional[str],
+    profile: str = DEFAULT_PROFILE,
+    kind: str = "photo",
+) -> dict:
+    """
+    Encode ``img`` with ``profile`` and hand it to the caller, optionally writing it to disk.
+
+    Args:
+        img: Rendered canvas.
+        output_path: File to write, or None to keep the result in memory only.
+        profile: Name from PROFILES.
+        kind: 'photo' or 'card'.
+
+    Returns:
+        dict: The encoder info from ``encode`` plus ``data`` (the encoded
+              bytes) and, when written, ``path``.
+    """
+    data, info = encode(img, profile=profile, kind=kind)
+    info["data"] = data
+    if output_path is not None:
+        with open(output_path, "wb") as fh:
+            fh.write(data)
+        info["path"] = output_path
+    return info
@@ -0,0 +1,230 @@
+# fingerprint.py
+#
+# Canonical fingerprints of render inputs.  A render whose fingerprint
+# matches the previous output at the same output_path returns that output
+# instead of decoding, drawing and encoding it again – e.g. when a bot user
+# reopens a field and sends the same value, which used to end in Telegram's
+# "message is not modified".
+#
+# A fingerprint covers:
+#   * the template name and every argument (defaults applied, output_path
+#     excluded),
+#   * the content hash of the user photo (not its path: bots reuse paths),
+#   * the date, or the minute for templates that print the clock, of the
+#     render's DateContext (the wrapper creates one when the caller did not,
+#     so the fingerprint and the render see the same instant),
+#   * the versions (size + mtime) of the craft scripts, Bases/ and Fonts/.
+#
+# The previous fingerprint of a file output is kept next to it in
+# "<output_path>.fp"; in-memory renders (output_path=None) look the
+# fingerprint up among the last RECENT_RENDERS in-memory results of any
+# template and user, so a reopen hits whoever rendered it last.  Renders that are new for this output are then looked
+# up in the shared render_cache before anything is drawn.
+
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import metrics
+import render_cache
+from date_util import DateContext
+from fs_util import atomic_write, file_digest
+
+# Bump to invalidate every stored fingerprint after a format change.
+FINGERPRINT_VERSION = 1
+
+CRAFT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Template arguments holding a user photo; hashed by content.
+PHOTO_PARAMS = ("user_image_path",)
+
+# Asset directories, relative to the working directory like the templates' paths.
+ASSET_DIRS = ("Bases", "Fonts")
+
+SIDECAR_SUFFIX = ".fp"
+
+# In-memory (output_path=None) results kept, most recently used last.
+RECENT_RENDERS = 32
+
+_lock = threading.Lock()
+_recent: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def asset_version() -> str:
+    """Digest of the size and mtime of every craft script and asset file."""
+    paths = sorted(glob.glob(os.path.join(CRAFT_DIR, "*.py")))
+    for directory in ASSET_DIRS:
+        paths += sorted(glob.glob(os.path.join(directory, "*")))
+    sha = hashlib.sha256()
+    for path in paths:
+        st = os.stat(path)
+        sha.update(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return sha.hexdigest()
+
+
+def time_bucket(clock: str = "day", dates: Optional[DateContext] = None) -> str:
+    """
+    The part of the render's instant that a template prints.
+
+    Args:
+        clock: 'day' for templates that only print dates, 'minute' for
+               templates that print clock_time().
+        dates: The render's DateContext; defaults to now.
+    """
+    return (dates or DateContext()).bucket(clock)
+
+
+def _photo_key(value) -> Optional[str]:
+    if not isinstance(value, str):
+        return None  # an opened image; no stable identity
+    if value.startswith("ingested:"):
+        return value  # already content-addressed
+    return "sha256:" + file_digest(value)
+
+
+def render_fingerprint(template: str, params: dict, clock: str = "day") -> Optional[str]:
+    """
+    Fingerprint of a render of ``template`` with ``params``.
+
+    Args:
+        template: Template name, as in templates.TEMPLATES.
+        params: Render arguments; output_path is ignored and ``dates`` only
+                contributes its time bucket.
+        clock: Time resolution the template prints, see time_bucket.
+
+    Returns:
+        str: Hex SHA-256, or None when an argument cannot be fingerprinted
+             (an opened image, an object that is not JSON data).
+    """
+    inputs = {k: v for k, v in params.items() if k not in ("output_path", "dates")}
+    for name in PHOTO_PARAMS:
+        if name in inputs:
+            try:
+                inputs[name] = _photo_key(inputs[name])
+            except OSError:
+                return None  # missing photo: let the render report it
+            if inputs[name] is None:
+                return None
+    try:
+        canonical = json.dumps(
+            {
+                "version": FINGERPRINT_VERSION,
+                "template": template,
+                "inputs": inputs,
+                "time": time_bucket(clock, params.get("dates")),
+                "assets": asset_version(),
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+    except TypeError:
+        return None
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _previous(template: str, output_path: Optional[str], fingerprint: str) -> Optional[dict]:
+    """The previous result for this output if it was rendered from ``fingerprint``."""
+    if output_path is None:
+        with _lock:
+            result = _recent.get(fingerprint)
+            if result is None:
+                return None
+            _recent.move_to_end(fingerprint)
+        return dict(result, unchanged=True)
+
+    try:
+        with open(output_path + SIDECAR_SUFFIX, encoding="utf-8") as fh:
+            sidecar = json.load(fh)
+        st = os.stat(output_path)
+    except (OSError, ValueError):
+        return None
+    # The output must still be the file this fingerprint produced.
+    if sidecar.get("fingerprint") != fingerprint or sidecar.get("stamp") != [
+        st.st_size,
+        st.st_mtime_ns,
+    ]:
+        return None
+    with open(output_path, "rb") as fh:
+        data = fh.read()
+    return dict(sidecar["info"], data=data, path=output_path, unchanged=True)
+
+
+def _remember(template: str, output_path: Optional[str], fingerprint: str, result: dict) -> None:
+    if output_path is None:
+        with _lock:
+            _recent[fingerprint] = dict(result)
+            _recent.move_to_end(fingerprint)
+            while len(_recent) > RECENT_RENDERS:
+                _recent.popitem(last=False)
+        return
+    st = os.stat(output_path)
+    sidecar = {
+        "fingerprint": fingerprint,
+        "stamp": [st.st_size, st.st_mtime_ns],
+        "info": {k: v for k, v in result.items() if k not in ("data", "path")},
+    }
+    atomic_write(
+        output_path + SIDECAR_SUFFIX,
+        json.dumps(sidecar, ensure_ascii=False).encode("utf-8"),
+    )
+
+
+def fingerprinted(template: str, clock: str = "day") -> Callable:
+    """
+    Decorator for a template's render function: skip renders whose inputs did not change.
+
+    The wrapped function is called only when the fingerprint of its
+    arguments differs from the one the current output was rendered from
+    (otherwise the previous result is returned with ``unchanged=True``) and
+    is not in the shared render cache (a cached render is written to
+    ``output_path`` and returned with ``cached=True``).
+
+    Args:
+        template: Template name, as in templates.TEMPLATES.
+        clock: 'day', or 'minute' for templates that print the time.
+    """
+
+    def decorate(func: Callable[..., dict]) -> Callable[..., dict]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> dict:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            if "dates" in bound.arguments and bound.arguments["dates"] is None:
+                bound.arguments["dates"] = DateContext()
+            params = dict(bound.arguments)
+            output_path = params.get("output_path")
+
+            fingerprint = render_fingerprint(template, params, clock)
+            if fingerprint is not None:
+                previous = _previous(template, output_path, fingerprint)
+                if previous is not None:
+                    metrics.incr(f"render.{template}.unchanged")
+                    return dict(previous, fingerprint=fingerprint)
+
+                cached = render_cache.get(fingerprint)
+                if cached is not None:
+                    if output_path is not None:
+                        atomic_write(output_path, cached["data"])
+                        cached["path"] = output_path
+                    _remember(template, output_path, fingerprint, cached)
+                    return dict(cached, fingerprint=fingerprint, cached=True)
+
+            result = func(*bound.args, **bound.kwargs)
+            if fingerprint is not None:
+                _remember(template, output_path, fingerprint, result)
+                render_cache.put(fingerprint, result)
+                result["fingerprint"] = fingerprint
+            return result
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,57 @@
+# fs_util.py
+#
+# Small file helpers shared by the stores that several render processes
+# write to at once (ingest, render fingerprints and caches).
+
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Dict, Tuple
+
+
+_digest_lock = threading.Lock()
+_digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Write ``data`` to ``path`` so that readers see the old file or the new one, never a partial write.
+
+    The data goes to a temporary file in the same directory, which is then
+    renamed over ``path`` (atomic on POSIX).
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def file_digest(path: str) -> str:
+    """
+    SHA-256 of the file at ``path``.
+
+    Digests are remembered per path together with the file's size and
+    mtime, so a file that has not changed is hashed only once per process.
+    """
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    with _digest_lock:
+        known = _digests.get(path)
+    if known is not None and known[0] == stamp:
+        return known[1]
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _digest_lock:
+        _digests[path] = (stamp, digest)
+    return digest
@@ -1,10 +1,13 @@
-from PIL import Image, ImageDraw
-from text_utils import draw_text_no_box, farsi_fmt
-from date_util import shamsi, day_of_week
+from date_util import DateContext
+from typing import Optional
 import argparse
-from config import DEFAULT_IS_RTL
+from config import DEFAULT_PROFILE
+from encoders import PROFILES
+from fingerprint import fingerprinted
+from table_card import render_card
 
 
+@fingerprinted("gold")
 def create_gold_post(
     Gold: str = "0",
     Coin: str = "0",
@@ -13,54 +16,20 @@ def create_gold_post(
     Gold18: str = "0",
     Gold24: str = "0",
     output_path: str = "./OutPut/Gold_output.png",
-) -> None:
-    base_img = Image.open("Bases/Gold.png").convert("RGBA")
-    draw = ImageDraw.Draw(base_img)
-
-    fonts = {
-        "main": "./Fonts/AbarMid-SemiBold.ttf",
-        "date": "./Fonts/AbarMid-Regular.ttf",
-    }
-
-    anchor = 369
-    height = 800
-    width = 150
-    positions = {
-        "Gold": (anchor, height),
-        "Coin": (anchor, height + width),
-        "HalfCoin": (anchor, height + 2 * width),
-        "QuarterCoin": (anchor, height + 3 * width),
-        "Gold18": (anchor, height + 4 * width),
-        "Gold24": (anchor, height + 5 * width),
-        "date": (base_img.width / 2, 625),
-    }
-
-    draw_text_no_box(
-        draw,
-        day_of_week() + " " + shamsi(year=True, month=True, day=True),
-        fonts["date"],
-        *positions["date"],
-        alignment="center",
-        font_size=60,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white",
+    profile: str = DEFAULT_PROFILE,
+    preview: bool = False,
+    dates: Optional[DateContext] = None,
+) -> dict:
+    result = render_card(
+        "gold",
+        [Gold, Coin, HalfCoin, QuarterCoin, Gold18, Gold24],
+        output_path,
+        profile,
+        preview,
+        dates,
     )
-
-    font_size = 65
-    for key in ["Gold", "Coin", "HalfCoin", "QuarterCoin", "Gold18", "Gold24"]:
-        draw_text_no_box(
-            draw,
-            farsi_fmt(eval(key)),
-            fonts["main"],
-            *positions[key],
-            alignment="center",
-            font_size=font_size,
-            is_rtl=DEFAULT_IS_RTL,
-            color="white",
-        )
-
     print("Generated gold image.")
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+    return result
 
 
 if __name__ == "__main__":
@@ -73,6 +42,18 @@ if __name__ == "__main__":
     parser.add_argument("--Gold24", type=str, default="0")
     parser.add_argument("--output_path", type=str, required=True)
 
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE,
+        choices=sorted(PROFILES),
+        help="Encoder profile for the output file.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Fast low-resolution preview (same layout as the final render).",
+    )
     args = parser.parse_args()
 
     create_gold_post(
@@ -83,6 +64,8 @@ if __name__ == "__main__":
         Gold18=args.Gold18,
         Gold24=args.Gold24,
         output_path=args.output_path,
+        profile=args.profile,
+        preview=args.preview,
     )
 
 # # python "./src/Craft/Post.py" --user_image_path="./UserImages/img.png" --overline_text="سوخت قاچاق در خليج فارس" --main_headline_text="كشف محموله عظيم سوخت قاچاق درخليج فارس؛ ضربه سنگين به قاچاقچيان" --output_path="./OutPut/Post_output.png" --events_text="رویداد "
@@ -1,12 +1,14 @@
-from PIL import Image, ImageDraw
-from text_utils import draw_text_no_box, farsi_fmt
-from date_util import shamsi, day_of_week
+from date_util import DateContext
 import argparse
 import re
-from typing import Union
-from config import DEFAULT_IS_RTL
+from typing import Optional, Union
+from config import DEFAULT_PROFILE
+from encoders import PROFILES
+from fingerprint import fingerprinted
+from table_card import render_card
 
 
+@fingerprinted("iPhone")
 def create_crypto_post(
     IPHONE16PROMAX: str = "0",
     IPHONE16PRO: str = "0",
@@ -17,65 +19,29 @@ def create_crypto_post(
     IPHONE13PROMAX: str = "0",
     IPHONE13PRO: str = "0",
     output_path: str = "./OutPut/iPhone_output.jpeg",
-) -> None:
-    base_img = Image.open("Bases/iPhone.png").convert("RGBA")
-    draw = ImageDraw.Draw(base_img)
-
-    fonts = {
-        "main": "./Fonts/AbarMid-SemiBold.ttf",
-        "date": "./Fonts/AbarMid-Regular.ttf",
-    }
-
-    anchor = 774
-    height = 650
-    width = 150
-    positions = {
-        "IPHONE16PROMAX": (anchor, height),
-        "IPHONE16PRO": (anchor, height + width),
-        "IPHONE16NORMAL": (anchor, height + 2 * width),
-        "IPHONE15PROMAX": (anchor, height + 3 * width),
-        "IPHONE15PRO": (anchor, height + 4 * width),
-        "IPHONE14NORMAL": (anchor, height + 5 * width),
-        "IPHONE13PROMAX": (anchor, height + 6 * width),
-        "IPHONE13PRO": (anchor, height + 7 * width),
-        "date": (base_img.width / 2, 495),
-    }
-
-    draw_text_no_box(
-        draw,
-        day_of_week() + " " + shamsi(year=True, month=True, day=True),
-        fonts["date"],
-        *positions["date"],
-        alignment="center",
-        font_size=60,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white",
+    profile: str = DEFAULT_PROFILE,
+    preview: bool = False,
+    dates: Optional[DateContext] = None,
+) -> dict:
+    result = render_card(
+        "iPhone",
+        [
+            IPHONE16PROMAX,
+            IPHONE16PRO,
+            IPHONE16NORMAL,
+            IPHONE15PROMAX,
+            IPHONE15PRO,
+            IPHONE14NORMAL,
+            IPHONE13PROMAX,
+            IPHONE13PRO,
+        ],
+        output_path,
+        profile,
+        preview,
+        dates,
     )
-
-    font_size = 50
-    for key in [
-        "IPHONE16PROMAX",
-        "IPHONE16PRO",
-        "IPHONE16NORMAL",
-        "IPHONE15PROMAX",
-        "IPHONE15PRO",
-        "IPHONE14NORMAL",
-        "IPHONE13PROMAX",
-        "IPHONE13PRO",
-    ]:
-        draw_text_no_box(
-            draw,
-            farsi_fmt(eval(key)),
-            fonts["main"],
-            *positions[key],
-            alignment="center",
-            font_size=font_size,
-            is_rtl=DEFAULT_IS_RTL,
-            color="white",
-        )
-
     print("Generated iPhone image.")
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+    return result
 
 
 # if __name__ == "__main__":
@@ -122,6 +88,18 @@ if __name__ == "__main__":
         "--output_path", type=str, required=True, help="Path to save the image"
     )
 
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE,
+        choices=sorted(PROFILES),
+        help="Encoder profile for the output file.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Fast low-resolution preview (same layout as the final render).",
+    )
     args = parser.parse_args()
 
     create_crypto_post(
@@ -134,4 +112,6 @@ if __name__ == "__main__":
         IPHONE13PROMAX=args.IPHONE13PROMAX,
         IPHONE13PRO=args.IPHONE13PRO,
         output_path=args.output_path,
+        profile=args.profile,
+        preview=args.preview,
     )
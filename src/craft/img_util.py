@@ -1,12 +1,584 @@
 # img_util.py
 
-from PIL import Image, ImageEnhance, ImageStat
-from typing import Union, Tuple, Optional
+import functools
+import hashlib
+import itertools
+import os
+import struct
+import threading
+import time
+import zlib
+
+from PIL import Image, ImageColor, ImageEnhance, ImageFilter, ImageStat
+from typing import Dict, List, Union, Tuple, Optional
+
+import metrics
+from config import MAX_INPUT_BYTES, MAX_INPUT_PIXELS, PNG_STRIP_PIXELS, SLOW_DECODE_MS
+from fs_util import file_digest
+
+
+class InputTooLargeError(ValueError):
+    """Raised when an input image is over the configured byte or pixel budget."""
+
+
+# Modes Pillow can resample directly; anything else (palette, 1-bit, CMYK,
+# 16-bit …) is converted up front so that resize() does not fall back to
+# nearest-neighbour.
+_RESAMPLABLE_MODES = ("RGB", "RGBA", "L", "LA")
+
+
+def _contain_size(src: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """Size of ``src`` scaled to fit inside ``box`` (same maths as ImageOps.contain)."""
+    src_w, src_h = src
+    box_w, box_h = box
+    im_ratio = src_w / src_h
+    dest_ratio = box_w / box_h
+    if im_ratio > dest_ratio:
+        return box_w, max(1, round(src_h / src_w * box_w))
+    if im_ratio < dest_ratio:
+        return max(1, round(src_w / src_h * box_h)), box_h
+    return box_w, box_h
+
+
+def open_photo(path: str, max_bytes: int = MAX_INPUT_BYTES) -> Image.Image:
+    """
+    Open a photo lazily (header only) after checking its file size.
+
+    Raises:
+        InputTooLargeError: The file is larger than ``max_bytes`` or trips
+                            Pillow's decompression-bomb limit.
+    """
+    n_bytes = os.path.getsize(path)
+    if n_bytes > max_bytes:
+        metrics.event("photo.rejected.bytes", path=path, bytes=n_bytes)
+        raise InputTooLargeError(f"{path}: {n_bytes} bytes exceeds {max_bytes}")
+    try:
+        return Image.open(path)
+    except Image.DecompressionBombError as exc:
+        metrics.event("photo.rejected.bomb", path=path)
+        raise InputTooLargeError(f"{path}: {exc}") from exc
+
+
+def _png_strips_decodable(img: Image.Image) -> bool:
+    """Whether decode_png_strips can decode ``img``: a plain 8-bit, non-interlaced PNG."""
+    return (
+        img.format == "PNG"
+        and len(img.tile) == 1
+        and img.tile[0][0] == "zip"
+        and img.tile[0][3] == img.mode
+        and img.mode in _RESAMPLABLE_MODES
+        and not img.info.get("interlace")
+    )
+
+
+def decode_png_strips(img: Image.Image, factor: int, strip_pixels: int = PNG_STRIP_PIXELS) -> Image.Image:
+    """
+    Decode a lazily opened PNG reduced by ``factor``, one strip of rows at a time.
+
+    The IDAT stream is inflated incrementally and every strip of about
+    ``strip_pixels`` pixels (a multiple of ``factor`` rows) is unfiltered by
+    Pillow's PNG decoder and reduced before the next one is read, so only
+    the reduced image and one strip are ever in memory.  The result equals
+    ``img.reduce(factor)`` of the fully decoded image.
+
+    Args:
+        img: A PNG for which _png_strips_decodable holds, not yet loaded.
+        factor: Integer reduction, as for ``Image.reduce``.
+        strip_pixels: Decoded pixels per strip.
+
+    Raises:
+        ValueError: If the PNG data is truncated or corrupt.
+    """
+    w, h = img.size
+    bands = len(img.getbands())
+    stride = w * bands
+    rows_per_strip = max(1, strip_pixels // (w * factor)) * factor
+    out = Image.new(img.mode, (-(-w // factor), -(-h // factor)))
+    inflate = zlib.decompressobj()
+    pending = bytearray()
+
+    def idat_chunks():
+        fp = img.fp
+        fp.seek(8)
+        while True:
+            header = fp.read(8)
+            if len(header) < 8:
+                raise ValueError("PNG ends before its IEND chunk")
+            length, kind = struct.unpack(">I4s", header)
+            if kind == b"IEND":
+                return
+            if kind != b"IDAT":
+                fp.seek(length + 4, os.SEEK_CUR)
+                continue
+            while length:
+                data = fp.read(min(length, 1 << 20))
+                if not data:
+                    raise ValueError("PNG ends inside an IDAT chunk")
+                length -= len(data)
+                yield data
+            fp.seek(4, os.SEEK_CUR)  # CRC
+
+    chunks = idat_chunks()
+    # Each strip is decoded on its own with the previous strip's last row in
+    # front, stored unfiltered (filter type 0), so the Up / Average / Paeth
+    # filters of its first row see the right pixels.  The first strip gets a
+    # row of zeros, which is what PNG assumes above the image.
+    previous = bytes(stride)
+    start = time.perf_counter()
+    for top in range(0, h, rows_per_strip):
+        rows = min(rows_per_strip, h - top)
+        needed = rows * (stride + 1)
+        while len(pending) < needed:
+            if inflate.unconsumed_tail:
+                data = inflate.unconsumed_tail
+            else:
+                data = next(chunks, None)
+                if data is None:
+                    raise ValueError(f"PNG data ends at row {top + len(pending) // (stride + 1)} of {h}")
+            pending += inflate.decompress(data, needed - len(pending))
+        raw = b"\x00" + previous + pending[:needed]
+        del pending[:needed]
+        strip = Image.frombytes(img.mode, (w, rows + 1), zlib.compress(raw, 0), "zip", img.mode)
+        strip = strip.crop((0, 1, w, rows + 1))
+        previous = strip.crop((0, rows - 1, w, rows)).tobytes()
+        out.paste(strip.reduce(factor), (0, top // factor))
+    metrics.observe("photo.decode_ms", (time.perf_counter() - start) * 1000)
+    out.info = dict(img.info)
+    return out
+
+
+def decode_photo(
+    img: Image.Image,
+    target: Tuple[int, int],
+    max_pixels: int = MAX_INPUT_PIXELS,
+) -> Image.Image:
+    """
+    Decode a lazily opened photo within the pixel budget.
+
+    JPEGs are drafted towards ``target`` first, so an oversized JPEG is
+    decoded at 1/2 … 1/8 scale and never materialises at full size.  An
+    8-bit PNG over the budget is decoded in strips by decode_png_strips,
+    reduced by the smallest integer factor that fits the budget (or more,
+    while both sides stay >= ``target``).  The budget is checked on the size
+    that would actually be decoded; images that are already loaded are
+    returned as-is.
+
+    Raises:
+        InputTooLargeError: The decoded size would exceed ``max_pixels``.
+    """
+    if not getattr(img, "tile", None):
+        return img  # already decoded (or created in memory)
+
+    header_size = img.size
+    if img.format == "JPEG":
+        img.draft("RGB", target)
+
+    w, h = img.size
+    if w * h > max_pixels and _png_strips_decodable(img):
+        factor = 1
+        while -(-w // factor) * -(-h // factor) > max_pixels:
+            factor += 1
+        factor = max(factor, min(w // max(1, target[0]), h // max(1, target[1])))
+        metrics.event("photo.png_strips", size=header_size, factor=factor)
+        return decode_png_strips(img, factor)
+    if w * h > max_pixels:
+        metrics.event(
+            "photo.rejected.pixels",
+            format=img.format,
+            size=header_size,
+            decoded_size=img.size,
+        )
+        raise InputTooLargeError(
+            f"{img.format} image {header_size[0]}x{header_size[1]} "
+            f"decodes to {w * h} pixels, budget is {max_pixels}"
+        )
+
+    start = time.perf_counter()
+    img.load()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    metrics.observe("photo.decode_ms", elapsed_ms)
+    if elapsed_ms > SLOW_DECODE_MS:
+        metrics.event(
+            "photo.slow_decode",
+            ms=round(elapsed_ms, 1),
+            format=img.format,
+            size=header_size,
+            decoded_size=img.size,
+        )
+    return img
+
+
+def smart_crop_box(
+    img: Image.Image,
+    aspect: Tuple[int, int],
+    thumb_size: int = 160,
+) -> Tuple[float, float, float, float]:
+    """
+    Pick the crop window with the aspect ratio of ``aspect`` that holds the most detail.
+
+    The score is edge energy measured on a ``thumb_size`` thumbnail: the edge
+    map is collapsed to a 1-D profile along the axis the window can slide on,
+    and every offset is scored with a running sum.  Ties go to the most
+    central window, so flat images fall back to a centre crop.
+
+    Args:
+        img: Image to crop (any size; only a thumbnail of it is analysed).
+        aspect: Target (width, height); only the ratio is used.
+        thumb_size: Longest side of the analysis thumbnail in pixels.
+
+    Returns:
+        tuple: (left, top, right, bottom) in ``img`` coordinates, suitable for
+               the ``box`` argument of ``Image.resize``.
+    """
+    w, h = img.size
+    ratio = aspect[0] / aspect[1]
+    if abs(w / h - ratio) < 1e-3:
+        return (0, 0, w, h)
+
+    horizontal = w / h > ratio  # too wide → slide left/right
+    crop_w, crop_h = (h * ratio, h) if horizontal else (w, w / ratio)
+
+    scale = thumb_size / max(w, h)
+    tw, th = max(1, round(w * scale)), max(1, round(h * scale))
+    thumb = img.resize((tw, th), Image.Resampling.BOX).convert("L")
+    edges = thumb.filter(ImageFilter.FIND_EDGES)
+    profile = list(
+        edges.resize((tw, 1) if horizontal else (1, th), Image.Resampling.BOX).getdata()
+    )
+
+    n = len(profile)
+    window = min(n, max(1, round((crop_w if horizontal else crop_h) * scale)))
+    centre = (n - window) / 2
+
+    running = sum(profile[:window])
+    best_key, best_offset = (running, -centre), 0
+    for offset in range(1, n - window + 1):
+        running += profile[offset + window - 1] - profile[offset - 1]
+        key = (running, -abs(offset - centre))
+        if key > best_key:
+            best_key, best_offset = key, offset
+
+    if horizontal:
+        left = min(max(best_offset / scale, 0), w - crop_w)
+        return (left, 0, left + crop_w, h)
+    top = min(max(best_offset / scale, 0), h - crop_h)
+    return (0, top, w, top + crop_h)
+
+
+def load_photo(
+    source: Union[str, Image.Image],
+    size: Tuple[int, int],
+    fit: str = "stretch",
+    resample: Image.Resampling = Image.Resampling.BICUBIC,
+    reducing_gap: Optional[float] = 2.0,
+    mode: str = "RGBA",
+) -> Image.Image:
+    """
+    Open a user photo and bring it down to a template slot as cheaply as possible.
+
+    JPEGs are decoded with ``Image.draft`` so libjpeg does the first 1/2, 1/4
+    or 1/8 reduction in the DCT domain; the remaining factor is handled by
+    ``resize(..., reducing_gap=...)`` which runs an integer ``reduce()`` pass
+    before the final filter.  The mode conversion happens last, on the small
+    image.
+
+    Args:
+        source: Path to the photo, ``"ingested:<id>"`` for a photo stored by
+                ingest.py (its ready-made variant is used), or an opened image.
+        size: Target slot size (width, height).
+        fit: 'stretch' resizes to exactly ``size`` (what the post templates
+             always did); 'contain' keeps the aspect ratio like ImageOps.contain;
+             'crop' fills ``size`` with the window chosen by smart_crop_box.
+        resample: Final resampling filter.
+        reducing_gap: Passed to ``Image.resize``; None disables the reduce pass.
+        mode: Mode of the returned image.
+
+    Returns:
+        PIL.Image.Image: The resized image in ``mode``.
+    """
+    if isinstance(source, str) and source.startswith("ingested:"):
+        # Imported here: ingest builds its variants with this function.
+        from ingest import open_variant
+
+        img = open_variant(source[len("ingested:"):], size, fit)
+    elif isinstance(source, str):
+        img = open_photo(source)
+    else:
+        img = source
+
+    if fit in ("stretch", "crop"):
+        target = size
+    elif fit == "contain":
+        target = _contain_size(img.size, size)
+    else:
+        raise ValueError("fit must be 'stretch', 'contain' or 'crop'.")
+
+    # DCT-domain downscale for JPEG (both sides stay >= target), then decode
+    # within the pixel budget.
+    img = decode_photo(img, target)
+
+    if img.mode not in _RESAMPLABLE_MODES:
+        img = img.convert("RGBA")
+
+    # The crop is picked on the drafted image and applied by resize(box=...),
+    # so the full-resolution pixels outside the window are never touched.
+    box = smart_crop_box(img, size) if fit == "crop" else None
+
+    if img.size != target or box is not None:
+        img = img.resize(
+            target, resample=resample, box=box, reducing_gap=reducing_gap
+        )
+
+    return img if img.mode == mode else img.convert(mode)
+
+
+# Ready-to-paste watermark tiles, keyed by (source digest, size, RGB colour
+# or None, opacity).  A render that watermarks with the same logo, size and
+# tint as an earlier one pastes the stored tile instead of decoding, resizing,
+# tinting and fading the logo again.
+WATERMARK_TILES = 64
+WATERMARK_SOURCES = 16
+
+_watermark_sources: Dict[str, Image.Image] = {}
+_watermark_lock = threading.Lock()
+
+
+class _WatermarkSource:
+    """A watermark's RGBA pixels with their digest; hashes and compares by the digest."""
+
+    __slots__ = ("digest", "image")
+
+    def __init__(self, digest: str, image: Image.Image):
+        self.digest = digest
+        self.image = image
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _WatermarkSource) and other.digest == self.digest
+
+
+def _watermark_source(watermark: Union[str, Image.Image]) -> _WatermarkSource:
+    """
+    Digest and RGBA pixels of a watermark file or image.
+
+    The pixels are kept for the WATERMARK_SOURCES most recent digests, so a
+    file is decoded once; callers use the returned image, which stays valid
+    after its digest has been forgotten.
+    """
+    if isinstance(watermark, str):
+        digest = "file:" + file_digest(watermark)
+        with _watermark_lock:
+            if digest in _watermark_sources:
+                return _WatermarkSource(digest, _watermark_sources[digest])
+        img = Image.open(watermark).convert("RGBA")
+    else:
+        img = watermark.convert("RGBA")
+        digest = "image:" + hashlib.sha256(img.tobytes()).hexdigest() + f":{img.size}"
+    with _watermark_lock:
+        img = _watermark_sources.setdefault(digest, img)
+        while len(_watermark_sources) > WATERMARK_SOURCES:  # forget the oldest
+            del _watermark_sources[next(iter(_watermark_sources))]
+    return _WatermarkSource(digest, img)
+
+
+@functools.lru_cache(maxsize=WATERMARK_TILES)
+def _watermark_tile(
+    source: _WatermarkSource, size: Tuple[int, int], color: Optional[Tuple[int, ...]], opacity: float
+) -> Image.Image:
+    metrics.incr("watermark.tile_miss")
+    watermark = source.image.resize(size, resample=Image.Resampling.LANCZOS)
+    if color is not None:
+        # A plain colour with the watermark's alpha channel.
+        colored_watermark = Image.new("RGBA", watermark.size, color)
+        colored_watermark.putalpha(watermark.split()[-1])
+        watermark = colored_watermark
+    if opacity < 1:
+        # Scale the alpha channel to adjust opacity.
+        alpha = ImageEnhance.Brightness(watermark.split()[-1]).enhance(opacity)
+        watermark.putalpha(alpha)
+    return watermark
+
+
+def watermark_tile(
+    watermark: Union[str, Image.Image],
+    size: Tuple[int, int],
+    color: Optional[Union[str, Tuple[int, int, int]]] = None,
+    opacity: float = 0.5,
+) -> Image.Image:
+    """
+    The watermark resized to ``size``, tinted and faded, ready to paste with itself as mask.
+
+    Tiles are cached (see WATERMARK_TILES); do not modify the returned image.
+    """
+    rgb = ImageColor.getrgb(color) if isinstance(color, str) else (tuple(color) if color is not None else None)
+    return _watermark_tile(_watermark_source(watermark), tuple(size), rgb, float(opacity))
+
+
+# Auto-placement (paste_watermark with position="corners" or "grid"): the
+# canvas is reduced once to a grayscale thumbnail about PLACEMENT_SIDE pixels
+# on its long side.  Summed-area tables of its values and squared values give
+# the mean brightness and the standard deviation ("busyness") under any
+# candidate box in four lookups each.  The quietest box that also contrasts
+# well with a black or white watermark wins.
+PLACEMENT_SIDE = 160
+WATERMARK_GRID = (4, 6)  # columns, rows of the "grid" candidates
+WATERMARK_MARGIN = 40
+
+
+def _summed_area(values: List[int], width: int, height: int) -> List[int]:
+    """(width + 1) × (height + 1) table, row-major: entry (x, y) sums values[:y, :x]."""
+    table = [0] * (width + 1)
+    above = table
+    for y in range(height):
+        row = [0]
+        row.extend(a + b for a, b in zip(above[1:], itertools.accumulate(values[y * width : (y + 1) * width])))
+        table.extend(row)
+        above = row
+    return table
+
+
+def watermark_candidates(
+    canvas_size: Tuple[int, int], size: Tuple[int, int], candidates: str = "corners", margin: int = WATERMARK_MARGIN
+) -> List[Tuple[int, int]]:
+    """
+    Top-left corners a ``size`` watermark may take on the canvas, in order of preference.
+
+    ``candidates`` is 'corners' (bottom-right, bottom-left, top-right,
+    top-left) or 'grid' (WATERMARK_GRID positions, bottom rows first).
+    """
+    left, top = margin, margin
+    right, bottom = max(margin, canvas_size[0] - size[0] - margin), max(margin, canvas_size[1] - size[1] - margin)
+    if candidates == "corners":
+        return [(right, bottom), (left, bottom), (right, top), (left, top)]
+    if candidates == "grid":
+        cols, rows = WATERMARK_GRID
+        xs = [left + (right - left) * i // max(1, cols - 1) for i in range(cols)]
+        ys = [top + (bottom - top) * j // max(1, rows - 1) for j in range(rows)]
+        return [(x, y) for y in reversed(ys) for x in reversed(xs)]
+    raise ValueError(f"Unknown watermark candidates {candidates!r}; use 'corners' or 'grid'.")
+
+
+def find_watermark_spot(
+    canvas: Image.Image,
+    size: Tuple[int, int],
+    candidates: Union[str, List[Tuple[int, int]]] = "corners",
+    brightness_threshold: int = 128,
+    margin: int = WATERMARK_MARGIN,
+) -> dict:
+    """
+    Pick where a ``size`` watermark shows best, and in which colour.
+
+    Each candidate box is scored as busyness (standard deviation of the
+    brightness, 0–128) plus half the missing contrast (128 − |mean −
+    threshold|); the lowest score wins, earlier candidates on ties.
+
+    Args:
+        canvas: The image to be watermarked.
+        size: Watermark (width, height) in canvas pixels.
+        candidates: 'corners', 'grid' (see watermark_candidates) or a list
+                    of top-left corners.
+        brightness_threshold: Above it the watermark is black, else white.
+        margin: Distance from the canvas edges for 'corners' and 'grid'.
+
+    Returns:
+        dict: {"position": (x, y), "color": (r, g, b), "brightness",
+              "busyness", "score", "candidates": number scored, "ms"}
+    """
+    start = time.perf_counter()
+    if isinstance(candidates, str):
+        candidates = watermark_candidates(canvas.size, size, candidates, margin)
+    factor = max(1, round(max(canvas.size) / PLACEMENT_SIDE))
+    small = (canvas.reduce(factor) if factor > 1 else canvas).convert("L")
+    width, height = small.size
+    values = list(small.getdata())
+    sums = _summed_area(values, width, height)
+    squares = _summed_area([v * v for v in values], width, height)
+    stride = width + 1
+
+    best = None
+    for x, y in candidates:
+        # The candidate box in thumbnail pixels (at least one pixel).
+        x0, y0 = min(x // factor, width - 1), min(y // factor, height - 1)
+        x1 = min(width, max(x0 + 1, -(-(x + size[0]) // factor)))
+        y1 = min(height, max(y0 + 1, -(-(y + size[1]) // factor)))
+        n = (x1 - x0) * (y1 - y0)
+        total = sums[y1 * stride + x1] - sums[y0 * stride + x1] - sums[y1 * stride + x0] + sums[y0 * stride + x0]
+        total2 = (
+            squares[y1 * stride + x1] - squares[y0 * stride + x1] - squares[y1 * stride + x0] + squares[y0 * stride + x0]
+        )
+        mean = total / n
+        busyness = max(0.0, total2 / n - mean * mean) ** 0.5
+        score = busyness + (128 - min(128, abs(mean - brightness_threshold))) / 2
+        if best is None or score < best["score"]:
+            best = {"position": (x, y), "brightness": mean, "busyness": busyness, "score": score}
+
+    best["color"] = (0, 0, 0) if best["brightness"] > brightness_threshold else (255, 255, 255)
+    best["candidates"] = len(candidates)
+    best["ms"] = (time.perf_counter() - start) * 1000
+    metrics.observe("watermark.place", best["ms"])
+    return best
+
+
+def paste_watermark(
+    canvas: Image.Image,
+    watermark: Union[str, Image.Image],
+    position: Union[Tuple[int, ...], str],
+    scale: float = 1.0,
+    opacity: float = 0.5,
+    color: Optional[Union[str, Tuple[int, int, int]]] = None,
+    adaptive_color: bool = False,
+    brightness_threshold: int = 128,
+) -> dict:
+    """
+    Composite a watermark onto ``canvas`` in place (RGB or RGBA), e.g. a template canvas mid-render.
+
+    Takes the same options as apply_watermark.
+
+    Returns:
+        dict: {"box": covered (left, top, right, bottom), "color": the tint
+              used or None}, plus find_watermark_spot's result under
+              "placement" when the position was chosen automatically.
+    """
+    source = _watermark_source(watermark)
+    placement = None
+    if isinstance(position, str):
+        # "corners" / "grid": the size comes from scale, the spot from the canvas.
+        orig_w, orig_h = source.image.size
+        w, h = int(orig_w * scale), int(orig_h * scale)
+        placement = find_watermark_spot(canvas, (w, h), position, brightness_threshold)
+        (x, y), color = placement["position"], color or placement["color"]
+    elif len(position) == 4:
+        # Position provided as (x, y, width, height): force resize.
+        x, y, w, h = position
+    elif len(position) == 2:
+        # Position provided as (x, y): use scale to resize watermark.
+        x, y = position
+        orig_w, orig_h = source.image.size
+        w, h = int(orig_w * scale), int(orig_h * scale)
+    else:
+        raise ValueError("position must be a tuple of length 2 or 4")
+    region_box = (x, y, x + w, y + h)
+
+    # Adaptive color: for a bright background use a dark (black) watermark, otherwise white.
+    if adaptive_color and color is None and placement is None:
+        avg_brightness = ImageStat.Stat(canvas.crop(region_box).convert("L")).mean[0]
+        color = (0, 0, 0) if avg_brightness > brightness_threshold else (255, 255, 255)
+
+    rgb = ImageColor.getrgb(color) if isinstance(color, str) else (tuple(color) if color is not None else None)
+    tile = _watermark_tile(source, (w, h), rgb, float(opacity))
+    canvas.paste(tile, (x, y), mask=tile)
+    result = {"box": region_box, "color": rgb}
+    if placement is not None:
+        result["placement"] = placement
+    return result
+
 
 def apply_watermark(
     base_img: Union[str, Image.Image],
     watermark: Union[str, Image.Image],
-    position: Tuple[int, ...],
+    position: Union[Tuple[int, ...], str],
     scale: float = 1.0,
     opacity: float = 0.5,
     color: Optional[Union[str, Tuple[int, int, int]]] = None,
@@ -21,6 +593,8 @@ def apply_watermark(
         watermark: A PIL.Image object or a file path to the watermark PNG (white logo with transparency).
         position: If a 2-tuple (x, y), then the watermark is placed at that coordinate
                   (and resized by 'scale'). If a 4-tuple (x, y, width, height), the watermark is resized to fill that box.
+                  'corners' or 'grid' picks the quietest, best-contrasting spot among those
+                  candidates (see find_watermark_spot) and, without 'color', tints to match.
         scale: A coefficient to resize the watermark when position is a 2-tuple (default 1.0).
         opacity: A float between 0 (transparent) and 1 (fully opaque) (default 0.5).
         color: Optional new color for the watermark (e.g., "red" or (255, 0, 0)).
@@ -29,81 +603,18 @@ def apply_watermark(
         adaptive_color: If True, analyze the area under the watermark and adjust its color:
                         for a bright background, a dark (e.g., black) watermark is used, and vice versa.
         brightness_threshold: The brightness level (0–255) used to decide which color to choose in adaptive mode.
-    
+
     Returns:
-        A new PIL.Image object with the watermark applied.
+        A new RGBA PIL.Image object with the watermark applied (see
+        paste_watermark to draw onto an existing canvas without the copy).
     """
-    # Determine the appropriate resampling filter.
-    try:
-        resample_method = Image.Resampling.LANCZOS
-    except AttributeError:
-        resample_method = Image.ANTIALIAS
-
-    # Load base image if a path is provided, and ensure it's in RGBA mode.
+    # Load base image if a path is provided; convert() also makes the copy we draw on.
     if isinstance(base_img, str):
-        base_img = Image.open(base_img).convert("RGBA")
-    else:
-        base_img = base_img.convert("RGBA")
-    
-    # Load watermark image if a path is provided, and ensure it's in RGBA mode.
-    if isinstance(watermark, str):
-        watermark = Image.open(watermark).convert("RGBA")
-    else:
-        watermark = watermark.convert("RGBA")
-    
-    # Determine the watermark size and position.
-    if len(position) == 4:
-        # Position provided as (x, y, width, height): force resize.
-        x, y, w, h = position
-        watermark = watermark.resize((w, h), resample=resample_method)
-        pos = (x, y)
-        region_box = (x, y, x + w, y + h)
-    elif len(position) == 2:
-        # Position provided as (x, y): use scale to resize watermark.
-        x, y = position
-        orig_w, orig_h = watermark.size
-        new_w = int(orig_w * scale)
-        new_h = int(orig_h * scale)
-        watermark = watermark.resize((new_w, new_h), resample=resample_method)
-        pos = (x, y)
-        region_box = (x, y, x + new_w, y + new_h)
-    else:
-        raise ValueError("position must be a tuple of length 2 or 4")
-    
-    # Adaptive color: analyze the underlying area in the base image.
-    if adaptive_color:
-        # Crop the region where the watermark will be placed.
-        region = base_img.crop(region_box)
-        # Convert to grayscale to analyze brightness.
-        gray = region.convert("L")
-        stat = ImageStat.Stat(gray)
-        avg_brightness = stat.mean[0]
-        # Choose a contrasting tint:
-        # For a bright background use a dark (black) watermark, otherwise white.
-        adaptive_tint = (0, 0, 0) if avg_brightness > brightness_threshold else (255, 255, 255)
-        if color is None:
-            color = adaptive_tint
-
-    # If a color is provided (or chosen adaptively), tint the watermark.
-    if color is not None:
-        # Create a new image filled with the desired color and use the watermark's alpha channel.
-        colored_watermark = Image.new("RGBA", watermark.size, color)
-        # Extract the original alpha channel.
-        alpha = watermark.split()[-1]
-        colored_watermark.putalpha(alpha)
-        watermark = colored_watermark
-
-    # Adjust the watermark opacity.
-    if opacity < 1:
-        alpha = watermark.split()[-1]
-        # Enhance the brightness of the alpha channel to adjust opacity.
-        alpha = ImageEnhance.Brightness(alpha).enhance(opacity)
-        watermark.putalpha(alpha)
-    
-    # Paste the watermark onto a copy of the base image.
-    result = base_img.copy()
-    result.paste(watermark, pos, mask=watermark)
-    
+        base_img = Image.open(base_img)
+    result = base_img.convert("RGBA") if base_img.mode != "RGBA" else base_img.copy()
+    paste_watermark(
+        result, watermark, position, scale, opacity, color, adaptive_color, brightness_threshold
+    )
     return result
 
 # Example usage of the apply_watermark function.
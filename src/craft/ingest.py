@@ -0,0 +1,202 @@
+# ingest.py
+#
+# One-time normalisation of uploaded photos.  Each upload is hashed, stored
+# once under INGEST_DIR/<id>/ and turned into slot-ready variants, so renders
+# can reference "ingested:<id>" instead of re-decoding the raw upload.
+#
+#   python src/craft/ingest.py UserImages/img.png
+#   python src/craft/ingest.py --slots post screenshot_box photo1.jpg photo2.jpg
+
+import argparse
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from PIL import Image, ImageOps
+
+import metrics
+from config import INGEST_DIR, MAX_INPUT_BYTES
+from fs_util import atomic_write
+from img_util import InputTooLargeError, decode_photo, load_photo, open_photo
+
+
+INGESTED_PREFIX = "ingested:"
+
+# Template slots that get a variant at ingest time: name -> (size, fit).
+SLOTS: Dict[str, Tuple[Tuple[int, int], str]] = {
+    "post": ((16 * 58, 9 * 58), "stretch"),  # Post2.0, Live, BreakingNews, report
+    "post_crop": ((16 * 58, 9 * 58), "crop"),
+    "screenshot_box": ((878, 551), "contain"),  # white box in sc.py
+}
+
+_MANIFEST = "manifest.json"
+_ORIGINAL = "original"
+
+
+def register_slot(name: str, size: Tuple[int, int], fit: str = "stretch") -> None:
+    """Register a template slot so that future ingests produce a variant for it."""
+    SLOTS[name] = (tuple(size), fit)
+
+
+def variant_name(size: Tuple[int, int], fit: str) -> str:
+    """File name of the variant for a (size, fit) request, e.g. 'stretch_928x522.png'."""
+    return f"{fit}_{size[0]}x{size[1]}.png"
+
+
+def _save_variant(img: Image.Image, path: str) -> None:
+    buf = io.BytesIO()
+    # Variants are read on every render; favour fast encode/decode over size.
+    img.save(buf, format="PNG", compress_level=1)
+    atomic_write(path, buf.getvalue())
+
+
+def _normalise(img: Image.Image) -> Image.Image:
+    """Apply the EXIF orientation and settle on RGB, or RGBA when there is alpha."""
+    img = ImageOps.exif_transpose(img)
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    return img.convert("RGBA" if has_alpha else "RGB")
+
+
+def _open_original(image_dir: str, max_side: int) -> Image.Image:
+    img = open_photo(os.path.join(image_dir, _ORIGINAL))
+    # Draft to the largest slot in either orientation; exif_transpose may
+    # still rotate the picture afterwards.
+    return _normalise(decode_photo(img, (max_side, max_side)))
+
+
+def _image_dir(image_id: str, store_dir: str) -> str:
+    if not image_id or not all(c in "0123456789abcdef" for c in image_id):
+        raise ValueError(f"Invalid ingested image id: {image_id!r}")
+    return os.path.join(store_dir, image_id)
+
+
+def _read_manifest(image_dir: str) -> dict:
+    try:
+        with open(os.path.join(image_dir, _MANIFEST), encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def ingest_image(
+    source: Union[str, bytes],
+    slots: Optional[Iterable[str]] = None,
+    store_dir: str = INGEST_DIR,
+) -> str:
+    """
+    Ingest one uploaded photo and return its content-addressed id.
+
+    Identical uploads map to the same id; variants that already exist are
+    not regenerated.
+
+    Args:
+        source: Path to the uploaded file, or its raw bytes.
+        slots: Names from SLOTS to produce variants for (default: all).
+        store_dir: Root of the ingest store.
+
+    Returns:
+        str: Image id; pass ``"ingested:<id>"`` as a template's user image path.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as fh:
+            data = fh.read()
+    else:
+        data = bytes(source)
+    if len(data) > MAX_INPUT_BYTES:
+        metrics.event("photo.rejected.bytes", bytes=len(data))
+        raise InputTooLargeError(f"{len(data)} bytes exceeds {MAX_INPUT_BYTES}")
+
+    image_id = hashlib.sha256(data).hexdigest()
+    image_dir = _image_dir(image_id, store_dir)
+    os.makedirs(image_dir, exist_ok=True)
+
+    original = os.path.join(image_dir, _ORIGINAL)
+    if not os.path.exists(original):
+        atomic_write(original, data)
+
+    manifest = _read_manifest(image_dir)
+    variants = manifest.get("variants", {})
+    wanted = {
+        name: SLOTS[name]
+        for name in (SLOTS if slots is None else slots)
+        if not os.path.exists(os.path.join(image_dir, variant_name(*SLOTS[name])))
+    }
+
+    if wanted:
+        max_side = max(max(size) for size, _ in wanted.values())
+        img = _open_original(image_dir, max_side)
+        manifest.setdefault("source_size", list(img.size))
+        manifest.setdefault("mode", img.mode)
+        for name, (size, fit) in wanted.items():
+            variant = load_photo(
+                img, size, fit=fit, resample=Image.Resampling.LANCZOS, mode=img.mode
+            )
+            file_name = variant_name(size, fit)
+            _save_variant(variant, os.path.join(image_dir, file_name))
+            variants[name] = {"file": file_name, "size": list(variant.size), "fit": fit}
+
+        manifest.update(id=image_id, variants=variants)
+        atomic_write(
+            os.path.join(image_dir, _MANIFEST),
+            json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+        )
+
+    return image_id
+
+
+def open_variant(
+    image_id: str,
+    size: Tuple[int, int],
+    fit: str = "stretch",
+    store_dir: str = INGEST_DIR,
+) -> Image.Image:
+    """
+    Open the slot-ready variant of an ingested image.
+
+    Sizes nobody registered are produced from the stored original on first
+    use and kept next to the other variants.
+    """
+    image_dir = _image_dir(image_id, store_dir)
+    path = os.path.join(image_dir, variant_name(size, fit))
+    if os.path.exists(path):
+        return Image.open(path)
+
+    if not os.path.exists(os.path.join(image_dir, _ORIGINAL)):
+        raise FileNotFoundError(f"No ingested image with id {image_id}")
+
+    img = _open_original(image_dir, max(size))
+    variant = load_photo(
+        img, size, fit=fit, resample=Image.Resampling.LANCZOS, mode=img.mode
+    )
+    _save_variant(variant, path)
+    return variant
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Normalise uploaded photos once and store slot-ready variants."
+    )
+    parser.add_argument("paths", nargs="*", help="Uploaded image files.")
+    parser.add_argument(
+        "--slots",
+        nargs="+",
+        choices=sorted(SLOTS),
+        default=None,
+        help="Slots to produce variants for (default: all).",
+    )
+    parser.add_argument(
+        "--store_dir", type=str, default=INGEST_DIR, help="Ingest store root."
+    )
+    parser.add_argument(
+        "--list_slots", action="store_true", help="Print the registered slots and exit."
+    )
+    args = parser.parse_args()
+
+    if args.list_slots:
+        for name, ((w, h), fit) in SLOTS.items():
+            print(f"{name}: {w}x{h} ({fit})")
+    else:
+        for path in args.paths:
+            print(f"{path} -> {INGESTED_PREFIX}{ingest_image(path, args.slots, args.store_dir)}")
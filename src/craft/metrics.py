@@ -0,0 +1,61 @@
+# metrics.py
+#
+# Minimal in-process metrics for the render pipeline: counters and timing
+# summaries, safe to update from several threads.  When config.METRICS_LOG is
+# set, every event is also appended to that file as one JSON line so that
+# short-lived render processes still leave a trace.
+
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Dict
+
+from config import METRICS_LOG
+
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_timings: Dict[str, Dict[str, float]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Add ``value`` to counter ``name``."""
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, ms: float) -> None:
+    """Record one duration (milliseconds) under ``name``."""
+    with _lock:
+        t = _timings.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        t["count"] += 1
+        t["total_ms"] += ms
+        t["max_ms"] = max(t["max_ms"], ms)
+
+
+def event(name: str, **fields) -> None:
+    """Count an event and, if METRICS_LOG is configured, log it with ``fields``."""
+    incr(name)
+    if not METRICS_LOG:
+        return
+    record = {"ts": round(time.time(), 3), "event": name, **fields}
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with _lock:
+        with open(METRICS_LOG, "a", encoding="utf-8") as fh:
+            fh.write(line)
+
+
+def snapshot() -> dict:
+    """Return a copy of all counters and timing summaries."""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "timings": {k: dict(v) for k, v in _timings.items()},
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,108 @@
+# number_util.py
+#
+# Price parsing and Farsi formatting for the card templates, shared by
+# text_utils (normalise_number, farsi_fmt) and the car scripts.
+#
+# Values are processed as a batch: they are joined into one string, mapped
+# through str.translate tables and one compiled regex in a single pass, and
+# split again, instead of running a regex, a dict lookup per character and a
+# float parse for every value separately.  Invalid values are collected and
+# reported together, so a user pasting a price block learns about every bad
+# line at once.
+
+import re
+from typing import Iterable, List, Sequence, Tuple, Union
+
+# Persian and Arabic-Indic digits -> Latin; the Arabic decimal separator
+# "٫" (U+066B) -> ".".
+TO_LATIN = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩٫", "01234567890123456789.")
+# Latin digits -> Persian (also used by date_util and text_utils).
+FARSI_DIGITS = str.maketrans("0123456789", "۰۱۲۳۴۵۶۷۸۹")
+# The same plus "," -> the grouping mark the cards print.
+THOUSANDS_SEP = "٫"
+TO_FARSI = {**FARSI_DIGITS, ord(","): THOUSANDS_SEP}
+
+# Everything that is not part of a number (thousands separators, spaces,
+# currency words, RTL marks …).  "\n" separates the values of a batch.
+_NOISE = re.compile(r"[^0-9.\n]+")
+_INTEGER_NOISE = re.compile(r"[^0-9\n]+")
+
+
+class InvalidNumberError(ValueError):
+    """Raised with every value of a batch that is not a number."""
+
+    def __init__(self, errors: List[Tuple[int, str]], what: str = "value"):
+        self.errors = errors
+        lines = "; ".join(f"{what} {i + 1}: {raw!r}" for i, raw in errors)
+        super().__init__(f"{len(errors)} invalid {what}(s): {lines}")
+
+
+def _clean(values: Sequence[str], decimal: bool) -> List[str]:
+    """Translate digits and strip noise from every value in one pass."""
+    noise = _NOISE if decimal else _INTEGER_NOISE
+    joined = "\n".join(values)
+    cleaned = noise.sub("", joined.translate(TO_LATIN)).split("\n")
+    if len(cleaned) != len(values):  # a value contained a newline itself
+        cleaned = [noise.sub("", v.translate(TO_LATIN).replace("\n", "")) for v in values]
+    return cleaned
+
+
+def normalise_numbers(
+    values: Iterable[Union[int, str]], decimal: bool = True, what: str = "value"
+) -> List[int]:
+    """
+    Parse prices typed with Persian, Arabic or Latin digits and any separators.
+
+    Args:
+        values: Strings (ints are passed through).
+        decimal: Treat a single "." / "٫" as a decimal point (the fraction
+                 is dropped); several of them are thousands separators.  With
+                 False every dot is a separator (the car price blocks).
+        what: Name of a value in error messages ('value', 'line' …).
+
+    Raises:
+        InvalidNumberError: Listing every value that holds no number.
+    """
+    values = list(values)
+    strings = [v for v in values if not isinstance(v, int)]
+    cleaned = iter(_clean(strings, decimal))
+    numbers, errors = [], []
+    for i, value in enumerate(values):
+        if isinstance(value, int):
+            numbers.append(value)
+            continue
+        s = next(cleaned)
+        if s.count(".") > 1:  # they were thousands separators
+            s = s.replace(".", "")
+        try:
+            numbers.append(int(s) if "." not in s else int(float(s)))
+        except ValueError:
+            errors.append((i, value))
+    if errors:
+        raise InvalidNumberError(errors, what)
+    return numbers
+
+
+def parse_number_lines(block: str, expected_count: int) -> List[int]:
+    """
+    Parse a newline-separated block of integers (blank lines ignored).
+
+    Raises:
+        InvalidNumberError: Listing every line without digits.
+        ValueError: If the block does not hold ``expected_count`` numbers.
+    """
+    lines = [line for line in block.strip().splitlines() if line.strip()]
+    if len(lines) != expected_count:
+        raise ValueError(
+            f"Expected {expected_count} numbers, got {len(lines)} "
+            "(check line-breaks)."
+        )
+    return normalise_numbers(lines, decimal=False, what="line")
+
+
+def farsi_fmt_many(values: Iterable[Union[int, str]]) -> List[str]:
+    """Group and convert many prices to Farsi digits, e.g. ۸٫۵۶۸٫۰۷۴ (see farsi_fmt)."""
+    numbers = normalise_numbers(values)
+    if not numbers:
+        return []
+    return "\n".join(f"{n:,}" for n in numbers).translate(TO_FARSI).split("\n")
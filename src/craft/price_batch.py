@@ -0,0 +1,253 @@
+# price_batch.py
+#
+# Render every price card of a refresh (or of many dated snapshots) from one
+# feed file, in one process or a small worker pool, instead of starting one
+# Python process per card script.  Templates, fonts and glyphs are loaded
+# once per process, and all cards of a snapshot share one DateContext, so the
+# date strip is formatted once.
+#
+# Feed formats
+#   JSON  {"date": "2025-03-20", "cards": [{"card": "gold", "values": {"Gold": "6800000", ...}}, ...]}
+#         {"snapshots": [{"date": "...", "cards": [...]}, ...]}
+#         [{"card": "...", "values": {...}}, ...]
+#         A card may set its own "date" and "output" (file name without extension).
+#         A list value (e.g. car1's prices_block) is joined with newlines.
+#   CSV   header card,field,value[,date]; one row per value.  Rows of the same
+#         card and date form one card; a repeated field (car prices_block) is
+#         joined with newlines in row order.
+#
+# "date" is an ISO date or datetime (naive = Tehran time); without one the
+# cards print today's date.
+#
+# Run from the repository root:
+#   python src/craft/price_batch.py prices.json --out_dir OutPut/prices --workers 4
+
+import argparse
+import csv
+import functools
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import metrics
+from config import DEFAULT_PROFILE
+from date_util import DateContext
+from encoders import EXTENSIONS, PROFILES, profile_settings
+from table_card import CARD_SPECS
+from templates import get_renderer, render
+
+SUMMARY_FILE = "summary.json"
+
+# Snapshot dates whose DateContext a process keeps (see _date_context).
+DATE_CONTEXTS = 32
+
+
+def _card_job(card: str, values: dict, date: Optional[str], output: Optional[str]) -> dict:
+    # A feed entry that cannot be rendered becomes a job carrying its "error",
+    # which render_job reports in that card's row.
+    job = {"card": card if isinstance(card, str) else repr(card), "params": {}, "date": None, "output": None}
+    if card is None:
+        job["error"] = "feed entry has no 'card'"
+    elif not isinstance(card, str) or card not in CARD_SPECS:
+        job["error"] = f"Unknown price card {card!r}; known: {', '.join(CARD_SPECS)}"
+    elif not isinstance(values, dict):
+        job["error"] = "'values' must be an object"
+    elif not isinstance(date, (str, type(None))) or not isinstance(output, (str, type(None))):
+        job["error"] = "'date' and 'output' must be strings"
+    else:
+        params = {k: "\n".join(map(str, v)) if isinstance(v, list) else v for k, v in values.items()}
+        job.update(params=params, date=date, output=output)
+    return job
+
+
+def parse_feed(text: str, fmt: str = "json") -> List[dict]:
+    """
+    Turn the text of a JSON or CSV feed (see the module comment) into render jobs.
+
+    Args:
+        text: Feed contents.
+        fmt: 'json' or 'csv'.
+
+    Returns:
+        list: One job per card; an entry that names an unknown card or is
+        malformed gives a job with an "error" (see render_job) instead of
+        failing the whole feed.
+
+    Raises:
+        ValueError: If the feed as a whole is malformed.
+    """
+    if fmt == "csv":
+        groups: Dict[tuple, dict] = {}
+        reader = csv.DictReader(io.StringIO(text))
+        if not {"card", "field", "value"} <= set(reader.fieldnames or ()):
+            raise ValueError("CSV feed needs the columns card, field and value.")
+        for row in reader:
+            key = (row.get("date") or None, row["card"])
+            values = groups.setdefault(key, {})
+            field, value = row["field"], row["value"]
+            values[field] = values[field] + "\n" + value if field in values else value
+        return [_card_job(card, values, date, None) for (date, card), values in groups.items()]
+    if fmt != "json":
+        raise ValueError(f"Unknown feed format {fmt!r}; use 'json' or 'csv'.")
+
+    feed = json.loads(text)
+    if isinstance(feed, list):
+        feed = {"cards": feed}
+    if not isinstance(feed, dict):
+        raise ValueError("JSON feed must be an object or a list of cards.")
+    snapshots = feed.get("snapshots", [feed])
+    jobs = []
+    for snapshot in snapshots:
+        for entry in snapshot.get("cards", []):
+            if not isinstance(entry, dict):
+                jobs.append(_card_job(None, {}, None, None))
+                continue
+            jobs.append(
+                _card_job(
+                    entry.get("card"),
+                    entry.get("values", {}),
+                    entry.get("date", snapshot.get("date")),
+                    entry.get("output"),
+                )
+            )
+    return jobs
+
+
+def load_feed(path: str) -> List[dict]:
+    """
+    Read a JSON or CSV feed file (by extension) into render jobs.
+
+    Raises:
+        ValueError: If the feed as a whole is malformed (see parse_feed).
+    """
+    with open(path, newline="", encoding="utf-8") as fh:
+        return parse_feed(fh.read(), "csv" if path.lower().endswith(".csv") else "json")
+
+
+def _output_path(job: dict, out_dir: str, extension: str) -> str:
+    name = job["output"] or job["card"] + ("_" + job["date"].replace(":", "") if job["date"] else "")
+    return os.path.join(out_dir, name + extension)
+
+
+@functools.lru_cache(maxsize=DATE_CONTEXTS)
+def _date_context(date: Optional[str]) -> DateContext:
+    # One context per snapshot and process: the date strip is formatted once.
+    # Bounded, as the scheduler sees a new snapshot date on every poll.
+    return DateContext(datetime.fromisoformat(date) if date else None)
+
+
+def render_job(job: dict, out_dir: str, profile: str, dates: Optional[DateContext] = None) -> dict:
+    """
+    Render one feed card; returns its summary row (errors are reported, not raised).
+
+    ``dates`` is used for a card without a date of its own (default: one
+    context per process, i.e. the time of the first such card).
+    """
+    if "error" in job:
+        return {"card": job["card"], "date": job["date"], "path": None, "error": job["error"], "ms": 0.0}
+    extension = EXTENSIONS[profile_settings(profile, "card")["format"]]
+    path = _output_path(job, out_dir, extension)
+    row = {"card": job["card"], "date": job["date"], "path": path}
+    start = time.perf_counter()
+    try:
+        if job["date"] is None and dates is not None:
+            params = dict(job["params"], dates=dates)
+        else:
+            params = dict(job["params"], dates=_date_context(job["date"]))
+        result = render(job["card"], params, output_path=path, profile=profile)
+    except Exception as exc:  # report and carry on with the other cards
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    else:
+        row["bytes"] = result["bytes"]
+        row["reused"] = bool(result.get("unchanged") or result.get("cached"))
+        if not row["reused"]:
+            row["cells"] = [result["cells_redrawn"], result["cells_total"]]
+    row["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return row
+
+
+def _warm_worker() -> None:
+    # Import every card script before the first job arrives.
+    for name in CARD_SPECS:
+        get_renderer(name)
+
+
+def _render_chunk(args) -> List[dict]:
+    jobs, out_dir, profile = args
+    return [render_job(job, out_dir, profile) for job in jobs]
+
+
+def run_batch(
+    jobs: List[dict],
+    out_dir: str,
+    profile: str = DEFAULT_PROFILE,
+    workers: int = 1,
+) -> dict:
+    """
+    Render ``jobs`` into ``out_dir`` and write ``summary.json`` there.
+
+    With ``workers`` > 1 the jobs are split by snapshot date across a process
+    pool, so each worker formats a date strip once.
+
+    Returns:
+        dict: {"cards": [summary rows in feed order], "wall_ms", "render_ms",
+              "errors", "workers", "profile"}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    if workers > 1 and len(jobs) > 1:
+        by_date: Dict[Optional[str], List[int]] = {}
+        for i, job in enumerate(jobs):
+            by_date.setdefault(job["date"], []).append(i)
+        chunks = [[] for _ in range(min(workers, len(jobs)))]
+        for indices in sorted(by_date.values(), key=len, reverse=True):
+            min(chunks, key=len).extend(indices)
+        with ProcessPoolExecutor(max_workers=len(chunks), initializer=_warm_worker) as pool:
+            results = pool.map(
+                _render_chunk,
+                [([jobs[i] for i in chunk], out_dir, profile) for chunk in chunks],
+            )
+            rows: List[Optional[dict]] = [None] * len(jobs)
+            for chunk, chunk_rows in zip(chunks, results):
+                for i, row in zip(chunk, chunk_rows):
+                    rows[i] = row
+    else:
+        rows = [render_job(job, out_dir, profile) for job in jobs]
+
+    summary = {
+        "cards": rows,
+        "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+        "render_ms": round(sum(row["ms"] for row in rows), 1),
+        "errors": sum("error" in row for row in rows),
+        "workers": max(1, workers),
+        "profile": profile,
+    }
+    with open(os.path.join(out_dir, SUMMARY_FILE), "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, ensure_ascii=False, indent=2)
+    metrics.observe("price_batch.wall", summary["wall_ms"])
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render all price cards from one feed file.")
+    parser.add_argument("feed", type=str, help="JSON or CSV feed.")
+    parser.add_argument("--out_dir", type=str, required=True, help="Directory for the cards and summary.json.")
+    parser.add_argument("--profile", type=str, default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (1: render in this process).")
+    args = parser.parse_args()
+
+    summary = run_batch(load_feed(args.feed), args.out_dir, args.profile, args.workers)
+    for row in summary["cards"]:
+        status = row.get("error") or ("reused" if row.get("reused") else f"{row['bytes'] / 1024:.1f} KiB")
+        print(f"{row['card']:<10}{row['date'] or '':<22}{row['ms']:>9.1f} ms  {status}")
+    print(
+        f"{len(summary['cards'])} cards, {summary['errors']} errors, "
+        f"{summary['wall_ms']:.0f} ms wall ({summary['render_ms']:.0f} ms rendering, "
+        f"{summary['workers']} worker(s))"
+    )
+    if summary["errors"]:
+        raise SystemExit(1)
@@ -0,0 +1,254 @@
+# price_feeds.py
+#
+# Concurrent ingestion of many price endpoints.  Every source is fetched at
+# once over one pooled httpx.AsyncClient, whose connections are kept alive
+# between polls.  Each source remembers the ETag and Last-Modified of its last
+# response and sends them back (If-None-Match / If-Modified-Since).  A source
+# that answers 304 Not Modified costs a round trip but no body and no parsing,
+# and its last values are reused.
+#
+# Sources file (config.PRICE_SOURCES_FILE), a JSON list:
+#   [{"name": "gold", "url": "http://127.0.0.1:8765/gold.json", "card": "gold"},
+#    {"name": "market", "url": "http://127.0.0.1:8765/market.csv",
+#     "timeout": 3, "retries": 1}]
+#   name      label in reports (default: the URL)
+#   url       http(s) endpoint
+#   card      the body is one card's values {"Gold": "۶٫۸۰۰٫۰۰۰", ...};
+#             without it the body is a price_batch feed (JSON or CSV)
+#   format    'json' or 'csv' (default: from the URL or Content-Type)
+#   timeout   seconds per attempt (default FEED_TIMEOUT)
+#   retries   extra attempts after a timeout, connection error, 429 or 5xx
+#             (default FEED_RETRIES); other 4xx fail at once
+#
+# Values are normalised with number_util before they reach the renderers:
+# a price becomes an int, and a multi-line block (car prices_block) becomes
+# Latin digits, one per line.  A source with invalid values is reported as
+# failed with every bad value listed, and its previous values are kept.
+#
+# Test against the local stand-in, which serves a directory of feed files
+# with ETag/Last-Modified support:
+#   python src/craft/price_scheduler.py stand-in feeds/ --port 8765
+#
+# Run from the repository root:
+#   python src/craft/price_feeds.py --sources price_sources.json [--repeat 3]
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+import metrics
+from config import FEED_MAX_CONNECTIONS, FEED_RETRIES, FEED_RETRY_BACKOFF, FEED_TIMEOUT, PRICE_SOURCES_FILE
+from number_util import InvalidNumberError, normalise_numbers
+from price_batch import _card_job, parse_feed
+
+_SOURCE_KEYS = {"name", "url", "card", "format", "timeout", "retries"}
+
+
+def load_sources(path: str = PRICE_SOURCES_FILE) -> List[dict]:
+    """
+    Read a sources file (see the module comment), with defaults applied.
+
+    Raises:
+        ValueError: If a source has no url or an unknown key.
+    """
+    with open(path, encoding="utf-8") as fh:
+        return [make_source(entry) for entry in json.load(fh)]
+
+
+def make_source(entry: dict) -> dict:
+    """
+    One source with defaults applied, e.g. make_source({"url": "http://..."}).
+
+    Raises:
+        ValueError: If the source has no url or an unknown key.
+    """
+    unknown = set(entry) - _SOURCE_KEYS
+    if unknown or "url" not in entry:
+        raise ValueError(f"Bad price source {entry!r}: needs 'url', allows {', '.join(sorted(_SOURCE_KEYS))}.")
+    return {
+        "name": entry.get("name", entry["url"]),
+        "url": entry["url"],
+        "card": entry.get("card"),
+        "format": entry.get("format"),
+        "timeout": float(entry.get("timeout", FEED_TIMEOUT)),
+        "retries": int(entry.get("retries", FEED_RETRIES)),
+    }
+
+
+def normalise_job(job: dict) -> dict:
+    """
+    Normalise the values of one render job (see the module comment).
+
+    Raises:
+        InvalidNumberError: Listing every invalid value of the job.
+    """
+    fields = list(job["params"])
+    singles = [f for f in fields if "\n" not in str(job["params"][f])]
+    blocks = [f for f in fields if f not in singles]
+    errors = []
+    params = {}
+    try:
+        params.update(zip(singles, normalise_numbers(job["params"][f] for f in singles)))
+    except InvalidNumberError as exc:
+        errors += [(fields.index(singles[i]), f"{singles[i]}={raw}") for i, raw in exc.errors]
+    for field in blocks:
+        lines = [line for line in job["params"][field].splitlines() if line.strip()]
+        try:
+            params[field] = "\n".join(map(str, normalise_numbers(lines, decimal=False)))
+        except InvalidNumberError as exc:
+            errors += [(fields.index(field), f"{field} line {i + 1}={raw}") for i, raw in exc.errors]
+    if errors:
+        raise InvalidNumberError(sorted(errors), f"{job['card']} value")
+    return dict(job, params={f: params[f] for f in fields})
+
+
+def _parse(source: dict, response: httpx.Response) -> List[dict]:
+    if source["card"]:
+        values = response.json()
+        if not isinstance(values, dict):
+            raise ValueError(f"{source['name']}: expected an object of {source['card']} values.")
+        return [_card_job(source["card"], values, None, None)]
+    fmt = source["format"]
+    if fmt is None:
+        csv_feed = source["url"].lower().endswith(".csv") or "csv" in response.headers.get("content-type", "")
+        fmt = "csv" if csv_feed else "json"
+    return parse_feed(response.text, fmt)
+
+
+class FeedIngestor:
+    """
+    Fetch ``sources`` (see load_sources) concurrently and keep their latest values.
+
+    ``poll()`` is a coroutine; ``poll_sync()`` runs it on the ingestor's own
+    event loop, so synchronous callers (price_scheduler) keep one client and
+    its pooled connections across polls.
+    """
+
+    def __init__(self, sources: List[dict], max_connections: int = FEED_MAX_CONNECTIONS):
+        self.sources = sources
+        self.max_connections = max_connections
+        # name -> {"etag", "last_modified", "jobs"}
+        self.state: Dict[str, dict] = {s["name"]: {"etag": None, "last_modified": None, "jobs": []} for s in sources}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections, max_keepalive_connections=self.max_connections
+            )
+            self._client = httpx.AsyncClient(limits=limits)
+        return self._client
+
+    async def _request(self, source: dict, headers: Dict[str, str], row: dict) -> httpx.Response:
+        """GET ``source`` within its retry budget, counting attempts in ``row``."""
+        client = self._get_client()
+        attempt = 0
+        while True:
+            attempt = row["attempts"] = attempt + 1
+            try:
+                response = await client.get(source["url"], headers=headers, timeout=source["timeout"])
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+                error: Exception = httpx.HTTPStatusError(
+                    f"{response.status_code} from {source['url']}", request=response.request, response=response
+                )
+            except httpx.TransportError as exc:  # timeouts, refused and dropped connections
+                error = exc
+            if attempt > source["retries"]:
+                raise error
+            metrics.incr("price_feeds.retries")
+            await asyncio.sleep(FEED_RETRY_BACKOFF * 2 ** (attempt - 1))
+
+    async def fetch(self, source: dict) -> dict:
+        """
+        Fetch one source, update its state and return its report row.
+
+        Returns:
+            dict: {"name", "status": 'updated' | 'not_modified' | 'failed',
+                  "attempts", "ms", "cards", and "error" when failed}
+        """
+        state = self.state[source["name"]]
+        headers = {}
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+        row = {"name": source["name"], "attempts": 0}
+        start = time.perf_counter()
+        try:
+            response = await self._request(source, headers, row)
+            if response.status_code == 304:
+                row["status"] = "not_modified"
+            else:
+                response.raise_for_status()
+                state["jobs"] = [normalise_job(job) for job in _parse(source, response)]
+                state["etag"] = response.headers.get("etag")
+                state["last_modified"] = response.headers.get("last-modified")
+                row["status"] = "updated"
+        except (httpx.HTTPError, KeyError, ValueError) as exc:  # keep the previous values
+            row["status"] = "failed"
+            detail = str(exc).splitlines()[0] if str(exc) else f"after {source['timeout']:g} s"
+            row["error"] = f"{type(exc).__name__}: {detail}"
+            metrics.event("price_feeds.fetch_failed", source=source["name"], error=row["error"])
+        row["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        row["cards"] = len(state["jobs"])
+        metrics.incr(f"price_feeds.{row['status']}")
+        metrics.observe("price_feeds.fetch", row["ms"])
+        return row
+
+    async def poll(self) -> Tuple[List[dict], List[dict]]:
+        """
+        Fetch every source once, concurrently.
+
+        Returns:
+            tuple: (render jobs of all sources in source order, with the last
+                   good values of sources that failed; one report row per
+                   source)
+        """
+        rows = await asyncio.gather(*(self.fetch(source) for source in self.sources))
+        jobs = [job for source in self.sources for job in self.state[source["name"]]["jobs"]]
+        return jobs, list(rows)
+
+    def poll_sync(self) -> Tuple[List[dict], List[dict]]:
+        """Blocking poll() on the ingestor's own event loop."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.poll())
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def close(self) -> None:
+        """Close the client and the event loop of poll_sync()."""
+        if self._loop is not None:
+            self._loop.run_until_complete(self.aclose())
+            self._loop.close()
+            self._loop = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch every price source once (or a few times) and report.")
+    parser.add_argument("--sources", type=str, default=PRICE_SOURCES_FILE)
+    parser.add_argument("--repeat", type=int, default=1, help="Polls to run, to watch conditional requests.")
+    parser.add_argument("--show", action="store_true", help="Print the normalised render jobs.")
+    args = parser.parse_args()
+
+    ingestor = FeedIngestor(load_sources(args.sources))
+    try:
+        for poll in range(args.repeat):
+            start = time.perf_counter()
+            jobs, rows = ingestor.poll_sync()
+            print(f"poll {poll + 1}: {len(jobs)} cards in {(time.perf_counter() - start) * 1000:.0f} ms")
+            for row in rows:
+                print(f"  {row['name']:<16}{row['status']:<14}{row['attempts']} attempt(s) {row['ms']:>8.1f} ms  {row.get('error', '')}")
+        if args.show:
+            print(json.dumps(jobs, ensure_ascii=False, indent=2))
+    finally:
+        ingestor.close()
@@ -0,0 +1,299 @@
+# price_scheduler.py
+#
+# Keeps the price cards pre-rendered.  An APScheduler job polls a price
+# source every PRICE_POLL_SECONDS, compares each card's values and date with
+# the last set it rendered, and re-renders only the cards that changed into
+# PRICE_CARDS_DIR, so a bot can hand out the current card without rendering
+# it while the user waits.
+#
+# Sources (config.PRICE_SOURCE or --source) hold a feed in price_batch's
+# JSON/CSV formats:
+#   a file      re-read only when its size or mtime changed
+#   a URL       http(s)://..., e.g. the local stand-in:
+#                 python src/craft/price_scheduler.py stand-in prices.json --port 8765
+#               (a .csv URL or a text/csv response is read as CSV)
+# or, with config.PRICE_SOURCES_FILE or --sources, many endpoints fetched
+# concurrently by price_feeds.FeedIngestor.  URLs are always fetched through
+# the ingestor, with conditional requests, timeouts and retries.  The stand-in
+# also serves a directory (one feed per file) and answers conditional
+# requests with 304.
+#
+# A card is re-rendered when its values, the date it prints (its feed date,
+# or today's Tehran date for an undated card, so the date strip rolls over at
+# midnight) or the profile changed, or its file is missing.  What was
+# rendered is recorded in <out_dir>/state.json:
+#   {"<path>": {"card": ..., "signature": ..., "rendered_at": ...}, ...}
+# which is also the index of the current cards for the bots.  A card that
+# fails to render keeps its previous file and is retried on the next poll.
+#
+# Run from the repository root:
+#   python src/craft/price_scheduler.py run [--source URL] [--interval 30]
+#   python src/craft/price_scheduler.py --sources price_sources.json run
+#   python src/craft/price_scheduler.py poll        # once, then exit
+
+import argparse
+import email.utils
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+
+import metrics
+from config import DEFAULT_PROFILE, PRICE_CARDS_DIR, PRICE_POLL_SECONDS, PRICE_SOURCE, PRICE_SOURCES_FILE
+from date_util import DateContext
+from encoders import EXTENSIONS, PROFILES, profile_settings
+from fs_util import atomic_write
+from price_batch import _output_path, load_feed, render_job
+from price_feeds import FeedIngestor, load_sources, make_source
+
+STATE_FILE = "state.json"
+
+
+def _is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def _signature(job: dict, today: str, profile: str) -> str:
+    """Hash of everything a card's pixels depend on besides the code and assets."""
+    key = {"card": job["card"], "params": job["params"], "date": job["date"] or today, "profile": profile}
+    return hashlib.sha256(json.dumps(key, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class PriceWatcher:
+    """
+    Poll a price source and keep its cards rendered in ``out_dir``.
+
+    Args:
+        source: Feed file path or http(s) URL.
+        out_dir: Directory for the cards and state.json.
+        profile: Encoder profile of the cards.
+        sources: Price endpoints (see price_feeds.load_sources) to poll
+                 instead of ``source``.
+    """
+
+    def __init__(
+        self,
+        source: str = PRICE_SOURCE,
+        out_dir: str = PRICE_CARDS_DIR,
+        profile: str = DEFAULT_PROFILE,
+        sources: Optional[List[dict]] = None,
+    ):
+        self.source = source
+        self.out_dir = out_dir
+        self.profile = profile
+        self.ingestor: Optional[FeedIngestor] = None
+        if sources:
+            self.ingestor = FeedIngestor(sources)
+            self.source = ", ".join(s["name"] for s in sources)
+        elif _is_url(source):
+            self.ingestor = FeedIngestor([make_source({"url": source})])
+        self.state: Dict[str, dict] = self._load_state()
+        self._file_version: Optional[Tuple[int, int]] = None
+        self._jobs: List[dict] = []
+
+    def _load_state(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.out_dir, STATE_FILE), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self) -> None:
+        data = json.dumps(self.state, ensure_ascii=False, indent=2).encode("utf-8")
+        atomic_write(os.path.join(self.out_dir, STATE_FILE), data)
+
+    def fetch(self) -> Tuple[List[dict], List[dict]]:
+        """
+        Read the source into render jobs (see price_batch.parse_feed).
+
+        Returns:
+            tuple: (jobs, the ingestor's per-endpoint rows; empty for a file)
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is malformed.
+        """
+        if self.ingestor is not None:
+            return self.ingestor.poll_sync()
+
+        st = os.stat(self.source)
+        version = (st.st_size, st.st_mtime_ns)
+        if version != self._file_version:
+            self._jobs = load_feed(self.source)
+            self._file_version = version
+        return self._jobs, []
+
+    def poll(self) -> dict:
+        """
+        Fetch the source once and re-render the cards that changed.
+
+        Returns:
+            dict: {"cards": cards in the feed, "rendered": summary rows of
+                  the re-rendered cards (see price_batch.render_job),
+                  "sources": endpoint rows (see FeedIngestor.fetch),
+                  "errors", "ms"}, or {"error": ...} if the source could
+                  not be read (the current cards are kept).
+        """
+        start = time.perf_counter()
+        try:
+            jobs, sources = self.fetch()
+        except (OSError, ValueError) as exc:
+            metrics.event("price_scheduler.fetch_failed", source=self.source, error=str(exc))
+            return {"error": f"{type(exc).__name__}: {exc}"}
+
+        # One instant per poll: every undated card prints the same date.
+        dates = DateContext()
+        today = dates.instant.date().isoformat()
+        extension = EXTENSIONS[profile_settings(self.profile, "card")["format"]]
+        os.makedirs(self.out_dir, exist_ok=True)
+
+        rows = []
+        for job in jobs:
+            if "error" in job:  # a bad feed entry: report it, keep the other cards
+                rows.append(render_job(job, self.out_dir, self.profile, dates))
+                continue
+            path = _output_path(job, self.out_dir, extension)
+            signature = _signature(job, today, self.profile)
+            known = self.state.get(path)
+            if known and known["signature"] == signature and os.path.exists(path):
+                continue
+            row = render_job(job, self.out_dir, self.profile, dates)
+            if "error" not in row:
+                self.state[path] = {
+                    "card": job["card"],
+                    "signature": signature,
+                    "rendered_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+                }
+            rows.append(row)
+        if rows:
+            self._save_state()
+
+        summary = {
+            "cards": len(jobs),
+            "rendered": rows,
+            "sources": sources,
+            "errors": sum("error" in row for row in rows),
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        metrics.incr("price_scheduler.polls")
+        metrics.incr("price_scheduler.rendered", len(rows) - summary["errors"])
+        metrics.incr("price_scheduler.skipped", len(jobs) - len(rows))
+        metrics.observe("price_scheduler.poll", summary["ms"])
+        return summary
+
+
+def _report(summary: dict) -> None:
+    if "error" in summary:
+        print(f"source unavailable: {summary['error']}")
+        return
+    for row in summary["sources"]:
+        if row["status"] != "not_modified":
+            print(f"  {row['name']:<30}{row['status']:<10}{row['ms']:>9.1f} ms  {row.get('error', '')}")
+    for row in summary["rendered"]:
+        cells = f"{row['cells'][0]:>3}/{row['cells'][1]:<3} cells" if "cells" in row else " " * 13
+        print(f"  {row['card']:<10}{row['ms']:>9.1f} ms  {cells}  {row.get('error') or row['path']}")
+    print(
+        f"{len(summary['rendered'])} of {summary['cards']} cards re-rendered, "
+        f"{summary['errors']} errors, {summary['ms']:.0f} ms"
+    )
+
+
+def run(watcher: PriceWatcher, interval: float = PRICE_POLL_SECONDS) -> None:
+    """Poll every ``interval`` seconds, starting now, until interrupted."""
+    scheduler = BlockingScheduler()
+    scheduler.add_job(
+        lambda: _report(watcher.poll()),
+        "interval",
+        seconds=interval,
+        next_run_time=datetime.now(),
+        # A slow poll delays the next one instead of overlapping it.
+        max_instances=1,
+        coalesce=True,
+    )
+    print(f"polling {watcher.source} every {interval:g} s into {watcher.out_dir}")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+
+
+def stand_in(path: str, port: int, host: str = "127.0.0.1", delay: float = 0.0) -> None:
+    """
+    Serve feed files over HTTP, for testing URL sources without a real endpoint.
+
+    ``path`` is one feed file, served on every URL path, or a directory whose
+    files are served by name (http://host:port/gold.json).  Responses carry an
+    ETag and Last-Modified and conditional requests get 304; ``delay`` slows
+    every response down, to exercise timeouts.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            file = path
+            if os.path.isdir(path):
+                file = os.path.join(path, os.path.basename(self.path.split("?")[0]))
+            try:
+                with open(file, "rb") as fh:
+                    data = fh.read()
+                mtime = os.stat(file).st_mtime
+            except OSError:
+                self.send_error(404)
+                return
+            etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag or (
+                "If-None-Match" not in self.headers
+                and self.headers.get("If-Modified-Since") == email.utils.formatdate(mtime, usegmt=True)
+            ):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            content_type = "text/csv" if file.lower().endswith(".csv") else "application/json"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type + "; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", email.utils.formatdate(mtime, usegmt=True))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"serving {path} on http://{host}:{port}/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the price cards rendered from a polled price source.")
+    parser.add_argument("--source", type=str, default=PRICE_SOURCE, help="Feed file or http(s) URL.")
+    parser.add_argument("--out_dir", type=str, default=PRICE_CARDS_DIR)
+    parser.add_argument("--profile", type=str, default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--sources", type=str, default=PRICE_SOURCES_FILE, help="Endpoints file (see price_feeds.py).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="Poll on a schedule until interrupted.")
+    p_run.add_argument("--interval", type=float, default=PRICE_POLL_SECONDS, help="Seconds between polls.")
+    sub.add_parser("poll", help="Poll once and exit.")
+    p_stand_in = sub.add_parser("stand-in", help="Serve a feed file or directory over HTTP as a local price source.")
+    p_stand_in.add_argument("feed", type=str)
+    p_stand_in.add_argument("--port", type=int, default=8765)
+    p_stand_in.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response.")
+    args = parser.parse_args()
+
+    if args.command == "stand-in":
+        stand_in(args.feed, args.port, delay=args.delay)
+    else:
+        sources = load_sources(args.sources) if args.sources else None
+        watcher = PriceWatcher(args.source, args.out_dir, args.profile, sources)
+        if args.command == "run":
+            run(watcher, args.interval)
+        else:
+            summary = watcher.poll()
+            _report(summary)
+            failed = any(row["status"] == "failed" for row in summary.get("sources", []))
+            if summary.get("error") or summary.get("errors") or failed:
+                raise SystemExit(1)
@@ -0,0 +1,265 @@
+# render_batch.py
+#
+# Render a manifest of jobs (any template, any parameters) across warm worker
+# processes, for campaigns and backfills: `craft batch jobs.jsonl` (see
+# craft.py).
+#
+# Manifest: one JSON object per line
+#   {"template": "Post2.0", "params": {...},        required
+#    "id": "post-17",                               names the output (default: line number)
+#    "output": "posts/17.jpg",                      relative to --out_dir (default: <id>_<template><ext>)
+#    "profile": "archive",                          default: --profile
+#    "instant": "2025-03-20T12:00:00+03:30"}        dates to print (default: batch start)
+#
+# Scheduling: every worker owns a set of templates (per-template affinity),
+# so each template's script, PNG, fonts and glyph cache are loaded by as few
+# processes as possible and stay warm.  Templates are split into chunks of at
+# most an equal share of the estimated work (photo posts cost about
+# PHOTO_COST card renders) and the largest chunks go first to the least
+# loaded worker, preferring one that already owns the template.  A campaign of
+# one template therefore still spreads across every worker.  Each worker is a
+# single-process pool fed one job at a time, and results are written as they
+# finish.  The cost estimate is rough, so a worker that runs out of jobs takes
+# one from the end of the queue with the most work left (work stealing),
+# preferring a template it already owns; no worker idles while others have a
+# backlog.
+#
+# Results: one JSON line per job, in completion order:
+#   {"index", "id", "template", "worker", "output", "ms", "bytes", "reused"}
+#   ("stolen": true for a job taken from another worker's queue)
+#   or {..., "error": "..."} (bad lines, unknown templates and render errors)
+
+import functools
+import inspect
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import metrics
+from config import DEFAULT_PROFILE
+from date_util import DateContext
+from encoders import EXTENSIONS, PROFILES, profile_settings
+from templates import TEMPLATES, get_renderer, render
+
+RESULTS_FILE = "results.jsonl"
+
+# Render cost of a photo post in card renders, for balancing workers.
+PHOTO_COST = 3.0
+
+# Instants whose DateContext a worker keeps, so jobs of one instant share it.
+DATE_CONTEXTS = 32
+
+
+def read_manifest(path: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Yield (line number, job) for every non-empty manifest line.
+
+    A line that is not a job yields {"error": ...} instead.
+    """
+    with open(path, encoding="utf-8") as fh:
+        for number, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict) or not isinstance(job.get("template"), str):
+                    raise ValueError("expected an object with a 'template' string")
+                if job["template"] not in TEMPLATES:
+                    raise ValueError(f"unknown template {job['template']!r}")
+                if not isinstance(job.get("params", {}), dict):
+                    raise ValueError("'params' must be an object")
+                if not isinstance(job.get("output") or "", str):
+                    raise ValueError("'output' must be a string")
+                if job.get("profile") and job["profile"] not in PROFILES:
+                    raise ValueError(f"unknown profile {job['profile']!r}")
+            except ValueError as exc:
+                job = {"error": f"line {number}: {exc}"}
+            yield number, job
+
+
+def _cost(template: str) -> float:
+    return PHOTO_COST if TEMPLATES[template][1] == "photo" else 1.0
+
+
+def assign(jobs: List[Tuple[int, dict]], workers: int) -> List[List[Tuple[int, dict]]]:
+    """Split ``jobs`` across ``workers`` with per-template affinity (see the module comment)."""
+    by_template: Dict[str, List[Tuple[int, dict]]] = {}
+    for item in jobs:
+        by_template.setdefault(item[1]["template"], []).append(item)
+    share = sum(_cost(t) * len(items) for t, items in by_template.items()) / workers
+
+    chunks = []
+    for template, items in by_template.items():
+        size = max(1, math.floor(share / _cost(template)))
+        chunks += [(template, items[i : i + size]) for i in range(0, len(items), size)]
+    chunks.sort(key=lambda chunk: _cost(chunk[0]) * len(chunk[1]), reverse=True)
+
+    queues: List[List[Tuple[int, dict]]] = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    owned = [set() for _ in range(workers)]
+    for template, items in chunks:
+        least = min(loads)
+        # Among the least loaded workers, one that already owns the template.
+        w = min(range(workers), key=lambda i: (loads[i] > least, template not in owned[i], loads[i]))
+        queues[w] += items
+        loads[w] += _cost(template) * len(items)
+        owned[w].add(template)
+    return queues
+
+
+def _warm(templates: List[str]) -> None:
+    for name in templates:
+        get_renderer(name)
+
+
+@functools.lru_cache(maxsize=DATE_CONTEXTS)
+def _date_context(instant: str) -> DateContext:
+    return DateContext(datetime.fromisoformat(instant))
+
+
+def render_job(job: dict, output_path: str, profile: str, instant: str) -> dict:
+    """Render one manifest job in a worker; returns the timing part of its result row."""
+    start = time.perf_counter()
+    row = {}
+    try:
+        dates = _date_context(instant)
+        params = dict(job.get("params", {}))
+        if "dates" in inspect.signature(get_renderer(job["template"])).parameters:
+            params["dates"] = dates
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        result = render(job["template"], params, output_path=output_path, profile=profile)
+        row["bytes"] = result["bytes"]
+        row["reused"] = bool(result.get("unchanged") or result.get("cached"))
+    except Exception as exc:  # report and carry on with the other jobs
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    row["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    row["pid"] = os.getpid()
+    return row
+
+
+def _output_path(number: int, job: dict, out_dir: str, profile: str) -> str:
+    if job.get("output"):
+        return os.path.join(out_dir, job["output"])
+    kind = TEMPLATES[job["template"]][1]
+    extension = EXTENSIONS[profile_settings(profile, kind)["format"]]
+    return os.path.join(out_dir, f"{job.get('id', number)}_{job['template']}{extension}")
+
+
+def run_batch(
+    manifest: str,
+    out_dir: str,
+    results_path: Optional[str] = None,
+    profile: str = DEFAULT_PROFILE,
+    workers: int = 0,
+    progress: bool = False,
+) -> dict:
+    """
+    Render every job of ``manifest`` into ``out_dir``.
+
+    Args:
+        manifest: JSONL manifest (see the module comment).
+        out_dir: Base directory of the outputs.
+        results_path: Results JSONL (default: out_dir/results.jsonl).
+        profile: Encoder profile of jobs that do not set one.
+        workers: Worker processes (0: one per core).
+        progress: Print a line per finished job.
+
+    Returns:
+        dict: {"jobs", "errors", "stolen", "wall_s", "render_s", "jobs_per_s",
+              "workers", "templates_per_worker"}
+    """
+    workers = workers or os.cpu_count() or 1
+    results_path = results_path or os.path.join(out_dir, RESULTS_FILE)
+    os.makedirs(out_dir, exist_ok=True)
+    instant = datetime.now().astimezone().isoformat()
+    start = time.perf_counter()
+
+    jobs, bad = [], []
+    for number, job in read_manifest(manifest):
+        (bad if "error" in job else jobs).append((number, job))
+    queues = [q for q in assign(jobs, min(workers, max(1, len(jobs)))) if q]
+    templates = [sorted({job["template"] for _, job in queue}) for queue in queues]
+
+    summary = {"jobs": len(jobs) + len(bad), "errors": len(bad), "render_s": 0.0, "stolen": 0}
+    with open(results_path, "w", encoding="utf-8") as results:
+
+        def emit(row: dict) -> None:
+            results.write(json.dumps(row, ensure_ascii=False) + "\n")
+            results.flush()
+            if progress:
+                print(f"{row.get('ms', 0):>8.1f} ms  {row.get('template', ''):<14}{row.get('error') or row['output']}")
+
+        for number, job in bad:
+            emit({"index": number, "error": job["error"]})
+
+        pools = [
+            ProcessPoolExecutor(max_workers=1, initializer=_warm, initargs=(names,)) for names in templates
+        ]
+        try:
+            # One job in flight per worker; the next is submitted as one finishes.
+            pending = {}
+            positions = [0] * len(queues)
+            owned = [set(names) for names in templates]
+
+            def steal(w: int) -> Optional[Tuple[int, dict]]:
+                # The queue with the most work left gives up its last job,
+                # or its last job of a template ``w`` already owns.
+                left = [sum(_cost(job["template"]) for _, job in q[positions[v]:]) for v, q in enumerate(queues)]
+                victim = max(range(len(queues)), key=left.__getitem__)
+                if not left[victim]:
+                    return None
+                queue = queues[victim]
+                for i in range(len(queue) - 1, positions[victim] - 1, -1):
+                    if queue[i][1]["template"] in owned[w]:
+                        return queue.pop(i)
+                return queue.pop()
+
+            def submit(w: int) -> None:
+                stolen = positions[w] >= len(queues[w])
+                if stolen:
+                    item = steal(w)
+                    if item is None:
+                        return
+                    number, job = item
+                    owned[w].add(job["template"])
+                else:
+                    number, job = queues[w][positions[w]]
+                    positions[w] += 1
+                job_profile = job.get("profile") or profile
+                output = _output_path(number, job, out_dir, job_profile)
+                future = pools[w].submit(render_job, job, output, job_profile, job.get("instant") or instant)
+                pending[future] = (w, number, job, output, stolen)
+
+            for w in range(len(queues)):
+                submit(w)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    w, number, job, output, stolen = pending.pop(future)
+                    submit(w)
+                    row = {"index": number, "id": job.get("id"), "template": job["template"], "worker": w, "output": output}
+                    if stolen:
+                        row["stolen"] = True
+                        summary["stolen"] += 1
+                    row.update(future.result())
+                    summary["errors"] += "error" in row
+                    summary["render_s"] += row["ms"] / 1000
+                    emit(row)
+        finally:
+            for pool in pools:
+                pool.shutdown()
+
+    wall = time.perf_counter() - start
+    summary.update(
+        wall_s=round(wall, 2),
+        render_s=round(summary["render_s"], 2),
+        jobs_per_s=round(summary["jobs"] / wall, 2) if wall else 0.0,
+        workers=len(queues),
+        templates_per_worker=[len(names) for names in templates],
+    )
+    metrics.observe("render_batch.wall", wall * 1000)
+    return summary
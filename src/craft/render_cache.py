@@ -0,0 +1,276 @@
+# render_cache.py
+#
+# Shared on-disk cache of encoded renders, keyed by render fingerprint (see
+# fingerprint.py).  The same card is often rendered by several users and
+# bots – the day's gold prices, one breaking headline – and any process
+# that asks for a fingerprint that is already cached gets the stored bytes
+# without rendering.
+#
+# Layout:  <cache_dir>/<fp[:2]>/<fp>.render
+#          one JSON line of encoder info, then the encoded bytes
+#
+# Entries are written with fs_util.atomic_write, so concurrent workers never
+# see a partial entry.  The mtime of an entry is its last use (hits touch
+# it); when the cache grows past max_bytes the least recently used entries
+# are removed until it is below EVICT_TO × max_bytes.  Each process keeps a
+# running estimate of the cache size (one scan, then the bytes it wrote) and
+# only scans again when the estimate passes max_bytes or every
+# RESCAN_EVERY puts, to notice what other processes wrote.
+#
+# Hit/miss/byte counters are shared by every process using the cache: each
+# process adds its counts to <cache_dir>/stats.json (under an flock) every
+# STATS_FLUSH_EVERY lookups and at exit, and `stats` reads them from there.
+#
+# Run from the repository root:
+#   python src/craft/render_cache.py stats
+#   python src/craft/render_cache.py evict --max_bytes 100000000
+#   python src/craft/render_cache.py clear
+
+import argparse
+import atexit
+import fcntl
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+from config import RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES
+from fs_util import atomic_write
+
+ENTRY_SUFFIX = ".render"
+
+# Evict down to this fraction of max_bytes, so that a full cache does not
+# delete an entry on every insert.
+EVICT_TO = 0.9
+
+# Scan the cache again after this many puts even if the size estimate is
+# below max_bytes, to count the entries other processes wrote.
+RESCAN_EVERY = 64
+
+STATS_FILE = "stats.json"
+
+# Flush this process's counters to STATS_FILE after this many updates.
+STATS_FLUSH_EVERY = 32
+
+_FINGERPRINT = re.compile(r"^[0-9a-f]{64}$")
+
+_lock = threading.Lock()
+# cache_dir -> [estimated bytes, puts since the last scan]
+_sizes: Dict[str, list] = {}
+# cache_dir -> counters not yet added to its STATS_FILE
+_pending: Dict[str, Dict[str, int]] = {}
+_updates = 0
+
+
+def _entry_path(fingerprint: str, cache_dir: str) -> str:
+    if not _FINGERPRINT.match(fingerprint):
+        raise ValueError(f"Not a render fingerprint: {fingerprint!r}")
+    return os.path.join(cache_dir, fingerprint[:2], fingerprint + ENTRY_SUFFIX)
+
+
+def _entries(cache_dir: str) -> List[Tuple[float, int, str]]:
+    """(last use, size, path) of every entry; entries removed meanwhile are skipped."""
+    found = []
+    if not os.path.isdir(cache_dir):
+        return found
+    for shard in os.scandir(cache_dir):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if not entry.name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            found.append((st.st_mtime, st.st_size, entry.path))
+    return found
+
+
+def _count(cache_dir: str, **counts: int) -> None:
+    """Add to the cache's shared counters (and to this process's metrics)."""
+    global _updates
+    for name, value in counts.items():
+        metrics.incr(f"render_cache.{name}", value)
+    with _lock:
+        pending = _pending.setdefault(cache_dir, defaultdict(int))
+        for name, value in counts.items():
+            pending[name] += value
+        _updates += 1
+        if _updates < STATS_FLUSH_EVERY:
+            return
+    flush_stats()
+
+
+def _read_stats(fh) -> Dict[str, int]:
+    fh.seek(0)
+    try:
+        return json.loads(fh.read() or "{}")
+    except ValueError:  # corrupt: start counting again
+        return {}
+
+
+def flush_stats() -> None:
+    """Add this process's pending counters to each cache's STATS_FILE."""
+    global _updates
+    with _lock:
+        pending = {d: dict(c) for d, c in _pending.items() if c}
+        _pending.clear()
+        _updates = 0
+    for cache_dir, counts in pending.items():
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(os.path.join(cache_dir, STATS_FILE), "a+", encoding="utf-8") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                totals = _read_stats(fh)
+                for name, value in counts.items():
+                    totals[name] = totals.get(name, 0) + value
+                fh.seek(0)
+                fh.truncate()
+                fh.write(json.dumps(totals))
+        except OSError as exc:  # statistics must never fail a render
+            metrics.event("render_cache.stats_failed", path=cache_dir, error=str(exc))
+
+
+atexit.register(flush_stats)
+
+
+def get(fingerprint: str, cache_dir: str = RENDER_CACHE_DIR) -> Optional[dict]:
+    """
+    Look up a render.
+
+    Returns:
+        dict: The stored encoder info plus ``data``, or None on a miss.
+    """
+    if not cache_dir:
+        return None
+    path = _entry_path(fingerprint, cache_dir)
+    try:
+        with open(path, "rb") as fh:
+            info = json.loads(fh.readline())
+            data = fh.read()
+        os.utime(path)  # mark as recently used
+    except (FileNotFoundError, ValueError):  # missing, evicted meanwhile or corrupt
+        _count(cache_dir, miss=1)
+        return None
+    _count(cache_dir, hit=1, bytes_read=len(data))
+    return dict(info, data=data)
+
+
+def put(
+    fingerprint: str,
+    result: dict,
+    cache_dir: str = RENDER_CACHE_DIR,
+    max_bytes: int = RENDER_CACHE_MAX_BYTES,
+) -> None:
+    """Store a render result (encoder info + ``data``) under ``fingerprint``."""
+    if not cache_dir:
+        return
+    path = _entry_path(fingerprint, cache_dir)
+    info = {
+        k: v
+        for k, v in result.items()
+        if k
+        not in ("data", "path", "fingerprint", "unchanged", "cached", "cells_redrawn", "cells_total")
+    }
+    header = json.dumps(info, ensure_ascii=False).encode("utf-8") + b"\n"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, header + result["data"])
+    except OSError as exc:  # a full or read-only cache must not fail the render
+        metrics.event("render_cache.write_failed", path=path, error=str(exc))
+        return
+    written = len(header) + len(result["data"])
+    _count(cache_dir, bytes_written=written)
+
+    with _lock:
+        size = _sizes.get(cache_dir)
+        if size is not None:
+            size[0] += written
+            size[1] += 1
+        scan = size is None or size[0] > max_bytes or size[1] >= RESCAN_EVERY
+    if scan:
+        evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir: str = RENDER_CACHE_DIR, max_bytes: int = RENDER_CACHE_MAX_BYTES) -> Tuple[int, int]:
+    """
+    Remove least recently used entries while the cache is over ``max_bytes``.
+
+    Returns:
+        tuple: (entries removed, bytes freed)
+    """
+    entries = _entries(cache_dir)
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        with _lock:
+            _sizes[cache_dir] = [total, 0]
+        return 0, 0
+
+    target = int(max_bytes * EVICT_TO)
+    removed = freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= target:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:  # another worker evicted it first
+            continue
+        removed += 1
+        freed += size
+    with _lock:
+        _sizes[cache_dir] = [total - freed, 0]
+    _count(cache_dir, evicted=removed, evicted_bytes=freed)
+    return removed, freed
+
+
+def clear(cache_dir: str = RENDER_CACHE_DIR) -> int:
+    """Remove every entry; returns how many were removed."""
+    removed = 0
+    for _, _, path in _entries(cache_dir):
+        try:
+            os.unlink(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def stats(cache_dir: str = RENDER_CACHE_DIR) -> dict:
+    """Entries and bytes on disk, plus the hit/miss/byte counters of every process using the cache."""
+    flush_stats()
+    entries = _entries(cache_dir)
+    try:
+        with open(os.path.join(cache_dir, STATS_FILE), encoding="utf-8") as fh:
+            fcntl.flock(fh, fcntl.LOCK_SH)
+            counters = _read_stats(fh)
+    except FileNotFoundError:
+        counters = {}
+    return {
+        "dir": cache_dir,
+        "entries": len(entries),
+        "bytes": sum(size for _, size, _ in entries),
+        **counters,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or trim the shared render cache.")
+    parser.add_argument("--cache_dir", type=str, default=RENDER_CACHE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show entries and bytes on disk.")
+    p_evict = sub.add_parser("evict", help="Evict LRU entries down to a size cap.")
+    p_evict.add_argument("--max_bytes", type=int, default=RENDER_CACHE_MAX_BYTES)
+    sub.add_parser("clear", help="Remove every entry.")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(stats(args.cache_dir)))
+    elif args.command == "evict":
+        removed, freed = evict(args.cache_dir, args.max_bytes)
+        print(f"evicted {removed} entries, {freed} bytes")
+    else:
+        print(f"removed {clear(args.cache_dir)} entries")
@@ -0,0 +1,162 @@
+# render_server.py
+#
+# Long-lived render process.  The bots send a render request over a Unix
+# socket and get the encoded image back on the same connection, instead of
+# spawning a Python process that writes ./OutPut/... for the bot to read back.
+#
+# Protocol (any number of requests per connection):
+#   request:  one JSON line  {"template": "Post2.0", "params": {...},
+#                             "profile": "telegram-preview",
+#                             "instant": "2025-03-20T12:00:00+03:30"}
+#             ("instant" is optional: the moment whose dates the card
+#             prints, default now; see date_util.DateContext)
+#   response: one JSON line  {"ok": true, "length": N, "info": {...}}
+#             followed by N bytes of encoded image
+#             or            {"ok": false, "length": 0, "error": "..."}
+#             The server never writes the image to disk; an "output_path"
+#             in the request is ignored.
+#
+# Renders run concurrently on a pool (config.RENDER_EXECUTOR/RENDER_WORKERS):
+# threads by default, since the render core is re-entrant (per-thread fonts,
+# locked caches, no shared scratch images) and Pillow does its heavy lifting
+# without the GIL; processes are the fallback for text-heavy loads, where
+# FreeType rasterisation holds the GIL.  See `bench.py scaling`.
+#
+# Run from the repository root (templates use relative asset paths):
+#   python src/craft/render_server.py serve [--executor thread|process] [--workers 4]
+#   python src/craft/render_server.py render gold --params '{"Gold": "6800000"}' --out gold.png
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Tuple
+
+from config import RENDER_EXECUTOR, RENDER_SOCKET, RENDER_WORKERS
+from date_util import DateContext
+from templates import TEMPLATES, get_renderer, render
+
+
+def _render_job(request: dict) -> dict:
+    params = request.get("params", {})
+    if request.get("instant"):
+        params = dict(params, dates=DateContext(datetime.fromisoformat(request["instant"])))
+    # Never written to disk: the socket is world-reachable under /tmp, so a
+    # client must not choose paths for the server to write.
+    return render(request["template"], params, output_path=None, profile=request.get("profile"))
+
+
+async def _handle(reader, writer, executor) -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                result = await loop.run_in_executor(executor, _render_job, request)
+            except Exception as exc:  # report to the client, keep serving
+                header = {"ok": False, "length": 0, "error": f"{type(exc).__name__}: {exc}"}
+                writer.write(json.dumps(header).encode("utf-8") + b"\n")
+                await writer.drain()
+                continue
+
+            data = result.pop("data")
+            header = {"ok": True, "length": len(data), "info": result}
+            writer.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+            writer.write(data)
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+def _warm() -> None:
+    for name in TEMPLATES:
+        get_renderer(name)
+
+
+def make_executor(kind: str = RENDER_EXECUTOR, workers: int = RENDER_WORKERS) -> Executor:
+    """
+    Pool the server renders on: ``kind`` 'thread' or 'process', ``workers`` 0 for one per core.
+
+    Raises:
+        ValueError: If ``kind`` is neither.
+    """
+    workers = workers or os.cpu_count() or 1
+    if kind == "thread":
+        _warm()  # so the first requests do not queue on the import lock
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers, initializer=_warm)
+    raise ValueError(f"Unknown executor {kind!r}; expected 'thread' or 'process'.")
+
+
+async def serve(
+    socket_path: str = RENDER_SOCKET, executor: str = RENDER_EXECUTOR, workers: int = RENDER_WORKERS
+) -> None:
+    """Serve render requests on ``socket_path`` until cancelled (see make_executor)."""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    workers = workers or os.cpu_count() or 1
+    pool = make_executor(executor, workers)
+    server = await asyncio.start_unix_server(
+        lambda r, w: _handle(r, w, pool), path=socket_path
+    )
+    print(f"render server listening on {socket_path} ({workers} {executor} workers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def request_render(
+    template: str,
+    params: dict,
+    profile: Optional[str] = None,
+    socket_path: str = RENDER_SOCKET,
+    instant: Optional[str] = None,
+) -> Tuple[bytes, dict]:
+    """Blocking client: render ``template`` on the server and return (data, info)."""
+    request = {"template": template, "params": params, "profile": profile, "instant": instant}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        stream = sock.makefile("rb")
+        header = json.loads(stream.readline())
+        if not header["ok"]:
+            raise RuntimeError(header["error"])
+        return stream.read(header["length"]), header["info"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CaptionCrafter render server.")
+    parser.add_argument("--socket", type=str, default=RENDER_SOCKET)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="Run the render server.")
+    p_serve.add_argument("--executor", choices=("thread", "process"), default=RENDER_EXECUTOR)
+    p_serve.add_argument("--workers", type=int, default=RENDER_WORKERS, help="Pool size (default: one per core).")
+
+    p_render = sub.add_parser("render", help="Send one request to a running server.")
+    p_render.add_argument("template", choices=sorted(TEMPLATES))
+    p_render.add_argument("--params", type=str, default="{}", help="JSON object of template arguments.")
+    p_render.add_argument("--profile", type=str, default=None)
+    p_render.add_argument("--instant", type=str, default=None, help="ISO time whose dates to print (default: now).")
+    p_render.add_argument("--out", type=str, required=True, help="Where to write the image.")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(serve(args.socket, args.executor, args.workers))
+    else:
+        data, info = request_render(
+            args.template, json.loads(args.params), args.profile, args.socket, args.instant
+        )
+        with open(args.out, "wb") as fh:
+            fh.write(data)
+        print(json.dumps(info, ensure_ascii=False))
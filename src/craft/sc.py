@@ -1,9 +1,14 @@
-from PIL import Image, ImageDraw, ImageOps
+from PIL import Image
+from canvas import ScaledDraw, open_template, photo_resample, tier
 from text_utils import draw_text_no_box, draw_text_in_box
+from img_util import load_photo
 import argparse
-from config import DEFAULT_IS_RTL
+from config import DEFAULT_IS_RTL, DEFAULT_PROFILE
+from encoders import PROFILES, save_image
+from fingerprint import fingerprinted
 
 
+@fingerprinted("sc")
 def create_newspaper_image(
     user_image_path: str,
     overline_text: str,
@@ -13,38 +18,40 @@ def create_newspaper_image(
     dynamic_font_size: bool = True,
     overline_font_size_delta: int = 0,
     main_headline_font_size_delta: int = 0,
-) -> None:
+    profile: str = DEFAULT_PROFILE,
+    preview: bool = False,
+) -> dict:
+
+    scale, profile = tier(preview, profile)
 
     # Load the base template and compose it with the user image and event overlays.
-    base_img = Image.open("Bases/Screenshot.png").convert("RGBA")
-    draw = ImageDraw.Draw(base_img)
+    base_img = open_template("Bases/Screenshot.png", scale)
+    draw = ScaledDraw(base_img, scale)
 
     # Load and paste user image.
 
     # --- white-box coordinates taken from the template ---
     box_left, box_top = 81, 672
-    box_right = base_img.width - box_left
+    box_right = draw.width - box_left
     box_bottom = 1263
     box_w, box_h = box_right - box_left, box_bottom - box_top
     margin = 40
 
-    # open the user image
-    user_img = Image.open(user_image_path).convert("RGBA")
-
-    # resize (only if larger) but keep aspect ratio
-    user_img = ImageOps.contain(
-        user_img, (box_w - margin, box_h - margin), Image.LANCZOS
+    # open the user image and fit it to the box, keeping the aspect ratio
+    user_img = load_photo(
+        user_image_path,
+        draw.size(box_w - margin, box_h - margin),
+        fit="contain",
+        resample=photo_resample(scale, Image.LANCZOS),
     )
 
-    # centre it inside the white box
-    paste_x = box_left + (box_w - user_img.width) // 2
-    paste_y = box_top + (box_h - user_img.height) // 2
+    # centre it inside the white box (user_img is already at canvas scale)
+    paste_x = draw.scaled(box_left) + (draw.scaled(box_w) - user_img.width) // 2
+    paste_y = draw.scaled(box_top) + (draw.scaled(box_h) - user_img.height) // 2
 
     # paste (use the image itself as the mask to keep transparency)
     base_img.paste(user_img, (paste_x, paste_y), user_img)
 
-    draw = ImageDraw.Draw(base_img)
-
     # Define individual font paths.
     fonts = {
         "overline": "./Fonts/AbarLow-Regular.ttf",
@@ -62,7 +69,7 @@ def create_newspaper_image(
         draw,
         overline_text,
         fonts["overline"],
-        base_img.width / 2,
+        draw.width / 2,
         320,
         alignment="center",
         font_size=overline_size,
@@ -85,7 +92,7 @@ def create_newspaper_image(
 
     # Add main headline text.
     margin = 110
-    headline_box = (margin, 430, base_img.width - 2 * margin, 200)
+    headline_box = (margin, 430, draw.width - 2 * margin, 200)
     headline_size = 60 + main_headline_font_size_delta
     draw_text_in_box(
         draw,
@@ -103,7 +110,7 @@ def create_newspaper_image(
 
     # Save the final image.
     print("python code log: created news paper image.")
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+    return save_image(base_img, output_path, profile=profile, kind="photo")
 
 
 # if __name__ == "__main__":
@@ -155,6 +162,18 @@ if __name__ == "__main__":
         help="Headline font size adjustment.",
     )
 
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE,
+        choices=sorted(PROFILES),
+        help="Encoder profile for the output file.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Fast low-resolution preview (same layout as the final render).",
+    )
     args = parser.parse_args()
 
     create_newspaper_image(
@@ -166,6 +185,8 @@ if __name__ == "__main__":
         dynamic_font_size=args.dynamic_font_size,
         overline_font_size_delta=args.overline_font_size_delta,
         main_headline_font_size_delta=args.main_headline_font_size_delta,
+        profile=args.profile,
+        preview=args.preview,
     )
 
 # python "./src/Craft/screenshot_template.py" --user_image_path="./assets/user_image.jpg" --overline_text="سوخت قاچاق در خليج فارس" --main_headline_text="كشف محموله عظيم سوخت قاچاق درخليج فارس؛ ضربه سنگين به قاچاقچيان" --output_path="assets/OutPut/
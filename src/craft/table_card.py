@@ -0,0 +1,322 @@
+# table_card.py
+#
+# One renderer for the price-table cards (Currency, gold, crypto, iPhone,
+# xiaomi, Samsung, car1, car2).  Every one of them is a template PNG with a
+# date line and a grid of prices: N rows `step` pixels apart, one or more
+# columns.  A card is described by a spec in CARD_SPECS; the template
+# scripts keep their CLI and function signatures and hand their values to
+# render_card in cell order (row by row, left column first).
+#
+# Per spec, the cell anchors are computed once per process, and each render
+# resolves its two fonts once and draws every cell in one loop.
+#
+# Intraday updates usually change one or two prices.  The last canvas of each
+# (card, scale) is kept with the text and pixel box of every cell, and when
+# the next render prints the same date only the changed cells are restored
+# from the template and drawn again; render_card reports cells_redrawn out of
+# cells_total.  The result is pixel-identical to drawing the whole card.  At
+# most TABLE_CARD_CANVASES canvases are kept (about 8 MB each at full size).
+
+import functools
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+import metrics
+from canvas import ScaledDraw, open_template, restore_template, tier
+from config import DEFAULT_IS_RTL, TABLE_CARD_CANVASES
+from date_util import DateContext
+from encoders import save_image
+from number_util import farsi_fmt_many
+from text_utils import draw_scaled_text, get_font, prepare_farsi_text, scaled_text_box, text_bbox
+
+CELL_FONT = "./Fonts/AbarMid-SemiBold.ttf"
+DATE_FONT = "./Fonts/AbarMid-Regular.ttf"
+DATE_FONT_SIZE = 60
+COLOR = "white"
+
+# name -> spec
+#   base       template PNG
+#   rows       number of price rows
+#   columns    x of each column's centre (logical pixels)
+#   top, step  y of the first row, distance between rows
+#   font_size  price font size
+#   date_y     y of the centred "weekday day month year" line
+#   rtl        optional, per column: shape the price as RTL text
+CARD_SPECS: Dict[str, dict] = {
+    "Currency": {
+        "base": "Bases/Currency.png",
+        "rows": 7,
+        "columns": [369],
+        "top": 730,
+        "step": 150,
+        "font_size": 65,
+        "date_y": 550,
+    },
+    "gold": {
+        "base": "Bases/Gold.png",
+        "rows": 6,
+        "columns": [369],
+        "top": 800,
+        "step": 150,
+        "font_size": 65,
+        "date_y": 625,
+    },
+    "crypto": {
+        "base": "Bases/Crypto.png",
+        "rows": 8,
+        "columns": [312],
+        "top": 650,
+        "step": 150,
+        "font_size": 50,
+        "date_y": 495,
+    },
+    "iPhone": {
+        "base": "Bases/iPhone.png",
+        "rows": 8,
+        "columns": [774],
+        "top": 650,
+        "step": 150,
+        "font_size": 50,
+        "date_y": 495,
+    },
+    "xiaomi": {
+        "base": "Bases/xiaomi.png",
+        "rows": 7,
+        "columns": [774],
+        "top": 730,
+        "step": 150,
+        "font_size": 50,
+        "date_y": 570,
+    },
+    "Samsung": {
+        "base": "Bases/Samsung.png",
+        "rows": 8,
+        "columns": [774],
+        "top": 650,
+        "step": 150,
+        "font_size": 50,
+        "date_y": 495,
+    },
+    # 7 rows of (factory price, market price); the PNGs are 1080 × 1920
+    "car1": {
+        "base": "Bases/Car1.png",
+        "rows": 7,
+        "columns": [205, 513],  # قیمت کارخانه, قیمت بازار
+        "top": 880,
+        "step": 132,
+        "font_size": 50,
+        "date_y": 550,
+        "rtl": [DEFAULT_IS_RTL, True],
+    },
+    "car2": {
+        "base": "Bases/Car2.png",
+        "rows": 7,
+        "columns": [205, 513],  # قیمت کارخانه, قیمت بازار
+        "top": 880,
+        "step": 132,
+        "font_size": 50,
+        "date_y": 550,
+        "rtl": [DEFAULT_IS_RTL, True],
+    },
+}
+
+
+# (name, scale) -> {"canvas", "date_text", "texts", "boxes"} of the last render, oldest first
+_canvases: "OrderedDict[Tuple[str, float], dict]" = OrderedDict()
+_canvases_lock = threading.Lock()
+
+
+def register_card(name: str, spec: dict) -> None:
+    """Add or replace a card spec."""
+    CARD_SPECS[name] = spec
+    cell_anchors.cache_clear()
+    with _canvases_lock:
+        for key in [k for k in _canvases if k[0] == name]:
+            del _canvases[key]
+
+
+@functools.lru_cache(maxsize=None)
+def cell_anchors(name: str) -> Tuple[Tuple[float, float, bool], ...]:
+    """(x, y, rtl) of every cell of card ``name``, in value order."""
+    spec = CARD_SPECS[name]
+    rtl = spec.get("rtl", [DEFAULT_IS_RTL] * len(spec["columns"]))
+    return tuple(
+        (x, spec["top"] + row * spec["step"], rtl[col])
+        for row in range(spec["rows"])
+        for col, x in enumerate(spec["columns"])
+    )
+
+
+def _draw_centered(
+    draw: ScaledDraw, text: str, font_path: str, font, font_size: int, x: float, y: float
+) -> Tuple[int, int, int, int]:
+    # text_utils.draw_text_no_box with alignment="center", font already resolved.
+    left, _, right, _ = text_bbox(draw, text, font)
+    return draw_scaled_text(draw, (x - (right - left) / 2, y), text, font_path, font_size, COLOR)
+
+
+def _centered_box(
+    draw: ScaledDraw, text: str, font_path: str, font, font_size: int, x: float, y: float
+) -> Tuple[int, int, int, int]:
+    # The box _draw_centered will return, without drawing.
+    left, _, right, _ = text_bbox(draw, text, font)
+    return scaled_text_box(draw, (x - (right - left) / 2, y), text, font_path, font_size, COLOR)
+
+
+def _overlap(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _dirty_cells(
+    texts: Sequence[str], last: dict, new_boxes: Dict[int, Tuple[int, int, int, int]]
+) -> Optional[list]:
+    """
+    Cells to restore and draw again on the last canvas, or None to draw it anew.
+
+    ``new_boxes`` holds the box each changed cell's new text will cover.
+    Restoring a cell's old box from the template also wipes any other text
+    in it, and its new text may reach further than the old one did, so a
+    cell whose old or new box meets a neighbouring cell pulls that cell in
+    too (and so on); the date line is never redrawn on its own.
+    """
+    boxes = last["boxes"]
+    dirty = [i for i, text in enumerate(texts) if text != last["texts"][i]]
+    pending = list(dirty)
+    while pending:
+        i = pending.pop()
+        for box in (boxes[i], new_boxes.get(i, boxes[i])):
+            if _overlap(box, last["date_box"]):
+                return None
+            for j, other in enumerate(boxes):
+                if j not in dirty and _overlap(box, other):
+                    dirty.append(j)
+                    pending.append(j)
+    return sorted(dirty)
+
+
+def _draw(
+    name: str,
+    values: Sequence[Union[int, str]],
+    scale: float,
+    dates: Optional[DateContext],
+    incremental: bool,
+) -> Tuple[Image.Image, int]:
+    """draw_card; also returns how many cells were drawn."""
+    spec = CARD_SPECS[name]
+    anchors = cell_anchors(name)
+    if len(values) != len(anchors):
+        raise ValueError(f"{name} card has {len(anchors)} cells, got {len(values)} values.")
+    texts = [prepare_farsi_text(t) if rtl else t for t, (_, _, rtl) in zip(farsi_fmt_many(values), anchors)]
+
+    dates = dates or DateContext()
+    date_text = dates.day_of_week() + " " + dates.shamsi(year=True, month=True, day=True)
+    if DEFAULT_IS_RTL:
+        date_text = prepare_farsi_text(date_text)
+    font_size = spec["font_size"]
+    font = get_font(CELL_FONT, font_size)
+
+    # This render takes the kept canvas out of the cache and owns it while it
+    # draws; a concurrent render of the same card meanwhile draws a fresh one.
+    last = None
+    if incremental:
+        with _canvases_lock:
+            last = _canvases.pop((name, scale), None)
+    changed = None
+    if last is not None and last["date_text"] == date_text:
+        draw = ScaledDraw(last["canvas"], scale)
+        new_boxes = {
+            i: _centered_box(draw, text, CELL_FONT, font, font_size, *anchors[i][:2])
+            for i, text in enumerate(texts)
+            if text != last["texts"][i]
+        }
+        changed = _dirty_cells(texts, last, new_boxes)
+    if changed is not None:
+        canvas, boxes = last["canvas"], last["boxes"]
+        for i in changed:
+            restore_template(canvas, spec["base"], scale, boxes[i])
+        for i in changed:
+            x, y, _ = anchors[i]
+            boxes[i] = _draw_centered(draw, texts[i], CELL_FONT, font, font_size, x, y)
+        date_box = last["date_box"]
+    else:
+        canvas = open_template(spec["base"], scale)
+        draw = ScaledDraw(canvas, scale)
+        date_font = get_font(DATE_FONT, DATE_FONT_SIZE)
+        date_box = _draw_centered(
+            draw, date_text, DATE_FONT, date_font, DATE_FONT_SIZE, draw.width / 2, spec["date_y"]
+        )
+        boxes = [
+            _draw_centered(draw, text, CELL_FONT, font, font_size, x, y)
+            for text, (x, y, _) in zip(texts, anchors)
+        ]
+        changed = texts
+    if not incremental or not TABLE_CARD_CANVASES:
+        return canvas, len(changed)
+    # The kept canvas is updated in place by the next render, so the copy is
+    # taken before another thread can pick it up.
+    image = canvas.copy()
+    with _canvases_lock:
+        _canvases[(name, scale)] = {
+            "canvas": canvas,
+            "date_text": date_text,
+            "date_box": date_box,
+            "texts": texts,
+            "boxes": boxes,
+        }
+        while len(_canvases) > TABLE_CARD_CANVASES:
+            _canvases.popitem(last=False)
+    return image, len(changed)
+
+
+def draw_card(
+    name: str,
+    values: Sequence[Union[int, str]],
+    scale: float = 1.0,
+    dates: Optional[DateContext] = None,
+    incremental: bool = True,
+) -> Image.Image:
+    """
+    Draw the table card ``name`` at canvas ``scale`` and return the image.
+
+    With ``incremental``, the last canvas of this card and scale is reused
+    when it shows the same date: only the cells whose text changed are
+    restored from the template and drawn again.
+
+    Raises:
+        ValueError: If the number of values does not match the card's cells.
+        number_util.InvalidNumberError: Listing every value that is not a price.
+    """
+    return _draw(name, values, scale, dates, incremental)[0]
+
+
+def render_card(
+    name: str,
+    values: Sequence[Union[int, str]],
+    output_path: Optional[str],
+    profile: str,
+    preview: bool = False,
+    dates: Optional[DateContext] = None,
+) -> dict:
+    """
+    Render the table card ``name`` and encode it.
+
+    Args:
+        name: Key of CARD_SPECS.
+        values: One price per cell, row by row (ints, or strings in any
+                digits/grouping number_util accepts).
+        output_path, profile, preview, dates: As for the template scripts.
+
+    Returns:
+        dict: The encoder result (see encoders.save_image) plus
+              ``cells_redrawn`` and ``cells_total``.
+    """
+    scale, profile = tier(preview, profile)
+    image, redrawn = _draw(name, values, scale, dates, incremental=True)
+    total = len(cell_anchors(name))
+    metrics.incr("table_card.cells_redrawn", redrawn)
+    metrics.incr("table_card.cells_total", total)
+    result = save_image(image, output_path, profile=profile, kind="card")
+    return dict(result, cells_redrawn=redrawn, cells_total=total)
@@ -0,0 +1,73 @@
+# templates.py
+#
+# Registry of the craft scripts that can be rendered in-process (render
+# server, benchmarks, batch jobs).  Templates are addressed by script name,
+# the same names the bots use for ./src/craft/<name>.py.
+
+import importlib.util
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+CRAFT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (render function, encoder kind)
+TEMPLATES: Dict[str, Tuple[str, str]] = {
+    "Post2.0": ("create_newspaper_image", "photo"),
+    "Post": ("create_newspaper_image", "photo"),
+    "Live": ("create_newspaper_image", "photo"),
+    "BreakingNews": ("create_newspaper_image", "photo"),
+    "report": ("create_newspaper_image", "photo"),
+    "screenshot": ("create_newspaper_image", "photo"),
+    "sc": ("create_newspaper_image", "photo"),
+    "developing": ("create_newspaper_image", "photo"),
+    "Currency": ("create_currency_post", "card"),
+    "gold": ("create_gold_post", "card"),
+    "crypto": ("create_crypto_post", "card"),
+    "iPhone": ("create_crypto_post", "card"),
+    "xiaomi": ("create_crypto_post", "card"),
+    "Samsung": ("create_crypto_post", "card"),
+    "car1": ("create_car_post", "card"),
+    "car2": ("create_car_post", "card"),
+}
+
+_modules: Dict[str, object] = {}
+_lock = threading.Lock()
+
+
+def load_template(script: str):
+    """Import a craft script by file name (some names, e.g. Post2.0.py, are not identifiers)."""
+    name = "craft_" + os.path.splitext(script)[0].replace(".", "_")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(CRAFT_DIR, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def get_renderer(name: str) -> Callable[..., dict]:
+    """Return the render function of template ``name``, importing its script once."""
+    if name not in TEMPLATES:
+        raise ValueError(f"Unknown template {name!r}; known: {', '.join(TEMPLATES)}")
+    with _lock:
+        module = _modules.get(name)
+        if module is None:
+            module = _modules[name] = load_template(name + ".py")
+    return getattr(module, TEMPLATES[name][0])
+
+
+def render(
+    name: str,
+    params: dict,
+    output_path: Optional[str] = None,
+    profile: Optional[str] = None,
+) -> dict:
+    """
+    Render template ``name`` with ``params``.
+
+    With ``output_path=None`` nothing is written to disk and the encoded
+    image is returned in the result's ``data`` field.
+    """
+    kwargs = dict(params, output_path=output_path)
+    if profile is not None:
+        kwargs["profile"] = profile
+    return get_renderer(name)(**kwargs)
@@ -10,7 +10,12 @@ from PIL import Image, ImageDraw, ImageFont
 import arabic_reshaper
 from bidi.algorithm import get_display
 from typing import List, Tuple, Optional, Union
-import re
+import functools
+import math
+import threading
+import warnings
+
+from number_util import FARSI_DIGITS, farsi_fmt_many, normalise_numbers
 
 
 # Default configuration constants
@@ -22,14 +27,170 @@ DEFAULT_MIN_FONT_SIZE: int = 5
 DEFAULT_IS_RTL: bool = True
 
 
-def create_temporary_draw(width: int, height: int) -> ImageDraw.ImageDraw:
+# Measurements only read the draw's font mode, so every thread can share this
+# one instead of allocating a scratch image per auto-size.
+_MEASURE_DRAW = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+# Font objects of this thread (see get_font).
+_fonts = threading.local()
+
+
+def _load_font(font_path: str, font_size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_path, font_size, layout_engine=ImageFont.Layout.RAQM)
+
+
+def get_font(font_path: str, font_size: int) -> ImageFont.FreeTypeFont:
+    """
+    Returns a cached font object for (font_path, font_size).
+
+    Auto-sizing tries every size between max_font_size and min_font_size, so
+    loading each font file once per size saves most of the per-render cost.
+    Every thread keeps its own fonts: a FreeType face must not be used by two
+    threads at once.  The measurement and glyph caches below are keyed by
+    (path, size), so they are shared by all threads all the same.
+    """
+    load = getattr(_fonts, "load", None)
+    if load is None:
+        load = _fonts.load = functools.lru_cache(maxsize=64)(_load_font)
+    return load(font_path, font_size)
+
+
+@functools.lru_cache(maxsize=16384)
+def _font_bbox(font_path: str, font_size: int, text: str, mode: str) -> Tuple[int, int, int, int]:
+    return get_font(font_path, font_size).getbbox(text, mode)
+
+
+def text_bbox(
+    draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont
+) -> Tuple[int, int, int, int]:
+    """
+    Same as ``draw.textbbox((0, 0), text, font=font)``, memoized.
+
+    Auto-sizing measures the same lines at the same sizes again on every
+    render (and the final render repeats the preview's measurements), and
+    each FreeType measurement of a headline costs a few milliseconds.
+    """
+    return _font_bbox(font.path, font.size, text, draw.fontmode)
+
+
+def draw_scaled_text(
+    draw: ImageDraw.ImageDraw,
+    xy: Tuple[float, float],
+    text: str,
+    font_path: str,
+    font_size: int,
+    color: Union[str, Tuple[int, int, int]] = DEFAULT_COLOR,
+) -> Tuple[int, int, int, int]:
     """
-    Creates a temporary ImageDraw instance for text measurement.
+    Draws already laid-out text at logical position ``xy``.
+
+    On a canvas.ScaledDraw (preview tier) the position and font size are
+    multiplied by ``draw.scale``; on a plain ImageDraw this is ``draw.text``.
+
+    Returns:
+        Tuple[int, int, int, int]: The box of canvas pixels the text was
+        drawn into (left, top, right, bottom), e.g. for restoring the
+        background before the text is replaced.
     """
-    temp_img = Image.new("RGB", (width, height))
-    return ImageDraw.Draw(temp_img)
+    xy, font_size = _scaled(draw, xy, font_size)
+    if "\n" not in text and _cached_line_matches(font_path, draw.mode, draw.fontmode):
+        return _draw_cached_line(draw, xy, text, font_path, font_size, color)
+    return _draw_line(draw, xy, text, font_path, font_size, color)
 
 
+def scaled_text_box(
+    draw: ImageDraw.ImageDraw,
+    xy: Tuple[float, float],
+    text: str,
+    font_path: str,
+    font_size: int,
+    color: Union[str, Tuple[int, int, int]] = DEFAULT_COLOR,
+) -> Tuple[int, int, int, int]:
+    """
+    The box draw_scaled_text would return for the same arguments, without drawing.
+
+    Lets a caller find the canvas pixels new text will cover before it is
+    drawn, e.g. to restore them first.
+    """
+    xy, font_size = _scaled(draw, xy, font_size)
+    if "\n" not in text and _cached_line_matches(font_path, draw.mode, draw.fontmode):
+        return _cached_line(draw, xy, text, font_path, font_size, color)[2]
+    return _line_box(draw, xy, text, get_font(font_path, font_size))
+
+
+def _scaled(draw, xy, font_size) -> Tuple[Tuple[float, float], int]:
+    scale = getattr(draw, "scale", 1.0)
+    if scale != 1.0:
+        xy = (xy[0] * scale, xy[1] * scale)
+        font_size = max(1, round(font_size * scale))
+    return xy, font_size
+
+
+def _line_box(draw, xy, text, font) -> Tuple[int, int, int, int]:
+    left, top, right, bottom = draw.textbbox(xy, text, font=font)
+    return math.floor(left), math.floor(top), math.ceil(right), math.ceil(bottom)
+
+
+def _draw_line(draw, xy, text, font_path, font_size, color) -> Tuple[int, int, int, int]:
+    font = get_font(font_path, font_size)
+    draw.text(xy, text, font=font, fill=color)
+    return _line_box(draw, xy, text, font)
+
+
+def _cached_line(draw, xy, text, font_path, font_size, color):
+    # (mask, ink, box) of a single line at canvas position xy.
+    ink = draw._getink(color)[0]
+    start = (math.modf(xy[0])[0], math.modf(xy[1])[0])
+    mask, offset = _text_mask(font_path, font_size, text, draw.fontmode, ink, start)
+    left, top = int(xy[0]) + offset[0], int(xy[1]) + offset[1]
+    return mask, ink, (left, top, left + mask.size[0], top + mask.size[1])
+
+
+def _draw_cached_line(draw, xy, text, font_path, font_size, color) -> Tuple[int, int, int, int]:
+    # What ImageDraw.text does for a single line, with the rasterised glyphs
+    # cached: cards redraw the same prices, dates and labels on every render.
+    # It uses ImageDraw internals, so it is only used where
+    # _cached_line_matches has checked it against ImageDraw.text.
+    mask, ink, box = _cached_line(draw, xy, text, font_path, font_size, color)
+    draw.draw.draw_bitmap(box[:2], mask, ink)
+    return box
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_line_matches(font_path: str, image_mode: str, font_mode: str) -> bool:
+    """
+    Whether _draw_cached_line draws exactly the pixels of ImageDraw.text.
+
+    Checked once per font and image/font mode, on a sample line at a
+    fractional position; a Pillow whose internals changed (or that lacks
+    them) fails the check, and its renders use ImageDraw.text.
+    """
+    sample = prepare_farsi_text("قیمت ۱۲۳٬۴۵۶ Aa 7,890")
+    pixels = []
+    try:
+        for draw_line in (_draw_line, _draw_cached_line):
+            image = Image.new(image_mode, (360, 80))
+            draw = ImageDraw.Draw(image)
+            draw.fontmode = font_mode
+            draw_line(draw, (10.6, 12.3), sample, font_path, 31, "white")
+            pixels.append(image.tobytes())
+    except Exception:  # internals missing or renamed
+        matches = False
+    else:
+        matches = pixels[0] == pixels[1]
+    if not matches:
+        warnings.warn(f"Cached text drawing does not match ImageDraw.text for {font_path}; using ImageDraw.text.")
+    return matches
+
+
+@functools.lru_cache(maxsize=1024)
+def _text_mask(
+    font_path: str, font_size: int, text: str, mode: str, ink: int, start: Tuple[float, float]
+):
+    return get_font(font_path, font_size).getmask2(text, mode, ink=ink, start=start)
+
+
+@functools.lru_cache(maxsize=4096)
 def prepare_farsi_text(text: str) -> str:
     """
     Prepares Farsi (RTL) text for correct rendering.
@@ -67,9 +228,7 @@ def wrap_text_to_fit(
     for word in words:
         # Tentatively append word to the current line
         test_line = f"{current_line} {word}".strip() if current_line else word
-        left, _, right, _ = draw.textbbox(
-            (0, 0), prepare_farsi_text(test_line), font=font
-        )
+        left, _, right, _ = text_bbox(draw, prepare_farsi_text(test_line), font)
         line_width = right - left
 
         if line_width <= box_width:
@@ -113,15 +272,12 @@ def calculate_font_size_to_fit(
     Example:
         optimal_size = calculate_font_size_to_fit("text", "font.ttf", 400, 200, 48, 12)
     """
-    # Temporary image and draw object for measurements
-    draw = create_temporary_draw(box_width, box_height)
+    draw = _MEASURE_DRAW
 
     # Start from max font size and decrement to min font size
     for font_size in range(max_font_size, min_font_size - 1, -1):
         # Create font object with current font size
-        font = ImageFont.truetype(
-            font_path, font_size, layout_engine=ImageFont.Layout.RAQM
-        )
+        font = get_font(font_path, font_size)
 
         # Wrap text to fit box width
         lines = wrap_text_to_fit(text, font, box_width, draw)
@@ -130,7 +286,7 @@ def calculate_font_size_to_fit(
         total_height = 0
         max_line_width = 0
         for line in lines:
-            left, top, right, bottom = draw.textbbox((0, 0), line, font=font)
+            left, top, right, bottom = text_bbox(draw, line, font)
             line_width = right - left
             line_height = bottom - top
 
@@ -214,7 +370,7 @@ def draw_text_in_box(
         font_size = DEFAULT_FONT_SIZE
 
     # Load the font with determined size
-    font = ImageFont.truetype(font_path, font_size, layout_engine=ImageFont.Layout.RAQM)
+    font = get_font(font_path, font_size)
 
     raw_lines = wrap_text_to_fit(
         text=text,
@@ -234,7 +390,7 @@ def draw_text_in_box(
     # Calculate total height of text block with spacing
     line_heights = []
     for line in shaped_lines:
-        left, top, right, bottom = draw.textbbox((0, 0), line, font=font)
+        left, top, right, bottom = text_bbox(draw, line, font)
         line_heights.append(bottom - top)
 
     total_text_height = (
@@ -283,7 +439,7 @@ def draw_text_in_box(
     #     current_y += common_h * line_spacing
     #     if current_y > box_bottom:
     #         break
-    boxes = [draw.textbbox((0, 0), l, font=font) for l in shaped_lines]
+    boxes = [text_bbox(draw, l, font) for l in shaped_lines]
     line_sizes = [(r - l, b - t) for (l, t, r, b) in boxes]
     first_top = boxes[0][1]  # may be negative
 
@@ -315,7 +471,9 @@ def draw_text_in_box(
         else:  # "right"
             current_x = box_right - w
 
-        draw.text((current_x, current_y - t), line, font=font, fill=color)
+        draw_scaled_text(
+            draw, (current_x, current_y - t), line, font_path, font_size, color
+        )
         current_y += h * line_spacing
 
 
@@ -353,10 +511,10 @@ def draw_text_no_box(
         prepared_text = text
 
     # Load the font
-    font = ImageFont.truetype(font_path, font_size, layout_engine=ImageFont.Layout.RAQM)
+    font = get_font(font_path, font_size)
 
     # Measure text dimensions
-    left, _, right, _ = draw.textbbox((0, 0), prepared_text, font=font)
+    left, _, right, _ = text_bbox(draw, prepared_text, font)
     text_width = right - left
 
     # Adjust x based on horizontal alignment
@@ -370,27 +528,11 @@ def draw_text_no_box(
         raise ValueError("alignment must be 'left', 'center', or 'right'.")
 
     # Draw text on the image
-    draw.text((adjusted_x, y), prepared_text, font=font, fill=color)
+    draw_scaled_text(draw, (adjusted_x, y), prepared_text, font_path, font_size, color)
 
 
 def to_farsi_numerals(text: str) -> str:
-    western_to_farsi = {
-        "0": "۰",
-        "1": "۱",
-        "2": "۲",
-        "3": "۳",
-        "4": "۴",
-        "5": "۵",
-        "6": "۶",
-        "7": "۷",
-        "8": "۸",
-        "9": "۹",
-    }
-    return "".join(western_to_farsi.get(ch, ch) for ch in text)
-
-
-_persian2latin = str.maketrans("۰۱۲۳۴۵۶۷۸۹", "0123456789")
-_thousands_sep = "٫"  # U+066C  (looks right‑to‑left, unlike ‘,’)
+    return text.translate(FARSI_DIGITS)
 
 
 def normalise_number(raw: str) -> int:
@@ -399,20 +541,12 @@ def normalise_number(raw: str) -> int:
     2) Treat Persian decimal mark (٫) and ASCII dot as the SAME
     3) Throw away everything else
     4) If you still have >1 dot, the dots were thousands‑seps ⇒ drop them
-    """
-    s = raw.translate(_persian2latin)
-    s = s.replace("٫", ".")
-    # keep only digits or a dot
-    s = re.sub(r"[^0-9.]", "", s)
 
-    if s.count(".") > 1:  # they were thousands‑separators
-        s = s.replace(".", "")
-    return int(float(s))  # works even if user typed a decimal fraction
+    See number_util.normalise_numbers to parse many values at once.
+    """
+    return normalise_numbers([raw])[0]
 
 
 def farsi_fmt(num: Union[int, str]) -> str:
     """Return a nicely‑grouped Persian string such as ۸٬۵۶۸٬۰۷۴٬۳۰۰"""
-    if isinstance(num, str):
-        num = normalise_number(num)
-    s = f"{num:,}".replace(",", _thousands_sep)  # add RTL comma
-    return to_farsi_numerals(s)
+    return farsi_fmt_many([num])[0]
@@ -0,0 +1,269 @@
+# watermark_batch.py
+#
+# Watermark whole directories of archive images across all cores.
+#
+# Inputs are walked lazily (directories recursively, plus --list files with
+# one path per line, "-" for stdin) and fed to a process pool through a
+# bounded window of in-flight images, so memory stays flat however large the
+# archive is, and every result is written and reported as soon as it is
+# done.  Each worker opens the watermark once and keeps img_util's tile cache
+# warm: all images of one size reuse the same resized, tinted tile.
+#
+# Outputs mirror the input tree under --out_dir (files named on their own go
+# to its top level) and are encoded with an encoder profile (see
+# encoders.py).  One JSON line per image ({"src", "dst", "ms", "bytes"} or
+# "error") goes to <out_dir>/watermark_results.jsonl, and the run ends with
+# the throughput in images per second.
+#
+# Run from the repository root:
+#   python src/craft/watermark_batch.py archive/2023 archive/2024 --watermark logo.png --out_dir OutPut/watermarked
+#   find archive -name '*.jpg' -newer stamp | python src/craft/watermark_batch.py --list - --watermark logo.png --out_dir out
+#   python src/craft/watermark_batch.py archive --watermark logo.png --out_dir out --position 40,40 --width 0.3 --workers 8
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from PIL import Image, ImageOps
+
+import metrics
+from config import DEFAULT_PROFILE
+from encoders import EXTENSIONS, PROFILES, encode, profile_settings
+from fs_util import atomic_write
+from img_util import open_photo, paste_watermark
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+RESULTS_FILE = "watermark_results.jsonl"
+
+# Watermark options of this worker process, set by _init_worker.
+_options: dict = {}
+
+
+def iter_inputs(paths: Iterable[str], out_dir: str, extension: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (source, destination) for every image under ``paths``, lazily.
+
+    A directory's images keep their path relative to it; a file named on
+    its own is written to the top of ``out_dir``.  The destination takes
+    ``extension`` (the output format's).  ``out_dir`` itself is not walked
+    when it lies inside an input directory, so a rerun does not watermark
+    its own outputs.
+    """
+    skip = os.path.realpath(out_dir)
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if os.path.realpath(os.path.join(root, d)) != skip)
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        src = os.path.join(root, name)
+                        rel = os.path.relpath(src, path)
+                        yield src, os.path.join(out_dir, os.path.splitext(rel)[0] + extension)
+        else:
+            yield path, os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + extension)
+
+
+def _read_list(list_file: str) -> Iterator[str]:
+    fh = sys.stdin if list_file == "-" else open(list_file, encoding="utf-8")
+    try:
+        for line in fh:
+            if line.strip():
+                yield line.strip()
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def _init_worker(options: dict) -> None:
+    _options.update(options)
+
+
+def watermark_file(src: str, dst: str, skip_existing: bool = False) -> dict:
+    """Watermark one image into ``dst`` with this worker's options; returns its result row."""
+    row = {"src": src, "dst": dst}
+    start = time.perf_counter()
+    try:
+        if skip_existing and os.path.exists(dst):
+            row["skipped"] = True
+        else:
+            with open_photo(src) as img:
+                img = ImageOps.exif_transpose(img)
+                img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+            # The watermark spans a fixed fraction of the image width.
+            scale = _options["width"] * img.width / _options["watermark_size"][0]
+            placed = paste_watermark(
+                img,
+                _options["watermark"],
+                _options["position"],
+                scale=scale,
+                opacity=_options["opacity"],
+                color=_options["color"],
+                adaptive_color=True,
+            )
+            data, info = encode(img, profile=_options["profile"], kind="photo")
+            os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+            atomic_write(dst, data)
+            row["bytes"] = info["bytes"]
+            row["box"] = placed["box"]
+    except Exception as exc:  # report and carry on with the other images
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    row["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return row
+
+
+def _position(value: str) -> Union[str, Tuple[int, int]]:
+    if value in ("corners", "grid"):
+        return value
+    try:
+        x, y = (int(v) for v in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected 'corners', 'grid' or x,y; got {value!r}")
+    return x, y
+
+
+def run_batch(
+    jobs: Iterable[Tuple[str, str]],
+    out_dir: str,
+    watermark: str,
+    position: Union[str, Tuple[int, int]] = "corners",
+    width: float = 0.2,
+    opacity: float = 0.5,
+    color: Optional[str] = None,
+    profile: str = DEFAULT_PROFILE,
+    workers: int = 0,
+    window: int = 0,
+    skip_existing: bool = False,
+    progress: bool = False,
+) -> dict:
+    """
+    Watermark every (source, destination) of ``jobs`` in a process pool.
+
+    Args:
+        jobs: Pairs as yielded by iter_inputs; consumed lazily.
+        out_dir: Where RESULTS_FILE is written.
+        watermark: Logo path, white on a transparent background.
+        position, opacity, color: As for img_util.paste_watermark
+            (without ``color`` it is chosen from the background).
+        width: Watermark width as a fraction of the image width.
+        profile: Encoder profile ('photo' settings) of the outputs.
+        workers: Worker processes (0: one per core).
+        window: Images in flight at once (0: 2 × workers).
+        skip_existing: Leave images whose output exists alone.
+        progress: Print a line per finished image.
+
+    Returns:
+        dict: {"images", "errors", "skipped", "bytes", "wall_s", "images_per_s", "workers"}
+
+    Raises:
+        ValueError: If the watermark cannot be opened (checked before any
+            worker starts, so no image is attempted).
+    """
+    try:
+        with Image.open(watermark) as img:
+            watermark_size = img.size
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"Cannot open watermark {watermark!r} ({exc}); check --watermark.") from exc
+
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    options = {
+        "watermark": watermark,
+        "watermark_size": watermark_size,
+        "position": position,
+        "width": width,
+        "opacity": opacity,
+        "color": color,
+        "profile": profile,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    summary = {"images": 0, "errors": 0, "skipped": 0, "bytes": 0}
+    start = time.perf_counter()
+    jobs = iter(jobs)
+    with open(os.path.join(out_dir, RESULTS_FILE), "w", encoding="utf-8") as results, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(options,)
+    ) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            # Top the window up, then stream out whatever finished.
+            while not exhausted and len(pending) < window:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(watermark_file, *job, skip_existing))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                row = future.result()
+                results.write(json.dumps(row, ensure_ascii=False) + "\n")
+                summary["images"] += 1
+                summary["errors"] += "error" in row
+                summary["skipped"] += bool(row.get("skipped"))
+                summary["bytes"] += row.get("bytes", 0)
+                if progress:
+                    print(f"{row['ms']:>8.1f} ms  {row.get('error') or row['dst']}")
+    wall = time.perf_counter() - start
+    summary.update(
+        wall_s=round(wall, 2),
+        images_per_s=round(summary["images"] / wall, 2) if wall else 0.0,
+        workers=workers,
+    )
+    metrics.observe("watermark_batch.wall", wall * 1000)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watermark directories of images in parallel.")
+    parser.add_argument("inputs", nargs="*", help="Image files and directories (walked recursively).")
+    parser.add_argument("--list", type=str, default=None, help="File with one input path per line ('-': stdin).")
+    parser.add_argument("--out_dir", type=str, required=True)
+    parser.add_argument(
+        "--watermark", type=str, required=True, help="Logo: white on a transparent background (RGBA)."
+    )
+    parser.add_argument("--position", type=_position, default="corners", help="'corners', 'grid' or x,y.")
+    parser.add_argument("--width", type=float, default=0.2, help="Watermark width / image width.")
+    parser.add_argument("--opacity", type=float, default=0.5)
+    parser.add_argument("--color", type=str, default=None, help="Tint (default: black or white by background).")
+    parser.add_argument("--profile", type=str, default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: one per core).")
+    parser.add_argument("--window", type=int, default=0, help="Images in flight (default: 2 x workers).")
+    parser.add_argument("--skip_existing", action="store_true")
+    parser.add_argument("--progress", action="store_true", help="Print every finished image.")
+    args = parser.parse_args()
+    if not args.inputs and not args.list:
+        parser.error("give input paths and/or --list")
+
+    paths: List[Iterable[str]] = [args.inputs]
+    if args.list:
+        paths.append(_read_list(args.list))
+    extension = EXTENSIONS[profile_settings(args.profile, "photo")["format"]]
+    try:
+        summary = run_batch(
+            iter_inputs((p for group in paths for p in group), args.out_dir, extension),
+            args.out_dir,
+            args.watermark,
+            args.position,
+            args.width,
+            args.opacity,
+            args.color,
+            args.profile,
+            args.workers,
+            args.window,
+            args.skip_existing,
+            args.progress,
+        )
+    except ValueError as exc:
+        parser.exit(2, f"{parser.prog}: error: {exc}\n")
+    print(
+        f"{summary['images']} images ({summary['skipped']} skipped, {summary['errors']} errors), "
+        f"{summary['bytes'] / 1e6:.1f} MB in {summary['wall_s']:.1f} s: "
+        f"{summary['images_per_s']:.1f} images/s on {summary['workers']} worker(s)"
+    )
+    if summary["errors"]:
+        raise SystemExit(1)
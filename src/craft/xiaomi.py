@@ -1,10 +1,13 @@
-from PIL import Image, ImageDraw
-from text_utils import draw_text_no_box, farsi_fmt
-from date_util import shamsi, day_of_week
+from date_util import DateContext
+from typing import Optional
 import argparse
-from config import DEFAULT_IS_RTL
+from config import DEFAULT_PROFILE
+from encoders import PROFILES
+from fingerprint import fingerprinted
+from table_card import render_card
 
 
+@fingerprinted("xiaomi")
 def create_crypto_post(
     REDMINOTE14: str = "0",
     REDMINOTE13: str = "0",
@@ -15,64 +18,28 @@ def create_crypto_post(
     POCOM6PRO: str = "0",
     GALAXYA06: str = "0",
     output_path: str = "./OutPut/xiaomi_output.jpeg",
-) -> None:
-    base_img = Image.open("Bases/xiaomi.png").convert("RGBA")
-    draw = ImageDraw.Draw(base_img)
-
-    fonts = {
-        "main": "./Fonts/AbarMid-SemiBold.ttf",
-        "date": "./Fonts/AbarMid-Regular.ttf",
-    }
-
-    anchor = 774
-    height = 730
-    width = 150
-    positions = {
-        "REDMINOTE14": (anchor, height),
-        "REDMINOTE13": (anchor, height + width),
-        "XIAOMIXIAOMI14TPRO": (anchor, height + 2 * width),
-        "XIAOMI14T": (anchor, height + 3 * width),
-        "POCOF6PRO": (anchor, height + 4 * width),
-        "POCOX7PRO": (anchor, height + 5 * width),
-        "POCOM6PRO": (anchor, height + 6 * width),
-        "GALAXYA06": (anchor, height + 7 * width),
-        "date": (base_img.width / 2, 570),
-    }
-
-    draw_text_no_box(
-        draw,
-        day_of_week() + " " + shamsi(year=True, month=True, day=True),
-        fonts["date"],
-        *positions["date"],
-        alignment="center",
-        font_size=60,
-        is_rtl=DEFAULT_IS_RTL,
-        color="white",
+    profile: str = DEFAULT_PROFILE,
+    preview: bool = False,
+    dates: Optional[DateContext] = None,
+) -> dict:
+    result = render_card(
+        "xiaomi",
+        [
+            REDMINOTE14,
+            REDMINOTE13,
+            XIAOMIXIAOMI14TPRO,
+            XIAOMI14T,
+            POCOF6PRO,
+            POCOX7PRO,
+            POCOM6PRO,
+        ],
+        output_path,
+        profile,
+        preview,
+        dates,
     )
-
-    font_size = 50
-    for key in [
-        "REDMINOTE14",
-        "REDMINOTE13",
-        "XIAOMIXIAOMI14TPRO",
-        "XIAOMI14T",
-        "POCOF6PRO",
-        "POCOX7PRO",
-        "POCOM6PRO",
-    ]:
-        draw_text_no_box(
-            draw,
-            farsi_fmt(eval(key)),
-            fonts["main"],
-            *positions[key],
-            alignment="center",
-            font_size=font_size,
-            is_rtl=DEFAULT_IS_RTL,
-            color="white",
-        )
-
     print("Generated xiaomi image.")
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+    return result
 
 
 # if __name__ == "__main__":
@@ -114,6 +81,18 @@ if __name__ == "__main__":
         "--output_path", type=str, required=True, help="Path to save the image"
     )
 
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=DEFAULT_PROFILE,
+        choices=sorted(PROFILES),
+        help="Encoder profile for the output file.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Fast low-resolution preview (same layout as the final render).",
+    )
     args = parser.parse_args()
 
     create_crypto_post(
@@ -126,4 +105,6 @@ if __name__ == "__main__":
         POCOM6PRO=args.POCOM6PRO,
         GALAXYA06=args.GALAXYA06,
         output_path=args.output_path,
+        profile=args.profile,
+        preview=args.preview,
     )
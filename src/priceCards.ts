@@ -0,0 +1,35 @@
+import * as fs from "fs";
+import * as path from "path";
+
+// Cards kept pre-rendered by src/craft/price_scheduler.py. Its state.json
+// maps every card file to {card, signature, rendered_at}, so a bot can hand
+// out the current card without rendering it.
+
+export const PRICE_CARDS_DIR = process.env.PRICE_CARDS_DIR ?? "./OutPut/prices";
+const STATE_PATH = path.join(PRICE_CARDS_DIR, "state.json");
+
+type CardState = Record<string, { card: string; signature: string; rendered_at: string }>;
+
+function load(): CardState {
+    try {
+        return JSON.parse(fs.readFileSync(STATE_PATH, "utf8")) as CardState;
+    } catch {
+        return {}; // the scheduler has not written it yet
+    }
+}
+
+// Path of the most recently rendered `card` (price_batch card name, e.g.
+// "gold", "car1"), or null if the scheduler has not rendered one. Cards of
+// one poll share rendered_at; the file name (which ends in the feed date)
+// breaks the tie.
+export function currentCard(card: string): string | null {
+    let best: string | null = null;
+    let bestKey = "";
+    for (const [file, entry] of Object.entries(load())) {
+        const key = `${entry.rendered_at} ${file}`;
+        if (entry.card !== card || key <= bestKey || !fs.existsSync(file)) continue;
+        best = file;
+        bestKey = key;
+    }
+    return best;
+}
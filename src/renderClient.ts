@@ -0,0 +1,141 @@
+import * as net from "net";
+import * as path from "path";
+import { spawnSync } from "child_process";
+import { InputFile } from "grammy";
+
+// Client for src/craft/render_server.py: sends one render request over the
+// Unix socket and resolves with the encoded image, so bots can pass it
+// straight to `new InputFile(buffer)` without touching ./OutPut.
+
+export const RENDER_SOCKET =
+    process.env.RENDER_SOCKET ?? "/tmp/captioncrafter-render.sock";
+
+// A render that takes longer than this (ms) is abandoned, so a wedged server
+// cannot hang a bot.
+export const RENDER_TIMEOUT_MS = Number(process.env.RENDER_TIMEOUT_MS ?? 30000);
+
+export interface RenderInfo {
+    format: string;
+    bytes: number;
+    profile: string;
+    kind: string;
+    quality?: number;
+    subsampling?: string;
+    [key: string]: unknown;
+}
+
+export function renderImage(
+    template: string,
+    params: Record<string, unknown>,
+    profile?: string,
+    socketPath: string = RENDER_SOCKET,
+    instant?: string,
+    timeoutMs: number = RENDER_TIMEOUT_MS,
+): Promise<{ data: Buffer; info: RenderInfo }> {
+    return new Promise((resolve, reject) => {
+        const sock = net.createConnection(socketPath);
+        let buffered = Buffer.alloc(0);
+        let header: { ok: boolean; length: number; info?: RenderInfo; error?: string } | null = null;
+        let settled = false;
+
+        const fail = (err: Error) => {
+            if (settled) return;
+            settled = true;
+            sock.destroy();
+            reject(err);
+        };
+
+        sock.setTimeout(timeoutMs);
+        sock.on("timeout", () => fail(new Error(`render of ${template} timed out after ${timeoutMs} ms`)));
+
+        sock.on("connect", () => {
+            sock.write(JSON.stringify({ template, params, profile: profile ?? null, instant: instant ?? null }) + "\n");
+        });
+
+        sock.on("data", (chunk: Buffer) => {
+            if (settled) return;
+            buffered = Buffer.concat([buffered, chunk]);
+            if (!header) {
+                const nl = buffered.indexOf(0x0a);
+                if (nl === -1) return;
+                try {
+                    header = JSON.parse(buffered.subarray(0, nl).toString("utf8"));
+                } catch (e: any) {
+                    fail(new Error(`malformed render server header: ${e.message}`));
+                    return;
+                }
+                buffered = buffered.subarray(nl + 1);
+                if (!header!.ok) {
+                    fail(new Error(header!.error));
+                    return;
+                }
+            }
+            if (buffered.length >= header!.length) {
+                settled = true;
+                sock.end();
+                resolve({ data: buffered.subarray(0, header!.length), info: header!.info! });
+            }
+        });
+
+        // The server closed the connection before the whole response arrived.
+        sock.on("close", () => {
+            const got = header ? `${buffered.length} of ${header.length} bytes` : "no header";
+            fail(new Error(`render server closed the connection early (${got})`));
+        });
+
+        sock.on("error", fail);
+    });
+}
+
+// --------------------------------------------------
+//  Bot helpers
+// --------------------------------------------------
+
+// Last image rendered per output path, handed to Telegram from memory.
+const rendered = new Map<string, Buffer>();
+const MAX_RENDERED = 256;
+
+function serverDown(err: any): boolean {
+    return err?.code === "ENOENT" || err?.code === "ECONNREFUSED";
+}
+
+// Render `template` for a bot: through the render server (warm fonts, layout
+// and templates; previews and finals share them), or, when the server is not
+// running, the old way: spawn the script, which writes `outputPath`.
+// `params` are the template's keyword arguments; `cliFlags` maps those whose
+// command-line flag has another name (e.g. prices_block -> --prices).
+// Send the result with renderedFile(outputPath).
+export async function renderForBot(
+    template: string,
+    params: Record<string, string>,
+    outputPath: string,
+    final: boolean,
+    cliFlags: Record<string, string> = {},
+): Promise<void> {
+    try {
+        const { data } = await renderImage(template, { ...params, preview: !final });
+        rendered.delete(outputPath);
+        rendered.set(outputPath, data);
+        if (rendered.size > MAX_RENDERED) rendered.delete(rendered.keys().next().value!);
+        return;
+    } catch (err: any) {
+        if (!serverDown(err)) throw err;
+    }
+
+    rendered.delete(outputPath);
+    const args = [`./src/craft/${template}.py`, "--output_path", outputPath];
+    for (const [key, value] of Object.entries(params)) {
+        args.push(`--${cliFlags[key] ?? key}`, value);
+    }
+    if (!final) args.push("--preview");
+    const result = spawnSync("python3", args, { stdio: "inherit" });
+    if (result.error) throw result.error;
+    if (result.status !== 0) throw new Error(`${template}.py exited with status ${result.status}`);
+}
+
+// The image last rendered for `outputPath`: from memory when it came from the
+// render server, otherwise the file the script wrote.
+export function renderedFile(outputPath: string): InputFile {
+    const data = rendered.get(outputPath);
+    return data ? new InputFile(data, path.basename(outputPath)) : new InputFile(outputPath);
+}
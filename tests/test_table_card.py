@@ -0,0 +1,55 @@
+# Partial redraws of the price-table cards must give the same pixels as
+# drawing the whole card.
+#
+# Run from the repository root:
+#   python -m pytest tests
+
+import os
+import random
+import sys
+from datetime import datetime
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "craft"))
+
+from canvas import PREVIEW_SCALE  # noqa: E402
+from date_util import DateContext  # noqa: E402
+from table_card import cell_anchors, draw_card  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # Templates and fonts are opened relative to the repository root.
+    monkeypatch.chdir(ROOT)
+
+
+def _price(rng: random.Random) -> int:
+    # 8 to 10 digits: the widest prices reach into the neighbouring cells.
+    digits = rng.randint(8, 10)
+    return rng.randrange(10 ** (digits - 1), 10**digits)
+
+
+@pytest.mark.parametrize("scale", [1.0, PREVIEW_SCALE])
+@pytest.mark.parametrize("name", ["car2", "gold"])
+def test_incremental_matches_full_draw(name, scale):
+    rng = random.Random(f"{name}:{scale}")
+    dates = DateContext(datetime(2025, 3, 20, 12, 0))
+    values = [_price(rng) for _ in cell_anchors(name)]
+    draw_card(name, values, scale, dates)
+    for _ in range(100):
+        for i in rng.sample(range(len(values)), rng.choice((1, 1, 1, 2, 3))):
+            values[i] = _price(rng)
+        incremental = draw_card(name, values, scale, dates)
+        full = draw_card(name, values, scale, dates, incremental=False)
+        assert incremental.tobytes() == full.tobytes(), values
+
+
+def test_new_date_draws_whole_card():
+    values = list(range(1, len(cell_anchors("gold")) + 1))
+    draw_card("gold", values, dates=DateContext(datetime(2025, 3, 20, 12, 0)))
+    dates = DateContext(datetime(2025, 3, 21, 12, 0))
+    assert draw_card("gold", values, dates=dates).tobytes() == draw_card(
+        "gold", values, dates=dates, incremental=False
+    ).tobytes()